@@ -7,6 +7,12 @@ load_dotenv()
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 
+# Campaign engine storage: "supabase", or "sqlite" for fully local runs
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "supabase").lower()
+SQLITE_PATH = os.getenv("SQLITE_PATH", "campaign_engine.db")
+# Threads async code runs storage calls on; they share the client's one keep-alive pool
+STORAGE_WORKERS = int(os.getenv("STORAGE_WORKERS", "8"))
+
 # Gmail OAuth
 GOOGLE_CLIENT_ID = os.getenv("GOOGLE_CLIENT_ID")
 GOOGLE_CLIENT_SECRET = os.getenv("GOOGLE_CLIENT_SECRET")
@@ -16,3 +22,49 @@ GOOGLE_REDIRECT_URI = os.getenv("GOOGLE_REDIRECT_URI")
 MICROSOFT_CLIENT_ID = os.getenv("MICROSOFT_CLIENT_ID")
 MICROSOFT_CLIENT_SECRET = os.getenv("MICROSOFT_CLIENT_SECRET")
 MICROSOFT_REDIRECT_URI = os.getenv("MICROSOFT_REDIRECT_URI")
+
+# Campaign processor
+DUE_CAMPAIGNS_PAGE_SIZE = int(os.getenv("DUE_CAMPAIGNS_PAGE_SIZE", "100"))
+CAMPAIGN_CONCURRENCY = int(os.getenv("CAMPAIGN_CONCURRENCY", "10"))
+COUNTER_FLUSH_EVERY = int(os.getenv("COUNTER_FLUSH_EVERY", "25"))
+COUNTER_FLUSH_INTERVAL = float(os.getenv("COUNTER_FLUSH_INTERVAL", "10"))
+CONTACT_BATCH_SIZE = int(os.getenv("CONTACT_BATCH_SIZE", "200"))
+SMTP_SEND_WORKERS = int(os.getenv("SMTP_SEND_WORKERS", "8"))
+TOKEN_REFRESH_MARGIN = int(os.getenv("TOKEN_REFRESH_MARGIN", "300"))
+SENDER_CONFIG_TTL = int(os.getenv("SENDER_CONFIG_TTL", "300"))
+SMTP_TIMEOUT = int(os.getenv("SMTP_TIMEOUT", "30"))
+SMTP_POOL_MAX_IDLE = int(os.getenv("SMTP_POOL_MAX_IDLE", "2"))
+SMTP_POOL_IDLE_TIMEOUT = int(os.getenv("SMTP_POOL_IDLE_TIMEOUT", "60"))
+SMTP_POOL_MAX_MESSAGES = int(os.getenv("SMTP_POOL_MAX_MESSAGES", "100"))
+SEND_BURST = int(os.getenv("SEND_BURST", "1"))
+GMAIL_BATCH_SIZE = int(os.getenv("GMAIL_BATCH_SIZE", "50"))
+GRAPH_BATCH_SIZE = int(os.getenv("GRAPH_BATCH_SIZE", "20"))  # Graph allows at most 20 per $batch
+# Adaptive pacing: on a provider throttle the sender's rate is multiplied by
+# ADAPTIVE_DECREASE, then climbs back by 1/ADAPTIVE_RAMP_SENDS of the ceiling per delivered email
+ADAPTIVE_DECREASE = float(os.getenv("ADAPTIVE_DECREASE", "0.5"))
+ADAPTIVE_RAMP_SENDS = int(os.getenv("ADAPTIVE_RAMP_SENDS", "20"))
+ADAPTIVE_MIN_RATE = float(os.getenv("ADAPTIVE_MIN_RATE", "0.0167"))  # emails/s, about one a minute
+# Transient send failures are retried from the step queue after RETRY_BASE_DELAY * 2^(attempt-1)
+# seconds (jittered, capped at RETRY_MAX_DELAY); after RETRY_MAX_ATTEMPTS tries they are dead-lettered
+RETRY_MAX_ATTEMPTS = int(os.getenv("RETRY_MAX_ATTEMPTS", "5"))
+RETRY_BASE_DELAY = float(os.getenv("RETRY_BASE_DELAY", "30"))
+RETRY_MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY", "3600"))
+WORKER_ID = os.getenv("WORKER_ID")  # defaults to host-pid-random per process
+CAMPAIGN_LEASE_SECONDS = int(os.getenv("CAMPAIGN_LEASE_SECONDS", "60"))
+# Safety-net poll for campaigns scheduled without a notify call (e.g. edited straight in Supabase)
+CAMPAIGN_RECONCILE_INTERVAL = int(os.getenv("CAMPAIGN_RECONCILE_INTERVAL", "60"))
+
+# Outbound HTTP (provider APIs, OAuth, scraping)
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "10"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "30"))
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "true").lower() == "true"
+
+# Logging
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# Per-subsystem levels by logger name, e.g. "app.routes.gmail_send=DEBUG,app.services.smtp_pool=WARNING"
+LOG_LEVELS = os.getenv("LOG_LEVELS", "httpx=WARNING,httpcore=WARNING,hpack=WARNING")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()  # "text" or "json"
+LOG_RECIPIENT_SAMPLE = int(os.getenv("LOG_RECIPIENT_SAMPLE", "100"))  # log 1 in N delivered emails; 0 = none
@@ -2,6 +2,9 @@ from fastapi import APIRouter, HTTPException, BackgroundTasks
 from pydantic import BaseModel
 from typing import Optional, Dict, Any
 import logging
+from app.services.templates import compile_template, SINGLE_BRACE
+from app.services.smtp_pool import smtp_pool
+from app.services.retry_policy import classify_smtp_exception
 
 # Add this at the top of your existing email_campaign_processor.py file
 router = APIRouter()
@@ -94,42 +97,21 @@ async def process_specific_campaign(campaign_id: str):
 
 
 def send_email_smtp_basic(smtp_host, smtp_port, smtp_user, smtp_pass, sender_email, sender_name, recipient, subject, body, use_tls=True):
-    """Send email via basic SMTP with timeout and retry logic."""
+    """Send email via basic SMTP, one attempt; a failure is logged with its retry_policy kind."""
     msg = MIMEText(body, "html")
     msg["Subject"] = subject
     msg["From"] = f"{sender_name} <{sender_email}>"
     msg["To"] = recipient
 
-    for attempt in range(config.max_retries):
-        try:
-            if smtp_port == 465:  # SSL port
-                context = ssl.create_default_context()
-                with smtplib.SMTP_SSL(smtp_host, smtp_port, context=context, timeout=config.smtp_timeout) as server:
-                    if smtp_user and smtp_pass:
-                        server.login(smtp_user, smtp_pass)
-                    server.sendmail(sender_email, [recipient], msg.as_string())
-            else:
-                with smtplib.SMTP(smtp_host, smtp_port, timeout=config.smtp_timeout) as server:
-                    if use_tls:
-                        server.starttls()
-                    if smtp_user and smtp_pass:
-                        server.login(smtp_user, smtp_pass)
-                    server.sendmail(sender_email, [recipient], msg.as_string())
-            logger.info(f"✅ Sent email to {recipient} via basic SMTP")
-            return True
-        except (socket.timeout, smtplib.SMTPServerDisconnected, ConnectionResetError) as e:
-            if attempt < config.max_retries - 1:
-                wait_time = 2 ** attempt
-                logger.warning(f"Transient error (attempt {attempt + 1}), retrying in {wait_time}s: {e}")
-                time.sleep(wait_time)
-            else:
-                logger.error(f"❌ Basic SMTP error sending to {recipient} after {config.max_retries} attempts: {e}")
-                return False
-        except Exception as e:
-            logger.error(f"❌ Basic SMTP error sending to {recipient}: {e}")
-            return False
-    
-    return False
+    try:
+        with smtp_pool.session(smtp_host, smtp_port, smtp_user, smtp_pass,
+                               use_tls=use_tls, use_ssl=smtp_port == 465) as server:
+            server.sendmail(sender_email, [recipient], msg.as_string())
+        logger.info(f"✅ Sent email to {recipient} via basic SMTP")
+        return True
+    except Exception as e:
+        logger.error(f"❌ Basic SMTP error sending to {recipient} ({classify_smtp_exception(e)}): {e}")
+        return False
 
 def refresh_oauth_token_if_needed(sender: Dict[str, Any]) -> Dict[str, Any]:
     """Check if OAuth token needs refresh and handle it."""
@@ -213,20 +195,13 @@ def track_campaign_progress(campaign_id: str, contact_email: str, status: str, e
 
 def personalize_email(body: str, contact: Dict[str, Any]) -> str:
     """Personalize email body with contact information."""
-    personalized = body
-    
-    # Replace common placeholders
-    placeholders = {
-        "{first_name}": contact.get("first_name", "there"),
-        "{last_name}": contact.get("last_name", ""),
-        "{email}": contact.get("email", ""),
-        "{company}": contact.get("company", ""),
-    }
-    
-    for placeholder, value in placeholders.items():
-        personalized = personalized.replace(placeholder, str(value))
-    
-    return personalized
+    # Replace common placeholders; any other {field} is left as written
+    return compile_template(body, SINGLE_BRACE).render({
+        "first_name": contact.get("first_name", "there"),
+        "last_name": contact.get("last_name", ""),
+        "email": contact.get("email", ""),
+        "company": contact.get("company", ""),
+    })
 
 def process_campaigns():
     """Process all scheduled and running campaigns."""
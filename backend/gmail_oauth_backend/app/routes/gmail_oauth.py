@@ -1,15 +1,16 @@
 from fastapi import APIRouter, HTTPException
 from urllib.parse import urlencode
-import requests
 from datetime import datetime, timedelta
 from app.config import GOOGLE_CLIENT_ID, GOOGLE_CLIENT_SECRET, GOOGLE_REDIRECT_URI
 from app.services.supabase_client import supabase
+from app.services.sender_config_cache import sender_config_cache
+from app.services.http_client import get_http_client
 
 router = APIRouter()
 
 def get_user_email(access_token: str) -> str:
     headers = {"Authorization": f"Bearer {access_token}"}
-    response = requests.get("https://www.googleapis.com/oauth2/v2/userinfo", headers=headers)
+    response = get_http_client().get("https://www.googleapis.com/oauth2/v2/userinfo", headers=headers)
     data = response.json()
 
     if "email" not in data:
@@ -40,7 +41,7 @@ def google_oauth_callback(code: str):
         "grant_type": "authorization_code"
     }
 
-    token_response = requests.post(token_url, data=data)
+    token_response = get_http_client().post(token_url, data=data)
     token_data = token_response.json()
 
     if "access_token" not in token_data:
@@ -62,5 +63,6 @@ def google_oauth_callback(code: str):
         "token_expires_at": token_expires_at.isoformat(),
         "is_active": True
     }).execute()
+    sender_config_cache.invalidate(email)
 
     return {"message": "Gmail OAuth token saved to Supabase!", "email": email}
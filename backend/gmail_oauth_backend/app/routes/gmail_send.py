@@ -1,78 +1,226 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from app.services.supabase_client import supabase
-import requests
-import base64
+import asyncio
+import json
+import re
+import uuid
 import os
 import smtplib
-import ssl
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+from concurrent.futures import ThreadPoolExecutor
 from email.utils import formataddr
-from email.header import Header
 import logging
+from app.config import SMTP_SEND_WORKERS, GMAIL_BATCH_SIZE, GRAPH_BATCH_SIZE
+from app.services.token_manager import token_manager
+from app.services.sender_config_cache import sender_config_cache
+from app.services.smtp_pool import smtp_pool
+from app.services.http_client import get_http_client, get_async_http_client
+from app.services.mime_builder import build_envelope
+from app.services.metrics import track_sends
+from app.services.retry_policy import (
+    THROTTLED, TRANSIENT, PERMANENT_SENDER, classify_http_failure, classify_smtp_exception, classify_exception
+)
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+GOOGLE_TOKEN_URL = "https://oauth2.googleapis.com/token"
+GMAIL_SEND_URL = "https://gmail.googleapis.com/gmail/v1/users/me/messages/send"
+GMAIL_BATCH_URL = "https://www.googleapis.com/batch/gmail/v1"
+GMAIL_BATCH_SEND_PATH = "/gmail/v1/users/me/messages/send"
+MICROSOFT_TOKEN_URL = "https://login.microsoftonline.com/common/oauth2/v2.0/token"
+GRAPH_SEND_MAIL_URL = "https://graph.microsoft.com/v1.0/me/sendMail"
+GRAPH_BATCH_URL = "https://graph.microsoft.com/v1.0/$batch"
+# Provider answers that mean "slow down" rather than "this email failed"
+THROTTLED_STATUSES = (429, 503)
+SMTP_THROTTLED_CODES = (421, 451)
+
+# smtplib is blocking; async callers run it here so the event loop stays free
+_smtp_executor = ThreadPoolExecutor(max_workers=SMTP_SEND_WORKERS, thread_name_prefix="smtp-send")
+
 class EmailRequest(BaseModel):
     from_email: str  # Sender email
     to_email: str    # Recipient
     subject: str
     body: str
 
+# ------------------ Throttling ------------------ #
+def _retry_after(headers, default: float = None) -> float:
+    """Seconds from a Retry-After header (httpx headers or a plain dict), else `default`"""
+    for name, value in (headers or {}).items():
+        if name.lower() == "retry-after":
+            try:
+                return max(0.0, float(value))
+            except (TypeError, ValueError):
+                break
+    return default
+
+def _throttled_result(error_msg: str, status_code: int, retry_after: float = None) -> dict:
+    """
+    A send the provider deferred (429/503, Gmail rate-limit 403, SMTP 421/451).
+    The processor slows the sender down and queues the email again instead
+    of counting it as failed.
+    """
+    logger.warning(error_msg)
+    return {"success": False, "error": error_msg, "status_code": status_code, "failure": THROTTLED, "retry_after": retry_after}
+
+def _failed_result(error_msg: str, failure: str, status_code: int = None) -> dict:
+    """
+    A send that did not go out. `failure` is its retry_policy kind: the
+    processor retries transient failures later and dead-letters the rest.
+    """
+    logger.error(error_msg)
+    result = {"success": False, "error": error_msg, "failure": failure}
+    if status_code is not None:
+        result["status_code"] = status_code
+    return result
+
 # ------------------ Gmail Helpers ------------------ #
-def get_gmail_access_token(refresh_token: str) -> str:
-    """Get fresh Gmail access token using refresh token"""
-    token_url = "https://oauth2.googleapis.com/token"
-    data = {
+def _gmail_refresh_data(refresh_token: str) -> dict:
+    return {
         "client_id": os.getenv("GOOGLE_CLIENT_ID"),
         "client_secret": os.getenv("GOOGLE_CLIENT_SECRET"),
         "refresh_token": refresh_token,
         "grant_type": "refresh_token"
     }
 
-    response = requests.post(token_url, data=data)
+def refresh_gmail_token(refresh_token: str) -> dict:
+    """Refresh a Gmail token; returns the token response (access_token, expires_in)"""
+    response = get_http_client().post(GOOGLE_TOKEN_URL, data=_gmail_refresh_data(refresh_token))
     if response.status_code != 200:
         logger.error(f"❌ Gmail token refresh failed: {response.text}")
         raise HTTPException(status_code=500, detail=f"Gmail token refresh failed: {response.text}")
 
-    return response.json().get("access_token")
+    return response.json()
 
-def send_via_gmail_oauth(refresh_token: str, from_email: str, to_email: str, subject: str, body: str) -> dict:
-    """Send email using Gmail OAuth"""
-    access_token = get_gmail_access_token(refresh_token)
+def get_gmail_access_token(refresh_token: str) -> str:
+    """Get fresh Gmail access token using refresh token"""
+    return refresh_gmail_token(refresh_token).get("access_token")
+
+async def refresh_gmail_token_async(refresh_token: str) -> dict:
+    """Refresh a Gmail token; returns the token response (access_token, expires_in)"""
+    response = await get_async_http_client().post(GOOGLE_TOKEN_URL, data=_gmail_refresh_data(refresh_token))
+    if response.status_code != 200:
+        logger.error(f"❌ Gmail token refresh failed: {response.text}")
+        raise HTTPException(status_code=500, detail=f"Gmail token refresh failed: {response.text}")
+
+    return response.json()
+
+async def get_gmail_access_token_async(refresh_token: str) -> str:
+    """Async variant of get_gmail_access_token"""
+    return (await refresh_gmail_token_async(refresh_token)).get("access_token")
 
-    # Build MIME message
-    message = MIMEText(body, "html", "utf-8")
-    message["to"] = to_email
-    message["from"] = from_email
-    message["subject"] = str(Header(subject, "utf-8"))
+def _gmail_raw_message(from_email: str, to_email: str, subject: str, body: str) -> str:
+    """The base64url-encoded MIME message the Gmail API expects (encoded once per distinct message)"""
+    return build_envelope(from_email, subject, body).gmail_raw(to_email)
 
-    raw_message = base64.urlsafe_b64encode(message.as_bytes()).decode()
+def _gmail_throttled(status_code: int, text: str) -> bool:
+    # Gmail reports per-user rate limits as 403 rateLimitExceeded/userRateLimitExceeded
+    return status_code in THROTTLED_STATUSES or (status_code == 403 and "ratelimitexceeded" in (text or "").lower())
+
+def _gmail_result(status_code: int, text: str, to_email: str, headers=None) -> dict:
+    if status_code not in [200, 202]:
+        error_msg = f"Gmail API error {status_code}: {text}"
+        if _gmail_throttled(status_code, text):
+            return _throttled_result(error_msg, status_code, _retry_after(headers))
+        return _failed_result(error_msg, classify_http_failure(status_code, text), status_code)
+
+    logger.debug("✅ Gmail: Sent email to %s", to_email)
+    return {"success": True, "message": f"Gmail: Email sent to {to_email}"}
+
+def send_via_gmail_oauth(refresh_token: str, from_email: str, to_email: str, subject: str, body: str, access_token: str = None) -> dict:
+    """Send email using Gmail OAuth"""
+    access_token = access_token or get_gmail_access_token(refresh_token)
 
-    gmail_api_url = "https://gmail.googleapis.com/gmail/v1/users/me/messages/send"
     headers = {
         "Authorization": f"Bearer {access_token}",
         "Content-Type": "application/json"
     }
-    payload = {"raw": raw_message}
+    payload = {"raw": _gmail_raw_message(from_email, to_email, subject, body)}
 
-    gmail_response = requests.post(gmail_api_url, headers=headers, json=payload)
+    gmail_response = get_http_client().post(GMAIL_SEND_URL, headers=headers, json=payload)
+    return _gmail_result(gmail_response.status_code, gmail_response.text, to_email, gmail_response.headers)
 
-    if gmail_response.status_code not in [200, 202]:
-        error_msg = f"Gmail API error {gmail_response.status_code}: {gmail_response.text}"
-        logger.error(error_msg)
-        return {"success": False, "error": error_msg}
+async def send_via_gmail_oauth_async(refresh_token: str, from_email: str, to_email: str, subject: str, body: str, access_token: str = None) -> dict:
+    """Send email using Gmail OAuth without blocking the event loop"""
+    access_token = access_token or await get_gmail_access_token_async(refresh_token)
 
-    logger.info(f"✅ Gmail: Sent email to {to_email}")
-    return {"success": True, "message": f"Gmail: Email sent to {to_email}"}
+    headers = {
+        "Authorization": f"Bearer {access_token}",
+        "Content-Type": "application/json"
+    }
+    payload = {"raw": _gmail_raw_message(from_email, to_email, subject, body)}
+
+    gmail_response = await get_async_http_client().post(GMAIL_SEND_URL, headers=headers, json=payload)
+    return _gmail_result(gmail_response.status_code, gmail_response.text, to_email, gmail_response.headers)
+
+def _gmail_batch_body(from_email: str, messages: list, boundary: str) -> str:
+    """multipart/mixed batch body: one messages.send call per part, Content-ID = index"""
+    parts = []
+    for index, message in enumerate(messages):
+        payload = json.dumps({"raw": _gmail_raw_message(from_email, message["to_email"], message["subject"], message["body"])})
+        parts.append(
+            f"--{boundary}\r\n"
+            "Content-Type: application/http\r\n"
+            f"Content-ID: <item-{index}>\r\n\r\n"
+            f"POST {GMAIL_BATCH_SEND_PATH}\r\n"
+            "Content-Type: application/json\r\n\r\n"
+            f"{payload}\r\n"
+        )
+    parts.append(f"--{boundary}--\r\n")
+    return "".join(parts)
+
+def _parse_gmail_batch_response(content_type: str, text: str) -> dict:
+    """Map item index -> (status_code, body, headers) from a multipart/mixed batch response"""
+    match = re.search(r'boundary="?([^";]+)"?', content_type or "")
+    if not match:
+        return {}
+
+    responses = {}
+    for part in text.split(f"--{match.group(1)}"):
+        part = part.strip()
+        if not part or part == "--":
+            continue
+        # Outer part headers, then the embedded HTTP response
+        outer_headers, _, inner = part.replace("\r\n", "\n").partition("\n\n")
+        content_id = re.search(r"Content-ID:\s*<response-item-(\d+)>", outer_headers, re.IGNORECASE)
+        status = re.match(r"HTTP/[\d.]+\s+(\d{3})", inner)
+        if not content_id or not status:
+            continue
+        inner_headers, _, body = inner.partition("\n\n")
+        retry_after = re.search(r"^Retry-After:\s*(\S+)", inner_headers, re.IGNORECASE | re.MULTILINE)
+        headers = {"Retry-After": retry_after.group(1)} if retry_after else None
+        responses[int(content_id.group(1))] = (int(status.group(1)), body.strip(), headers)
+    return responses
+
+async def send_gmail_batch_async(access_token: str, from_email: str, messages: list) -> list:
+    """
+    Send several messages in one Gmail HTTP batch request. `messages` holds
+    dicts with to_email, subject and body; returns one result dict per
+    message, in order. Each part succeeds or fails on its own, so a partial
+    failure only fails the affected recipients.
+    """
+    boundary = f"batch_{uuid.uuid4().hex}"
+    headers = {
+        "Authorization": f"Bearer {access_token}",
+        "Content-Type": f"multipart/mixed; boundary={boundary}"
+    }
+    batch_response = await get_async_http_client().post(
+        GMAIL_BATCH_URL, headers=headers, content=_gmail_batch_body(from_email, messages, boundary)
+    )
+    if batch_response.status_code != 200:
+        # The whole batch was rejected (auth, quota, malformed): every item failed
+        return [_gmail_result(batch_response.status_code, batch_response.text, m["to_email"], batch_response.headers) for m in messages]
+
+    responses = _parse_gmail_batch_response(batch_response.headers.get("content-type"), batch_response.text)
+    results = []
+    for index, message in enumerate(messages):
+        status_code, text, item_headers = responses.get(index, (502, "No response for this message in the batch", None))
+        results.append(_gmail_result(status_code, text, message["to_email"], item_headers))
+    return results
 
 # ------------------ Microsoft (Outlook) Helpers ------------------ #
-def get_outlook_access_token(refresh_token: str) -> str:
-    """Get fresh Outlook (Microsoft) access token using refresh token"""
-    token_url = "https://login.microsoftonline.com/common/oauth2/v2.0/token"
-    data = {
+def _outlook_refresh_data(refresh_token: str) -> dict:
+    return {
         "client_id": os.getenv("MICROSOFT_CLIENT_ID"),
         "client_secret": os.getenv("MICROSOFT_CLIENT_SECRET"),
         "refresh_token": refresh_token,
@@ -80,23 +228,34 @@ def get_outlook_access_token(refresh_token: str) -> str:
         "scope": "https://graph.microsoft.com/.default offline_access"
     }
 
-    response = requests.post(token_url, data=data)
+def refresh_outlook_token(refresh_token: str) -> dict:
+    """Refresh an Outlook token; returns the token response (access_token, expires_in)"""
+    response = get_http_client().post(MICROSOFT_TOKEN_URL, data=_outlook_refresh_data(refresh_token))
     if response.status_code != 200:
         logger.error(f"❌ Outlook token refresh failed: {response.text}")
         raise HTTPException(status_code=500, detail=f"Outlook token refresh failed: {response.text}")
 
-    return response.json().get("access_token")
+    return response.json()
 
-def send_via_outlook_oauth(refresh_token: str, from_email: str, to_email: str, subject: str, body: str) -> dict:
-    """Send email using Outlook OAuth (Microsoft Graph API)"""
-    access_token = get_outlook_access_token(refresh_token)
+def get_outlook_access_token(refresh_token: str) -> str:
+    """Get fresh Outlook (Microsoft) access token using refresh token"""
+    return refresh_outlook_token(refresh_token).get("access_token")
 
-    outlook_api_url = "https://graph.microsoft.com/v1.0/me/sendMail"
-    headers = {
-        "Authorization": f"Bearer {access_token}",
-        "Content-Type": "application/json"
-    }
-    payload = {
+async def refresh_outlook_token_async(refresh_token: str) -> dict:
+    """Refresh an Outlook token; returns the token response (access_token, expires_in)"""
+    response = await get_async_http_client().post(MICROSOFT_TOKEN_URL, data=_outlook_refresh_data(refresh_token))
+    if response.status_code != 200:
+        logger.error(f"❌ Outlook token refresh failed: {response.text}")
+        raise HTTPException(status_code=500, detail=f"Outlook token refresh failed: {response.text}")
+
+    return response.json()
+
+async def get_outlook_access_token_async(refresh_token: str) -> str:
+    """Async variant of get_outlook_access_token"""
+    return (await refresh_outlook_token_async(refresh_token)).get("access_token")
+
+def _outlook_payload(to_email: str, subject: str, body: str) -> dict:
+    return {
         "message": {
             "subject": subject,
             "body": {"contentType": "HTML", "content": body},
@@ -104,16 +263,78 @@ def send_via_outlook_oauth(refresh_token: str, from_email: str, to_email: str, s
         }
     }
 
-    outlook_response = requests.post(outlook_api_url, headers=headers, json=payload)
-
-    if outlook_response.status_code not in [200, 202]:
-        error_msg = f"Outlook API error {outlook_response.status_code}: {outlook_response.text}"
-        logger.error(error_msg)
-        return {"success": False, "error": error_msg}
+def _outlook_result(status_code: int, text: str, to_email: str, headers=None) -> dict:
+    if status_code not in [200, 202]:
+        error_msg = f"Outlook API error {status_code}: {text}"
+        if status_code in THROTTLED_STATUSES:
+            return _throttled_result(error_msg, status_code, _retry_after(headers))
+        return _failed_result(error_msg, classify_http_failure(status_code, text), status_code)
 
-    logger.info(f"✅ Outlook: Sent email to {to_email}")
+    logger.debug("✅ Outlook: Sent email to %s", to_email)
     return {"success": True, "message": f"Outlook: Email sent to {to_email}"}
 
+def send_via_outlook_oauth(refresh_token: str, from_email: str, to_email: str, subject: str, body: str, access_token: str = None) -> dict:
+    """Send email using Outlook OAuth (Microsoft Graph API)"""
+    access_token = access_token or get_outlook_access_token(refresh_token)
+
+    headers = {
+        "Authorization": f"Bearer {access_token}",
+        "Content-Type": "application/json"
+    }
+    outlook_response = get_http_client().post(GRAPH_SEND_MAIL_URL, headers=headers, json=_outlook_payload(to_email, subject, body))
+    return _outlook_result(outlook_response.status_code, outlook_response.text, to_email, outlook_response.headers)
+
+async def send_via_outlook_oauth_async(refresh_token: str, from_email: str, to_email: str, subject: str, body: str, access_token: str = None) -> dict:
+    """Send email using Outlook OAuth without blocking the event loop"""
+    access_token = access_token or await get_outlook_access_token_async(refresh_token)
+
+    headers = {
+        "Authorization": f"Bearer {access_token}",
+        "Content-Type": "application/json"
+    }
+    outlook_response = await get_async_http_client().post(
+        GRAPH_SEND_MAIL_URL, headers=headers, json=_outlook_payload(to_email, subject, body)
+    )
+    return _outlook_result(outlook_response.status_code, outlook_response.text, to_email, outlook_response.headers)
+
+async def send_outlook_batch_async(access_token: str, from_email: str, messages: list) -> list:
+    """
+    Send up to 20 messages in one Graph JSON $batch call; returns one result
+    dict per message, in order. Items Graph throttled (429/503) come back
+    marked throttled with their Retry-After, so the processor slows the
+    sender down and queues just those emails again; nothing is re-sent here.
+    """
+    headers = {
+        "Authorization": f"Bearer {access_token}",
+        "Content-Type": "application/json"
+    }
+    payload = {"requests": [{
+        "id": str(index),
+        "method": "POST",
+        "url": "/me/sendMail",
+        "headers": {"Content-Type": "application/json"},
+        "body": _outlook_payload(message["to_email"], message["subject"], message["body"]),
+    } for index, message in enumerate(messages)]}
+    batch_response = await get_async_http_client().post(GRAPH_BATCH_URL, headers=headers, json=payload)
+    if batch_response.status_code != 200:
+        # The whole batch was rejected or throttled: every item shares that answer
+        return [
+            _outlook_result(batch_response.status_code, batch_response.text, m["to_email"], batch_response.headers)
+            for m in messages
+        ]
+
+    items = {r.get("id"): r for r in batch_response.json().get("responses", [])}
+    results = []
+    for index, message in enumerate(messages):
+        item = items.get(str(index))
+        if item is None:
+            results.append(_outlook_result(502, "No response for this message in the batch", message["to_email"]))
+            continue
+        results.append(_outlook_result(
+            item.get("status", 500), json.dumps(item.get("body") or {}), message["to_email"], item.get("headers")
+        ))
+    return results
+
 # ------------------ SMTP Helper ------------------ #
 def send_via_smtp(config: dict, from_email: str, to_email: str, subject: str, body: str) -> dict:
     """Send email using SMTP"""
@@ -127,88 +348,155 @@ def send_via_smtp(config: dict, from_email: str, to_email: str, subject: str, bo
         from_name = config.get("from_name", from_email)
 
         if not smtp_host or not smtp_username or not smtp_password:
-            error_msg = f"❌ SMTP configuration incomplete for {from_email}"
-            logger.error(error_msg)
-            return {"success": False, "error": error_msg}
-
-        # Build message safely
-        message = MIMEMultipart("alternative")
-        message["From"] = formataddr((str(Header(from_name, "utf-8")), from_email))
-        message["To"] = formataddr(("Recipient", to_email))
-        message["Subject"] = str(Header(subject, "utf-8"))
-
-        # Add HTML body
-        html_part = MIMEText(body, "html", "utf-8")
-        message.attach(html_part)
-
-        # Connect to SMTP
-        if use_ssl and smtp_port == 465:
-            logger.info(f"🔐 Connecting to SMTP SSL {smtp_host}:{smtp_port}")
-            context = ssl.create_default_context()
-            with smtplib.SMTP_SSL(smtp_host, smtp_port, context=context) as server:
-                server.login(smtp_username, smtp_password)
-                server.sendmail(from_email, [to_email], message.as_string())
-        else:
-            logger.info(f"📧 Connecting to SMTP {smtp_host}:{smtp_port}")
-            with smtplib.SMTP(smtp_host, smtp_port) as server:
-                if use_tls:
-                    server.starttls(context=ssl.create_default_context())
-                    logger.info("🔐 Started TLS encryption")
-                server.login(smtp_username, smtp_password)
-                server.sendmail(from_email, [to_email], message.as_string())
-
-        logger.info(f"✅ SMTP: Email sent successfully to {to_email}")
+            return _failed_result(f"❌ SMTP configuration incomplete for {from_email}", PERMANENT_SENDER)
+
+        # Same step, same sender: only the To line differs per recipient
+        message = build_envelope(from_email, subject, body, from_name=from_name, multipart=True)
+
+        # Reuse an authenticated session for this host/user when one is idle
+        with smtp_pool.session(
+            smtp_host, smtp_port, smtp_username, smtp_password,
+            use_tls=use_tls, use_ssl=use_ssl and smtp_port == 465
+        ) as server:
+            server.sendmail(from_email, [to_email], message.as_string(formataddr(("Recipient", to_email))))
+
+        logger.debug("✅ SMTP: Email sent successfully to %s", to_email)
         return {"success": True, "message": f"SMTP: Email sent to {to_email}"}
 
     except smtplib.SMTPAuthenticationError as e:
-        error_msg = f"❌ SMTP Authentication failed: {str(e)}"
-        logger.error(error_msg)
-        return {"success": False, "error": error_msg}
+        return _failed_result(f"❌ SMTP Authentication failed: {str(e)}", PERMANENT_SENDER)
     except smtplib.SMTPRecipientsRefused as e:
         error_msg = f"❌ SMTP Recipients refused: {str(e)}"
-        logger.error(error_msg)
-        return {"success": False, "error": error_msg}
+        codes = {code for code, _ in e.recipients.values()}
+        if codes and codes <= set(SMTP_THROTTLED_CODES):
+            return _throttled_result(error_msg, max(codes))
+        return _failed_result(error_msg, classify_smtp_exception(e))
+    except smtplib.SMTPResponseException as e:
+        if e.smtp_code in SMTP_THROTTLED_CODES:
+            # 421/451: the server is deferring us (greylisting, rate limits), not rejecting the email
+            return _throttled_result(f"❌ SMTP server deferred the message ({e.smtp_code}): {e.smtp_error!r}", e.smtp_code)
+        return _failed_result(f"❌ SMTP error: {str(e)}", classify_smtp_exception(e))
     except smtplib.SMTPServerDisconnected as e:
-        error_msg = f"❌ SMTP Server disconnected: {str(e)}"
-        logger.error(error_msg)
-        return {"success": False, "error": error_msg}
+        return _failed_result(f"❌ SMTP Server disconnected: {str(e)}", TRANSIENT)
     except Exception as e:
-        error_msg = f"❌ SMTP error: {str(e)}"
-        logger.error(error_msg)
-        return {"success": False, "error": error_msg}
+        return _failed_result(f"❌ SMTP error: {str(e)}", classify_exception(e))
+
+async def send_via_smtp_async(config: dict, from_email: str, to_email: str, subject: str, body: str) -> dict:
+    """Run the blocking SMTP send on the bounded SMTP thread pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_smtp_executor, send_via_smtp, config, from_email, to_email, subject, body)
 
 # ------------------ Unified Function ------------------ #
-def send_email_via_config(from_email: str, to_email: str, subject: str, body: str) -> dict:
-    """Look up provider in Supabase and send email accordingly."""
+def send_email_via_config(from_email: str, to_email: str, subject: str, body: str, config: dict = None) -> dict:
+    """
+    Look up provider in Supabase and send email accordingly.
+    Pass `config` when the sender row is already loaded to skip the lookup.
+    """
     try:
-        response = supabase.table("email_configs").select(
-            "provider, refresh_token, from_name, smtp_host, smtp_port, use_tls, use_ssl, smtp_username, smtp_password"
-        ).eq("user_email", from_email).single().execute()
+        config = config or sender_config_cache.load(from_email)
 
-        if not response.data:
-            error_msg = f"❌ Email config not found in Supabase for: {from_email}"
-            logger.error(error_msg)
-            return {"success": False, "error": error_msg}
+        if not config:
+            return _failed_result(f"❌ Email config not found in Supabase for: {from_email}", PERMANENT_SENDER)
 
-        provider = response.data.get("provider")
-        refresh_token = response.data.get("refresh_token")
+        provider = config.get("provider")
+        refresh_token = config.get("refresh_token")
 
         logger.info(f"📧 Sending email using provider={provider} for {from_email}")
 
-        if provider == "gmail_oauth":
-            return send_via_gmail_oauth(refresh_token, from_email, to_email, subject, body)
-        elif provider == "microsoft_oauth":
-            return send_via_outlook_oauth(refresh_token, from_email, to_email, subject, body)
+        if provider in ("gmail_oauth", "microsoft_oauth"):
+            # Same token cache as the async path instead of a refresh per email
+            access_token = token_manager.get_access_token_sync(config)
+            send = send_via_gmail_oauth if provider == "gmail_oauth" else send_via_outlook_oauth
+            result = send(refresh_token, from_email, to_email, subject, body, access_token=access_token)
+            if result.get("status_code") == 401:
+                token_manager.invalidate(config)
+            return result
         elif provider == "smtp":
-            return send_via_smtp(response.data, from_email, to_email, subject, body)
+            return send_via_smtp(config, from_email, to_email, subject, body)
         else:
-            error_msg = f"❌ Unsupported provider: {provider}"
-            logger.error(error_msg)
-            return {"success": False, "error": error_msg}
+            return _failed_result(f"❌ Unsupported provider: {provider}", PERMANENT_SENDER)
 
     except Exception as e:
         logger.exception("❌ Unexpected error in send_email_via_config")
-        return {"success": False, "error": str(e)}
+        return {"success": False, "error": str(e), "failure": classify_exception(e)}
+
+async def send_email_via_config_async(from_email: str, to_email: str, subject: str, body: str, config: dict = None) -> dict:
+    """
+    Async counterpart of send_email_via_config used by the campaign processor.
+    Gmail and Graph go through the async HTTP client, SMTP through the SMTP
+    thread pool, so a send in flight never stalls other requests on the loop.
+    The processor passes its already-loaded sender row as `config`.
+    """
+    try:
+        config = config or await sender_config_cache.load_async(from_email)
+
+        if not config:
+            return _failed_result(f"❌ Email config not found in Supabase for: {from_email}", PERMANENT_SENDER)
+
+        provider = config.get("provider")
+        refresh_token = config.get("refresh_token")
+
+        logger.debug("📧 Sending email using provider=%s for %s", provider, from_email)
+
+        if provider in ("gmail_oauth", "microsoft_oauth"):
+            # Cached until shortly before expiry instead of refreshed per email
+            access_token = await token_manager.get_access_token(config)
+            send = send_via_gmail_oauth_async if provider == "gmail_oauth" else send_via_outlook_oauth_async
+            with track_sends(provider):
+                result = await send(refresh_token, from_email, to_email, subject, body, access_token=access_token)
+            if result.get("status_code") == 401:
+                token_manager.invalidate(config)
+            return result
+        elif provider == "smtp":
+            with track_sends(provider):
+                return await send_via_smtp_async(config, from_email, to_email, subject, body)
+        else:
+            return _failed_result(f"❌ Unsupported provider: {provider}", PERMANENT_SENDER)
+
+    except Exception as e:
+        logger.exception("❌ Unexpected error in send_email_via_config_async")
+        return {"success": False, "error": str(e), "failure": classify_exception(e)}
+
+async def send_email_batch_via_config_async(from_email: str, messages: list, config: dict = None) -> list:
+    """
+    Send several messages from one sender; returns a result dict per message.
+    Gmail senders go out as HTTP batches of up to GMAIL_BATCH_SIZE messages,
+    Outlook senders as Graph $batch calls of up to GRAPH_BATCH_SIZE, other
+    providers fall back to one send_email_via_config_async per message.
+    """
+    try:
+        config = config or await sender_config_cache.load_async(from_email)
+        provider = config.get("provider") if config else None
+        if provider == "gmail_oauth":
+            send_batch, batch_size = send_gmail_batch_async, GMAIL_BATCH_SIZE
+        elif provider == "microsoft_oauth":
+            send_batch, batch_size = send_outlook_batch_async, GRAPH_BATCH_SIZE
+        else:
+            return [
+                await send_email_via_config_async(from_email, m["to_email"], m["subject"], m["body"], config=config)
+                for m in messages
+            ]
+
+        logger.debug("📧 Sending %d emails as %s batches for %s", len(messages), provider, from_email)
+        results = []
+        for start in range(0, len(messages), batch_size):
+            chunk = messages[start:start + batch_size]
+            try:
+                access_token = await token_manager.get_access_token(config)
+                with track_sends(provider, len(chunk)):
+                    chunk_results = await send_batch(access_token, from_email, chunk)
+            except Exception as e:
+                # Earlier chunks went out; only this one is failed
+                logger.error(f"❌ {provider} batch failed for {from_email}: {e}")
+                chunk_results = [{"success": False, "error": str(e), "failure": classify_exception(e)} for _ in chunk]
+            if any(r.get("status_code") == 401 for r in chunk_results):
+                token_manager.invalidate(config)
+            results.extend(chunk_results)
+        return results
+
+    except Exception as e:
+        logger.exception("❌ Unexpected error in send_email_batch_via_config_async")
+        return [{"success": False, "error": str(e), "failure": classify_exception(e)} for _ in messages]
 
 # ------------------ FastAPI Route ------------------ #
 @router.post("/send-email")
@@ -1,7 +1,10 @@
 from fastapi import APIRouter, HTTPException
-import requests
+from datetime import datetime, timedelta
 from app.config import MICROSOFT_CLIENT_ID, MICROSOFT_CLIENT_SECRET, MICROSOFT_REDIRECT_URI
 from app.services.supabase_client import supabase
+from app.services.storage import run_storage
+from app.services.sender_config_cache import sender_config_cache
+from app.services.http_client import get_async_http_client
 
 router = APIRouter()
 
@@ -21,7 +24,8 @@ async def login_microsoft():
 
 @router.get("/emails/ids")
 async def list_email_config_ids():
-    response = supabase.table("email_configs").select("id").execute()
+    # PostgREST calls block: run them on the storage executor, not the event loop
+    response = await run_storage(supabase.table("email_configs").select("id").execute)
     if response.error:
         raise HTTPException(status_code=500, detail=f"Error fetching IDs: {response.error.message}")
     ids = [record["id"] for record in response.data]
@@ -40,7 +44,7 @@ async def microsoft_callback(code: str):
     }
 
     headers = {"Content-Type": "application/x-www-form-urlencoded"}
-    token_response = requests.post(token_url, data=data, headers=headers)
+    token_response = await get_async_http_client().post(token_url, data=data, headers=headers)
     token_data = token_response.json()
 
     if "access_token" not in token_data:
@@ -49,7 +53,7 @@ async def microsoft_callback(code: str):
     access_token = token_data["access_token"]
 
     # Fetch user info from Microsoft Graph API
-    user_info_response = requests.get(
+    user_info_response = await get_async_http_client().get(
         "https://graph.microsoft.com/v1.0/me",
         headers={"Authorization": f"Bearer {access_token}"}
     )
@@ -60,14 +64,19 @@ async def microsoft_callback(code: str):
 
     email = user_info.get("mail") or user_info.get("userPrincipalName")
 
+    # Microsoft returns a relative expires_in; store the absolute expiry
+    expires_in = token_data.get("expires_in", 3600)
+    token_expires_at = datetime.utcnow() + timedelta(seconds=int(expires_in))
+
     # Save to Supabase
-    supabase.table("email_configs").insert({
+    await run_storage(supabase.table("email_configs").insert({
         "provider": "microsoft_oauth",
         "user_email": email,
         "access_token": token_data["access_token"],
         "refresh_token": token_data.get("refresh_token"),
-        "token_expires_at": None  # Microsoft does not return expires_at timestamp
-    }).execute()
+        "token_expires_at": token_expires_at.isoformat()
+    }).execute)
+    sender_config_cache.invalidate(email)
 
     return {
         "message": "Microsoft OAuth tokens saved successfully",
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, EmailStr
 from app.services.supabase_client import supabase
+from app.services.sender_config_cache import sender_config_cache
 import smtplib, ssl, imaplib, poplib
 
 router = APIRouter()
@@ -99,6 +100,7 @@ def save_smtp_config(req: SMTPConfigRequest):
                 "incoming_port": req.incoming_port,
                 "protocol": req.protocol
             }).execute()
+            sender_config_cache.invalidate(req.from_email)
 
             return {
                 "message": "✅ SMTP & Incoming server validated & saved to Supabase",
@@ -0,0 +1,122 @@
+import asyncio
+import time
+import logging
+from datetime import datetime
+from app.config import COUNTER_FLUSH_EVERY, COUNTER_FLUSH_INTERVAL
+from app.services.storage import storage, run_storage
+from app.services.delivery_ledger import delivery_ledger
+
+logger = logging.getLogger(__name__)
+
+COUNTER_COLUMNS = ("sent_count", "failed_count", "bounce_count")
+
+
+class _CampaignTotals:
+    def __init__(self, sent_count=0, failed_count=0, bounce_count=0):
+        self.values = {
+            "sent_count": sent_count or 0,
+            "failed_count": failed_count or 0,
+            "bounce_count": bounce_count or 0,
+        }
+        self.pending = 0          # deltas recorded since the last flush
+        self.dirty_since = None   # when the oldest unflushed delta was recorded
+        self.flushing = asyncio.Lock()   # the campaign task and the periodic flusher take turns
+
+
+class CampaignCounters:
+    """
+    Write-behind aggregation of per-campaign send counters.
+
+    Deltas accumulate in memory and are written as one UPDATE per campaign
+    every `flush_every` recorded events or `flush_interval` seconds, whichever
+    comes first, and once more when the campaign is released. Each campaign is
+    owned by a single task, so absolute totals can be written safely.
+    """
+
+    def __init__(self, flush_every: int = COUNTER_FLUSH_EVERY, flush_interval: float = COUNTER_FLUSH_INTERVAL):
+        self.flush_every = max(1, flush_every)
+        self.flush_interval = flush_interval
+        self._campaigns = {}
+        self._flusher = None
+        self.writes = 0
+
+    def track(self, campaign_id, **totals):
+        """Start counting for a campaign, seeded with the totals already stored"""
+        self._campaigns[campaign_id] = _CampaignTotals(**{k: totals.get(k) for k in COUNTER_COLUMNS})
+        self._ensure_flusher()
+
+    def totals(self, campaign_id) -> dict:
+        return dict(self._campaigns[campaign_id].values)
+
+    async def record(self, campaign_id, sent: int = 0, failed: int = 0, bounced: int = 0):
+        """Add deltas for a campaign; flushes when the batch or age threshold is hit"""
+        entry = self._campaigns[campaign_id]
+        entry.values["sent_count"] += sent
+        entry.values["failed_count"] += failed
+        entry.values["bounce_count"] += bounced
+        entry.pending += 1
+        if entry.dirty_since is None:
+            entry.dirty_since = time.monotonic()
+
+        if entry.pending >= self.flush_every or time.monotonic() - entry.dirty_since >= self.flush_interval:
+            await self.flush(campaign_id)
+
+    async def flush(self, campaign_id=None):
+        """Write pending totals for one campaign, or for every campaign with pending deltas"""
+        ids = [campaign_id] if campaign_id is not None else list(self._campaigns)
+        for cid in ids:
+            entry = self._campaigns.get(cid)
+            if not entry or not entry.pending:
+                continue
+            async with entry.flushing:
+                if not entry.pending:
+                    continue   # flushed while this one waited
+                # Totals as of now; deltas recorded during the write stay pending
+                flushed, values = entry.pending, dict(entry.values)
+                try:
+                    # Ledger first, so sent_count never claims deliveries it can't back up
+                    await delivery_ledger.flush(cid)
+                    await run_storage(storage.update_campaign, cid, {
+                        **values,
+                        "updated_at": datetime.utcnow().replace(microsecond=0).isoformat()
+                    })
+                    self.writes += 1
+                    entry.pending -= flushed
+                    if not entry.pending:
+                        entry.dirty_since = None
+                    logger.debug("📊 Flushed counters for campaign %s: %s", cid, values)
+                except Exception as e:
+                    # Keep the deltas; the next flush retries with the latest totals
+                    logger.error(f"❌ Failed to flush counters for campaign {cid}: {e}")
+
+    async def release(self, campaign_id):
+        """Final flush for a campaign that finished or was cancelled"""
+        await self.flush(campaign_id)
+        self._campaigns.pop(campaign_id, None)
+
+    def _ensure_flusher(self):
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush_periodically())
+
+    async def _flush_periodically(self):
+        """Bound how stale the UI can get while a campaign waits between sends"""
+        while self._campaigns:
+            await asyncio.sleep(self.flush_interval)
+            now = time.monotonic()
+            for cid, entry in list(self._campaigns.items()):
+                if entry.pending and now - entry.dirty_since >= self.flush_interval:
+                    await self.flush(cid)
+
+    async def close(self):
+        """Flush everything and stop the periodic flusher"""
+        await self.flush()
+        if self._flusher:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+
+
+campaign_counters = CampaignCounters()
@@ -0,0 +1,120 @@
+import asyncio
+import os
+import socket
+import time
+import uuid
+import logging
+from app.config import WORKER_ID, CAMPAIGN_LEASE_SECONDS
+from app.services.storage import storage, run_storage
+
+logger = logging.getLogger(__name__)
+
+
+def default_worker_id() -> str:
+    """Unique per process, so uvicorn workers on one host get separate leases"""
+    return f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+
+class CampaignLeases:
+    """
+    Campaign leases held by this worker (see migrations/005_campaign_leases.sql).
+
+    claim() atomically takes a due campaign whose lease is free or expired, as
+    long as no other worker holds a live campaign of the same sender. While the
+    campaign runs, a heartbeat renews every held lease each third of the lease
+    length. A lease that could not be renewed is reported through the
+    `on_lost` callback given to claim(), so the campaign stops sending before
+    the worker that took it over starts.
+    """
+
+    def __init__(self, worker_id: str = None, lease_seconds: int = CAMPAIGN_LEASE_SECONDS, clock=time.monotonic):
+        self.worker_id = worker_id or default_worker_id()
+        self.lease_seconds = lease_seconds
+        self.clock = clock
+        self._held = {}   # campaign_id -> (local lease deadline, on_lost)
+        self._heartbeat = None
+
+    @property
+    def held(self) -> set:
+        return set(self._held)
+
+    def _call(self, fn: str, **params):
+        return getattr(storage, fn)(**params)
+
+    async def claim(self, campaign_id, on_lost=None) -> bool:
+        """Try to take the lease on `campaign_id`; True when this worker now holds it"""
+        deadline = self.clock() + self.lease_seconds
+        claimed = await run_storage(
+            self._call, "claim_campaign",
+            campaign_id=campaign_id, worker=self.worker_id, lease_seconds=self.lease_seconds
+        )
+        if not claimed:
+            return False
+
+        self._held[campaign_id] = (deadline, on_lost)
+        self._ensure_heartbeat()
+        logger.info(f"🔒 Worker {self.worker_id} claimed campaign {campaign_id}")
+        return True
+
+    async def release(self, campaign_id):
+        """Hand the lease back; safe to call for campaigns this worker never held"""
+        if self._held.pop(campaign_id, None) is None:
+            return
+        try:
+            await run_storage(self._call, "release_campaign_lease", campaign_id=campaign_id, worker=self.worker_id)
+        except Exception as e:
+            # The lease still expires on its own
+            logger.warning(f"⚠️ Could not release lease on campaign {campaign_id}: {e}")
+
+    async def renew(self):
+        """One heartbeat: extend every held lease, report the ones that were lost"""
+        if not self._held:
+            return
+        campaign_ids = list(self._held)
+        deadline = self.clock() + self.lease_seconds
+        try:
+            renewed = set(await run_storage(
+                self._call, "renew_campaign_leases",
+                worker=self.worker_id, campaign_ids=campaign_ids, lease_seconds=self.lease_seconds
+            ) or [])
+        except Exception as e:
+            # Keep sending only while the lease is sure to outlive the next beat;
+            # after that another worker may already have taken the campaign over
+            logger.warning(f"⚠️ Lease heartbeat failed for worker {self.worker_id}: {e}")
+            safe_until = self.clock() + self.lease_seconds / 3
+            renewed = {cid for cid in campaign_ids if self._held.get(cid, (0,))[0] > safe_until}
+            deadline = None
+
+        for campaign_id in campaign_ids:
+            entry = self._held.get(campaign_id)
+            if entry is None:
+                continue  # released while the heartbeat was in flight
+            if campaign_id in renewed:
+                if deadline is not None:
+                    self._held[campaign_id] = (deadline, entry[1])
+                continue
+            del self._held[campaign_id]
+            logger.warning(f"⚠️ Worker {self.worker_id} lost the lease on campaign {campaign_id}")
+            if entry[1]:
+                entry[1](campaign_id)
+
+    def _ensure_heartbeat(self):
+        if self._heartbeat is None or self._heartbeat.done():
+            self._heartbeat = asyncio.create_task(self._beat())
+
+    async def _beat(self):
+        while self._held:
+            await asyncio.sleep(self.lease_seconds / 3)
+            await self.renew()
+
+    async def close(self):
+        """Stop the heartbeat and give back every lease still held"""
+        if self._heartbeat:
+            self._heartbeat.cancel()
+            await asyncio.gather(self._heartbeat, return_exceptions=True)
+            self._heartbeat = None
+        for campaign_id in list(self._held):
+            await self.release(campaign_id)
+
+
+campaign_leases = CampaignLeases(WORKER_ID)
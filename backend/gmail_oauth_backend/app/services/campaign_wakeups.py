@@ -0,0 +1,150 @@
+import asyncio
+import heapq
+import time
+import logging
+from datetime import datetime, timezone
+from app.config import CAMPAIGN_RECONCILE_INTERVAL, DUE_CAMPAIGNS_PAGE_SIZE
+from app.services.storage import storage, run_storage
+from app.services.token_manager import parse_timestamp
+from app.services.campaign_leases import campaign_leases
+from app.services.email_campaign_processor import DUE_CAMPAIGN_STATUSES
+
+logger = logging.getLogger(__name__)
+
+
+class CampaignWakeups:
+    """
+    Min-heap of upcoming campaign wake times, so the processor runs when a
+    campaign becomes due instead of on a fixed poll.
+
+    A campaign wakes at its scheduled_at, or when another worker's lease on it
+    expires if that is later. notify() adds or moves a single campaign (the
+    notify endpoint calls it when a campaign is created or rescheduled);
+    rescheduling leaves the old heap entry behind and it is skipped when
+    popped. A reconciliation pass every CAMPAIGN_RECONCILE_INTERVAL reloads
+    the heap from the database and runs the processor once, so a campaign
+    scheduled without a notification still starts within that interval.
+    """
+
+    def __init__(self, reconcile_interval: float = CAMPAIGN_RECONCILE_INTERVAL, clock=time.time):
+        self.reconcile_interval = reconcile_interval
+        self.clock = clock
+        self._heap = []      # (wake_at epoch, campaign_id)
+        self._wake_at = {}   # campaign_id -> current wake_at; heap entries that differ are stale
+        self._changed = None
+        self.runs = 0
+
+    def _signal(self):
+        if self._changed is not None:
+            self._changed.set()
+
+    def notify(self, campaign_id, scheduled_at=None, status: str = "scheduled", lease_expires_at=None):
+        """Schedule (or move, or drop) the wakeup for one campaign"""
+        if status not in DUE_CAMPAIGN_STATUSES:
+            self.forget(campaign_id)
+            return
+        wake_at = max(parse_timestamp(scheduled_at), parse_timestamp(lease_expires_at))
+        if self._wake_at.get(campaign_id) == wake_at:
+            return
+        self._wake_at[campaign_id] = wake_at
+        heapq.heappush(self._heap, (wake_at, campaign_id))
+        self._signal()
+
+    def forget(self, campaign_id):
+        if self._wake_at.pop(campaign_id, None) is not None:
+            self._signal()
+
+    def next_wake_at(self):
+        """Earliest live wake time, dropping stale heap entries on the way"""
+        while self._heap:
+            wake_at, campaign_id = self._heap[0]
+            if self._wake_at.get(campaign_id) == wake_at:
+                return wake_at
+            heapq.heappop(self._heap)
+        return None
+
+    def pop_due(self) -> list:
+        """Remove and return the campaigns whose wake time has passed"""
+        now, due = self.clock(), []
+        while (wake_at := self.next_wake_at()) is not None and wake_at <= now:
+            _, campaign_id = heapq.heappop(self._heap)
+            del self._wake_at[campaign_id]
+            due.append(campaign_id)
+        return due
+
+    def fetch_upcoming(self) -> list:
+        """Live campaigns due before the reconciliation after next, keyset-paged on id"""
+        horizon = datetime.fromtimestamp(self.clock() + 2 * self.reconcile_interval, timezone.utc).isoformat()
+        campaigns, last_id = [], None
+        while True:
+            page = storage.upcoming_campaigns(horizon, last_id, DUE_CAMPAIGNS_PAGE_SIZE)
+            campaigns.extend(page)
+            if len(page) < DUE_CAMPAIGNS_PAGE_SIZE:
+                return campaigns
+            last_id = page[-1]["id"]
+
+    async def reload(self):
+        """
+        Merge the database's view into the heap. Runs on the loop so it never
+        races notify(); campaigns this worker is already sending are left out.
+        """
+        campaigns = await run_storage(self.fetch_upcoming)
+        for campaign in campaigns:
+            if campaign.get("claimed_by") == campaign_leases.worker_id:
+                continue
+            self.notify(campaign["id"], campaign.get("scheduled_at"), campaign.get("status"), campaign.get("lease_expires_at"))
+        logger.info(f"⏰ Campaign wakeups reconciled: {len(self._wake_at)} upcoming")
+
+    async def recheck(self, campaign_ids: list):
+        """
+        After a wakeup, re-arm campaigns another worker still holds a lease on,
+        so a crashed worker's campaign is taken over when its renewed lease
+        runs out rather than at the next reconciliation. Campaigns due right
+        now were just handed to the processor and are not re-armed.
+        """
+        campaigns = await run_storage(storage.campaign_schedules, campaign_ids)
+        now = self.clock()
+        for campaign in campaigns:
+            if campaign.get("claimed_by") in (None, campaign_leases.worker_id):
+                continue
+            if parse_timestamp(campaign.get("lease_expires_at")) > now:
+                self.notify(campaign["id"], campaign.get("scheduled_at"), campaign.get("status"), campaign.get("lease_expires_at"))
+
+    async def run(self, process):
+        """Call `process()` whenever a campaign is due, and on every reconciliation"""
+        self._changed = asyncio.Event()
+        next_reconcile = self.clock()
+
+        while True:
+            now = self.clock()
+            reconcile = now >= next_reconcile
+            if reconcile:
+                try:
+                    await self.reload()
+                except Exception as e:
+                    logger.error(f"❌ Failed to reload campaign wakeups: {e}")
+                next_reconcile = now + self.reconcile_interval
+
+            due = self.pop_due()
+            if due or reconcile:
+                if due:
+                    logger.info(f"⏰ {len(due)} campaign(s) due, running processor")
+                self.runs += 1
+                try:
+                    await process()
+                    if due:
+                        await self.recheck(due)
+                except Exception as e:
+                    logger.error(f"Error in campaign processor: {e}")
+                continue
+
+            wake_at = self.next_wake_at()
+            timeout = next_reconcile - now if wake_at is None else min(wake_at, next_reconcile) - now
+            self._changed.clear()
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout=max(0.0, timeout))
+            except asyncio.TimeoutError:
+                pass
+
+
+campaign_wakeups = CampaignWakeups()
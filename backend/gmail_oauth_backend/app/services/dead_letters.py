@@ -0,0 +1,50 @@
+import logging
+from app.services.storage import storage, run_storage
+from app.services.metrics import DEAD_LETTERS
+
+logger = logging.getLogger(__name__)
+
+
+class DeadLetters:
+    """
+    Campaign emails that will not be retried (see migrations/007_campaign_dead_letters.sql):
+    permanent failures and transient ones that used up RETRY_MAX_ATTEMPTS.
+
+    Writes are buffered per campaign and flushed once per batch, before the
+    step queue: an entry is only marked failed once its dead letter is stored.
+    """
+
+    def __init__(self):
+        self._pending = {}   # campaign_id -> {(step_index, contact_id): row}
+        self.writes = 0
+
+    def record(self, entry: dict, contact_email: str, sender_id, failure: str, error: str, attempts: int = 0):
+        """Buffer a dead letter for a step queue entry until the next flush"""
+        campaign_id = entry["campaign_id"]
+        self._pending.setdefault(campaign_id, {})[(entry["step_index"], entry["contact_id"])] = {
+            "campaign_id": campaign_id,
+            "step_index": entry["step_index"],
+            "contact_id": entry["contact_id"],
+            "contact_email": contact_email,
+            "sender_id": sender_id,
+            "failure": failure,
+            "error": error,
+            "attempts": attempts,
+        }
+        DEAD_LETTERS.inc(failure=failure)
+
+    async def flush(self, campaign_id):
+        """Write buffered dead letters for a campaign in one upsert. Raises on failure"""
+        rows = list(self._pending.get(campaign_id, {}).values())
+        if not rows:
+            return
+        await run_storage(storage.record_dead_letters, rows)
+        self.writes += 1
+        self._pending.pop(campaign_id, None)
+
+    def discard(self, campaign_id):
+        """Drop unflushed dead letters; their entries stay pending and are sent again"""
+        self._pending.pop(campaign_id, None)
+
+
+dead_letters = DeadLetters()
@@ -0,0 +1,67 @@
+import asyncio
+import logging
+from app.services.storage import storage, run_storage
+
+logger = logging.getLogger(__name__)
+
+
+class DeliveryLedger:
+    """
+    Durable record of which (campaign, step, contact) triples were delivered.
+
+    Lookups are one query per batch of contacts. Writes are buffered and
+    flushed together with the campaign counters (see CampaignCounters.flush),
+    always before them, so the stored sent_count never runs ahead of the
+    ledger. An unclean crash can lose at most one unflushed batch.
+
+    The campaign task and the periodic counter flusher both flush, so flushes
+    of one campaign take turns, and rows stay buffered (and visible to
+    delivered()) until their write has succeeded.
+    """
+
+    def __init__(self):
+        self._pending = {}   # campaign_id -> list of delivery rows
+        self._flush_locks = {}   # campaign_id -> asyncio.Lock
+        self.writes = 0
+
+    async def delivered(self, campaign_id, step_index: int, contact_ids) -> set:
+        """Return the subset of `contact_ids` already delivered for this step"""
+        contact_ids = [cid for cid in contact_ids if cid is not None]
+        if not contact_ids:
+            return set()
+
+        delivered = await run_storage(storage.delivered_contacts, campaign_id, step_index, contact_ids)
+
+        # Deliveries still waiting to be flushed count too
+        for row in self._pending.get(campaign_id, []):
+            if row["step_index"] == step_index:
+                delivered.add(row["contact_id"])
+        return delivered
+
+    def record(self, campaign_id, step_index: int, contact_id, contact_email: str = None):
+        """Buffer a successful delivery until the next flush"""
+        if contact_id is None:
+            return
+        self._pending.setdefault(campaign_id, []).append({
+            "campaign_id": campaign_id,
+            "step_index": step_index,
+            "contact_id": contact_id,
+            "contact_email": contact_email,
+        })
+
+    async def flush(self, campaign_id):
+        """Write buffered deliveries for a campaign in one upsert. Raises on failure"""
+        async with self._flush_locks.setdefault(campaign_id, asyncio.Lock()):
+            rows = list(self._pending.get(campaign_id) or [])
+            if not rows:
+                return
+            await run_storage(storage.record_deliveries, rows)
+            self.writes += 1
+            # Deliveries recorded while the write was in flight wait for the next flush
+            pending = self._pending.get(campaign_id, [])
+            del pending[:len(rows)]
+            if not pending:
+                self._pending.pop(campaign_id, None)
+
+
+delivery_ledger = DeliveryLedger()
@@ -1,15 +1,41 @@
 import asyncio
 import re
 import json
-import random
-from datetime import datetime, timezone
+import functools
+from datetime import datetime, timedelta, timezone
 import logging
-from app.services.supabase_client import supabase
-
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s %(levelname)s: %(message)s"
+from app.config import (
+    DUE_CAMPAIGNS_PAGE_SIZE, CAMPAIGN_CONCURRENCY, CONTACT_BATCH_SIZE, SEND_BURST, GMAIL_BATCH_SIZE, GRAPH_BATCH_SIZE,
+    RETRY_MAX_ATTEMPTS
+)
+from app.services.storage import storage, run_storage, DUE_CAMPAIGN_STATUSES
+from app.services.send_scheduler import send_scheduler
+from app.services.campaign_counters import campaign_counters
+from app.services.delivery_ledger import delivery_ledger
+from app.services.dead_letters import dead_letters
+from app.services.campaign_leases import campaign_leases
+from app.services.step_queue import step_queue, step_delay
+from app.services.templates import compile_template
+from app.services.metrics import DUE_CAMPAIGNS, EMAIL_RETRIES, count_send_outcomes
+from app.services.retry_policy import (
+    SendFailure, THROTTLED, TRANSIENT, PERMANENT_RECIPIENT, PERMANENT_SENDER, backoff_delay, classify_exception
 )
+from app.services.log_pipeline import SampledLogger
+
+logger = logging.getLogger(__name__)
+# Per-recipient outcomes: sampled, with a summary per batch (LOG_RECIPIENT_SAMPLE)
+recipient_log = SampledLogger(logging.getLogger(f"{__name__}.recipients"))
+
+# Campaign tasks currently running in this process, keyed by campaign id
+_in_flight: dict = {}
+_campaign_slots = None
+
+def _get_campaign_slots() -> asyncio.Semaphore:
+    """Global limit on campaigns sending at the same time (created on the running loop)"""
+    global _campaign_slots
+    if _campaign_slots is None:
+        _campaign_slots = asyncio.Semaphore(CAMPAIGN_CONCURRENCY)
+    return _campaign_slots
 
 def normalize_text(value):
     """Normalize text values"""
@@ -26,17 +52,10 @@ def render_pitch(template: str, contact: dict) -> str:
     if not template:
         return ""
     if not isinstance(contact, dict):
-        logging.error(f"Contact is not a dictionary: {type(contact)} - {contact}")
+        logger.error(f"Contact is not a dictionary: {type(contact)} - {contact}")
         return template
     
-    rendered = template
-    replaced_placeholders = set()
-    for key, val in contact.items():
-        placeholder = f"{{{{{key}}}}}"
-        if placeholder in rendered and placeholder not in replaced_placeholders:
-            rendered = rendered.replace(placeholder, str(val or ""))
-            replaced_placeholders.add(placeholder)
-    return rendered
+    return compile_template(template).render(contact)
 
 def validate_email(email):
     """Validate email format"""
@@ -64,278 +83,606 @@ def safe_parse_json(json_str, fallback=None):
     if isinstance(json_str, str):
         try:
             parsed_data = json.loads(json_str)
-            logging.info(f"🔍 Parsed JSON structure: {type(parsed_data)}")
+            logger.info(f"🔍 Parsed JSON structure: {type(parsed_data)}")
             
             # If it's a dict with a 'steps' key, return the steps array
             if isinstance(parsed_data, dict):
-                logging.info(f"🔍 JSON keys: {list(parsed_data.keys())}")
+                logger.info(f"🔍 JSON keys: {list(parsed_data.keys())}")
                 if 'steps' in parsed_data:
                     steps_array = parsed_data.get('steps', [])
-                    logging.info(f"🔍 Found steps array with {len(steps_array)} items")
+                    logger.info(f"🔍 Found steps array with {len(steps_array)} items")
                     if steps_array and len(steps_array) > 0:
-                        logging.info(f"🔍 First step sample: {steps_array[0]}")
+                        logger.info(f"🔍 First step sample: {steps_array[0]}")
                     return steps_array
                 else:
-                    logging.warning(f"⚠️ No 'steps' key found in JSON. Available keys: {list(parsed_data.keys())}")
+                    logger.warning(f"⚠️ No 'steps' key found in JSON. Available keys: {list(parsed_data.keys())}")
                     return fallback or []
             
             # If it's already a list, return it
             elif isinstance(parsed_data, list):
-                logging.info(f"🔍 JSON is already a list with {len(parsed_data)} items")
+                logger.info(f"🔍 JSON is already a list with {len(parsed_data)} items")
                 return parsed_data
             
             else:
-                logging.warning(f"⚠️ Parsed JSON is neither dict nor list: {type(parsed_data)}")
+                logger.warning(f"⚠️ Parsed JSON is neither dict nor list: {type(parsed_data)}")
                 return fallback or []
                 
         except json.JSONDecodeError as e:
-            logging.error(f"❌ Failed to parse JSON: {e}. Raw data preview: {json_str[:200]}...")
+            logger.error(f"❌ Failed to parse JSON: {e}. Raw data preview: {json_str[:200]}...")
             return fallback or []
     
     return fallback or []
 
-def send_email_with_proper_handling(send_email_via_config, from_email: str, to_email: str, subject: str, body: str) -> tuple[bool, str]:
+def _failure(result: dict) -> SendFailure:
+    """How to handle a failed send result (see retry_policy); unclassified failures count as transient"""
+    kind = result.get("failure") or TRANSIENT
+    retry_after = float(result.get("retry_after") or 0.0) if kind == THROTTLED else None
+    return SendFailure(kind, retry_after)
+
+async def send_email_with_proper_handling(send_email_via_config, from_email: str, to_email: str, subject: str, body: str, **send_kwargs) -> tuple:
     """
-    Wrapper function to handle both dict and bool responses from email sending
-    Returns: (success: bool, error_message: str)
+    Wrapper function to handle both dict and bool responses from email sending.
+    Accepts sync or async senders; extra keyword arguments are passed through.
+    Returns: (success: bool, error_message: str, failure) where failure is
+    None on success, else a SendFailure with its kind and, for throttled
+    sends, the Retry-After in seconds
     """
     try:
-        result = send_email_via_config(from_email, to_email, subject, body)
+        result = send_email_via_config(from_email, to_email, subject, body, **send_kwargs)
+        if asyncio.iscoroutine(result):
+            result = await result
         
         # Handle dictionary response (new format)
         if isinstance(result, dict):
             success = result.get("success", False)
             error_msg = result.get("error", "Unknown error") if not success else ""
-            return success, error_msg
+            return success, error_msg, None if success else _failure(result)
         
         # Handle boolean response (legacy format)
         elif isinstance(result, bool):
-            return result, "" if result else "Email sending failed"
+            return result, "" if result else "Email sending failed", None if result else SendFailure(TRANSIENT)
         
         # Handle other types (treat as falsy)
         else:
-            return False, f"Unexpected response type: {type(result)}"
+            return False, f"Unexpected response type: {type(result)}", SendFailure(TRANSIENT)
             
     except Exception as e:
-        logging.error(f"❌ Exception in email sending: {e}")
-        return False, str(e)
+        logger.error(f"❌ Exception in email sending: {e}")
+        return False, str(e), SendFailure(classify_exception(e))
 
-async def process_campaigns():
-    """Process scheduled email campaigns"""
-    now = datetime.now(timezone.utc).replace(microsecond=0)
-    logging.info(f"🔍 Checking campaigns scheduled before {now.isoformat()}")
+async def send_batch_with_proper_handling(send_email_batch, from_email: str, messages: list, **send_kwargs) -> list:
+    """
+    Batch counterpart of send_email_with_proper_handling: one (success, error,
+    failure) tuple per message, in order. A batch that fails as a whole fails
+    every message.
+    """
+    try:
+        results = await send_email_batch(from_email, messages, **send_kwargs)
+    except Exception as e:
+        logger.error(f"❌ Exception in batch email sending: {e}")
+        return [(False, str(e), SendFailure(classify_exception(e)))] * len(messages)
+
+    if not isinstance(results, list) or len(results) != len(messages):
+        return [(False, "Batch send returned an unexpected response", SendFailure(TRANSIENT))] * len(messages)
+    return [
+        (True, "", None) if r.get("success") else (False, r.get("error", "Unknown error"), _failure(r))
+        if isinstance(r, dict) else (False, f"Unexpected response type: {type(r)}", SendFailure(TRANSIENT))
+        for r in results
+    ]
+
+def send_group_size(sender: dict, burst: int) -> int:
+    """How many ready emails go out per send: a provider batch when pacing allows bursts"""
+    batch_size = {"gmail_oauth": GMAIL_BATCH_SIZE, "microsoft_oauth": GRAPH_BATCH_SIZE}.get(sender.get("provider"), 1)
+    return max(1, min(int(burst), batch_size))
+
+async def iter_contact_pages(email_list_id, page_size: int = CONTACT_BATCH_SIZE):
+    """
+    Yield a list's active, opted-in contacts one page at a time, keyset-paginated
+    on id. The next page is fetched on the storage executor while the caller is still
+    sending the current one, so only about two pages are ever held in memory.
+    """
+    def fetch_page(after_id):
+        return storage.contact_page(email_list_id, after_id, page_size)
 
+    next_page = asyncio.create_task(run_storage(fetch_page, None))
+    try:
+        while next_page is not None:
+            page = await next_page
+            next_page = None
+            if len(page) == page_size:
+                next_page = asyncio.create_task(run_storage(fetch_page, page[-1].get("id")))
+            if page:
+                yield page
+    finally:
+        if next_page is not None:
+            next_page.cancel()
+
+async def enqueue_first_step(campaign_id, email_list_id, due_at: datetime) -> int:
+    """Queue a campaign's first step for every contact on its list; returns the contact count"""
+    total = 0
+    async for page in iter_contact_pages(email_list_id):
+        contact_ids = [c.get("id") for c in page if isinstance(c, dict)]
+        await run_storage(step_queue.enqueue, campaign_id, contact_ids, 0, due_at)
+        total += len(contact_ids)
+    return total
+
+def fetch_contacts(contact_ids) -> dict:
+    """Active, opted-in contacts among `contact_ids`, keyed by id"""
+    contact_ids = [cid for cid in contact_ids if cid is not None]
+    if not contact_ids:
+        return {}
+    return {c.get("id"): c for c in storage.active_contacts(contact_ids) if isinstance(c, dict)}
+
+def _notify_wakeups(campaign_id, scheduled_at, status: str = "running"):
+    """Tell the wakeup queue a campaign moved, so a short delay isn't left to reconciliation"""
     # Import here to avoid circular imports
-    from app.routes.gmail_send import send_email_via_config
+    from app.services.campaign_wakeups import campaign_wakeups
+    campaign_wakeups.notify(campaign_id, scheduled_at, status)
 
-    try:
-        all_campaigns_resp = supabase.table("campaigns").select(
-            "id, name, scheduled_at, status, email_list_id, sender_id, content, subject_line, email_content, sent_count, delivered_count, bounce_count, pause_between_emails"
-        ).execute()
-    except Exception as e:
-        logging.error(f"❌ Failed to fetch campaigns: {e}")
-        return
+def fetch_due_campaigns(now: datetime, page_size: int = DUE_CAMPAIGNS_PAGE_SIZE):
+    """
+    Yield campaigns that are due at `now`, filtered by the database and walked
+    with an id keyset (id > last id). idx_campaigns_due_keyset holds only live
+    campaigns, ordered by id, so a tick reads live campaigns rather than the
+    whole table. Campaigns another worker holds a live lease on are left out.
+    """
+    now_iso = now.isoformat()
+    last_id = None
 
-    if not all_campaigns_resp.data:
-        logging.info("⚠️ No campaigns found in database.")
-        return
+    while True:
+        page = storage.due_campaigns(now_iso, last_id, page_size)
+        for campaign in page:
+            if isinstance(campaign, dict):
+                yield campaign
 
-    due_campaigns = []
-    for c in all_campaigns_resp.data or []:
-        if not isinstance(c, dict):
-            continue
-            
-        campaign_id = c.get("id")
-        scheduled_raw = c.get("scheduled_at")
-        
-        if not scheduled_raw:
-            continue
-            
-        try:
-            scheduled_dt = datetime.fromisoformat(scheduled_raw.replace("Z", "+00:00"))
-        except Exception as e:
-            continue
+        if len(page) < page_size:
+            return
 
-        if c.get("status") in ["scheduled", "running"] and scheduled_dt <= now:
-            due_campaigns.append(c)
+        last_id = page[-1].get("id")
 
+async def process_campaigns(wait: bool = False):
+    """
+    Start a supervised task for every due campaign that is not already running.
+    The tick returns immediately unless `wait` is set; campaigns keep running in
+    the background, bounded by CAMPAIGN_CONCURRENCY.
+    """
+    # Full precision: a wakeup fired right at scheduled_at must see the campaign as due
+    now = datetime.now(timezone.utc)
+    logger.info(f"🔍 Checking campaigns scheduled before {now.isoformat()}")
+
+    # Import here to avoid circular imports
+    from app.routes.gmail_send import send_email_via_config_async as send_email_via_config
+    from app.routes.gmail_send import send_email_batch_via_config_async as send_email_batch
+
+    try:
+        due_campaigns = await run_storage(lambda: list(fetch_due_campaigns(now)))
+    except Exception as e:
+        logger.error(f"❌ Failed to fetch campaigns: {e}")
+        return
+
+    DUE_CAMPAIGNS.set(len(due_campaigns))
     if not due_campaigns:
-        logging.info("⚠️ No campaigns to process at this time.")
+        logger.info("⚠️ No campaigns to process at this time.")
         return
 
     for campaign in due_campaigns:
-        if not isinstance(campaign, dict):
-            continue
-            
         campaign_id = campaign.get("id")
-        campaign_name = campaign.get("name", "Unknown")
-        email_list_id = campaign.get("email_list_id")
-        sender_id = campaign.get("sender_id")
+        if campaign_id in _in_flight:
+            logger.info(f"⏭️ Campaign {campaign_id} is already being processed, skipping")
+            continue
 
-        # Get pause_between_emails from the campaign record (300 seconds from your data)
-        pause_between_emails = campaign.get("pause_between_emails", 300)  # Default 5 minutes
+        task = asyncio.create_task(_run_campaign(campaign, send_email_via_config, send_email_batch))
+        _in_flight[campaign_id] = task
+        task.add_done_callback(lambda t, cid=campaign_id: _on_campaign_done(cid, t))
 
-        logging.info(f"📧 Campaign {campaign_id} settings:")
-        logging.info(f"  - Name: {campaign_name}")
-        logging.info(f"  - Pause between emails: {pause_between_emails} seconds")
+    logger.info(f"🧵 {len(_in_flight)} campaign(s) in flight")
 
-        if not email_list_id or not sender_id:
-            logging.error(f"❌ Campaign {campaign_id} missing email_list_id or sender_id")
-            continue
+    if wait:
+        await asyncio.gather(*_in_flight.values(), return_exceptions=True)
 
-        logging.info(f"🚀 Processing campaign {campaign_id} - {campaign_name}")
+async def _run_campaign(campaign: dict, send_email_via_config, send_email_batch=None):
+    """Run one campaign once a global concurrency slot is free and its lease is ours"""
+    campaign_id = campaign.get("id")
+    async with _get_campaign_slots():
+        # Claim only once a slot is free, so queued campaigns stay available to other workers
+        try:
+            claimed = await campaign_leases.claim(campaign_id, on_lost=_on_lease_lost)
+        except Exception as e:
+            logger.error(f"❌ Could not claim campaign {campaign_id}: {e}")
+            return
+        if not claimed:
+            logger.info(f"⏭️ Campaign {campaign_id} is claimed by another worker, skipping")
+            return
 
         try:
-            # Mark campaign as running
-            supabase.table("campaigns").update({"status": "running"}).eq("id", campaign_id).execute()
-
-            # Get sender configuration
-            sender_resp = supabase.table("email_configs").select("*").eq("id", sender_id).single().execute()
-            sender = sender_resp.data
-
-            if not sender or not isinstance(sender, dict):
-                logging.error(f"❌ Sender config not found for sender_id {sender_id}")
-                supabase.table("campaigns").update({"status": "failed"}).eq("id", campaign_id).execute()
-                continue
-
-            # Parse campaign content
-            steps = []
-            if campaign.get("content"):
-                content = campaign.get("content")
-                steps = safe_parse_json(content, [])
-                
-            if not steps:
-                steps = [{
-                    "subject": normalize_text(campaign.get("subject_line")),
-                    "body": normalize_text(campaign.get("email_content")),
-                    "order": 1
-                }]
-
-            logging.info(f"📧 Campaign {campaign_id} has {len(steps)} steps")
-
-            # Get contacts
-            try:
-                contacts_resp = supabase.table("email_contacts")\
-                    .select("email, first_name, last_name")\
-                    .eq("email_list_id", email_list_id)\
-                    .eq("status", "active")\
-                    .eq("opt_in", True)\
-                    .execute()
-                contacts = contacts_resp.data or []
-            except Exception as e:
-                logging.error(f"❌ Failed to fetch contacts: {e}")
-                continue
-            
-            if not contacts:
-                supabase.table("campaigns").update({"status": "completed"}).eq("id", campaign_id).execute()
-                continue
+            return await process_campaign(campaign, send_email_via_config, send_email_batch)
+        finally:
+            await campaign_leases.release(campaign_id)
+
+def _on_lease_lost(campaign_id):
+    """Another worker took the campaign over: stop sending it here"""
+    task = _in_flight.get(campaign_id)
+    if task:
+        task.cancel()
+
+def _on_campaign_done(campaign_id, task: asyncio.Task):
+    """Supervise finished campaign tasks: release the in-flight slot and surface errors"""
+    _in_flight.pop(campaign_id, None)
+    if task.cancelled():
+        logger.info(f"🛑 Campaign {campaign_id} task cancelled")
+    elif task.exception():
+        logger.error(f"❌ Campaign {campaign_id} task crashed: {task.exception()}")
+    elif task.result():
+        # Armed only now: queue and counters are flushed, the lease is released and
+        # the slot is free, so a wakeup that is already due finds the campaign runnable
+        _notify_wakeups(campaign_id, task.result())
+
+async def shutdown_campaigns():
+    """Cancel all in-flight campaign tasks and wait for them to unwind"""
+    tasks = list(_in_flight.values())
+    for task in tasks:
+        task.cancel()
+    if tasks:
+        await asyncio.gather(*tasks, return_exceptions=True)
+    await send_scheduler.close()
+    await campaign_counters.close()
+    await campaign_leases.close()
+
+async def process_campaign(campaign: dict, send_email_via_config, send_email_batch=None):
+    """
+    Send the campaign's steps that are due now. The first run queues step 1
+    for the whole contact list; every delivered step queues the contact's next
+    one, due its delayDays later. When only later steps remain, the campaign
+    is rescheduled to the earliest of them and the task ends, returning that
+    due time for the caller to arm a wakeup with. Throttled and
+    transiently failed sends go back into the queue with a later due time
+    instead of waiting here; permanent failures are dead-lettered, and a
+    sender that can no longer send pauses the campaign. With a batch
+    sender and a burst above one, Gmail and Outlook senders send ready emails
+    in groups of up to that burst through `send_email_batch`.
+    """
+    campaign_id = campaign.get("id")
+    campaign_name = campaign.get("name", "Unknown")
+    email_list_id = campaign.get("email_list_id")
+    sender_id = campaign.get("sender_id")
+
+    # Get pause_between_emails from the campaign record (300 seconds from your data)
+    pause_between_emails = campaign.get("pause_between_emails", 300)  # Default 5 minutes
+
+    logger.info(f"📧 Campaign {campaign_id} settings:")
+    logger.info(f"  - Name: {campaign_name}")
+    logger.info(f"  - Pause between emails: {pause_between_emails} seconds")
 
-            logging.info(f"👥 Found {len(contacts)} contacts for campaign {campaign_id}")
+    if not email_list_id or not sender_id:
+        logger.error(f"❌ Campaign {campaign_id} missing email_list_id or sender_id")
+        return
+
+    logger.info(f"🚀 Processing campaign {campaign_id} - {campaign_name}")
 
-            # ✅ Get current sent_count from database to continue from where we left off
-            current_sent_count = campaign.get("sent_count", 0)
-            sent_count = current_sent_count
-            failed_count = 0
+    try:
+        # Mark campaign as running
+        await run_storage(storage.update_campaign, campaign_id, {"status": "running"})
+
+        # Get sender configuration
+        sender = await run_storage(storage.get_sender, sender_id)
+
+        if not sender or not isinstance(sender, dict):
+            logger.error(f"❌ Sender config not found for sender_id {sender_id}")
+            await run_storage(storage.update_campaign, campaign_id, {"status": "failed"})
+            return
+
+        # Pace through the sender's token bucket (±20% jitter) instead of sleeping per email
+        send_scheduler.configure_sender(sender_id, interval=pause_between_emails, burst=SEND_BURST,
+                                        campaign_id=campaign_id)
+        group_size = send_group_size(sender, SEND_BURST) if send_email_batch else 1
+        provider = sender.get("provider")
+
+        # Parse campaign content
+        steps = []
+        if campaign.get("content"):
+            content = campaign.get("content")
+            steps = safe_parse_json(content, [])
+            
+        if not steps:
+            steps = [{
+                "subject": normalize_text(campaign.get("subject_line")),
+                "body": normalize_text(campaign.get("email_content")),
+                "order": 1
+            }]
+
+        logger.info(f"📧 Campaign {campaign_id} has {len(steps)} steps")
+
+        # ✅ Get current sent_count from database to continue from where we left off
+        current_sent_count = campaign.get("sent_count", 0)
+        sent_count = current_sent_count
+        failed_count = 0
+
+        # Progress counters are written behind, batched per campaign
+        campaign_counters.track(
+            campaign_id,
+            sent_count=current_sent_count,
+            failed_count=campaign.get("failed_count", 0),
+            bounce_count=campaign.get("bounce_count", 0)
+        )
+
+        # First pass: put step 1 in the queue for the whole list
+        total_recipients = campaign.get("total_recipients") or 0
+        if not campaign.get("steps_enqueued_at"):
+            started_at = datetime.now(timezone.utc)
+            total_recipients = await enqueue_first_step(campaign_id, email_list_id, started_at)
+            await run_storage(storage.update_campaign, campaign_id, {
+                "steps_enqueued_at": started_at.isoformat(),
+                "total_recipients": total_recipients,
+                "total_steps": len(steps)
+            })
+            logger.info(f"🗂️ Queued step 1 for {total_recipients} contacts of campaign {campaign_id}")
+
+        if not total_recipients:
+            await run_storage(storage.update_campaign, campaign_id, {"status": "completed"})
+            return
+
+        # Parse placeholders once per step, not once per recipient
+        templates = {}
+
+        def step_templates(step_idx: int):
+            if step_idx not in templates:
+                step = steps[step_idx]
+                templates[step_idx] = (
+                    compile_template(normalize_text(step.get("subject", ""))),
+                    compile_template(normalize_text(step.get("body", "")))
+                )
+            return templates[step_idx]
+
+        def complete_entry(entry: dict, status: str, error: str = None, attempts: int = None):
+            """Record an entry's outcome; a delivered step unlocks the contact's next one"""
+            next_idx = entry["step_index"] + 1
+            if status == "sent" and next_idx < len(steps) and isinstance(steps[next_idx], dict):
+                step_queue.complete(entry, status, next_idx, datetime.now(timezone.utc) + step_delay(steps[next_idx]))
+            else:
+                step_queue.complete(entry, status, error=error, attempts=attempts)
+
+        def dead_letter(entry: dict, recipient_email: str, failure: str, error: str, attempts: int = 0):
+            """Give up on an entry: keep it for review instead of sending it again"""
+            dead_letters.record(entry, recipient_email, sender_id, failure, error, attempts)
+            complete_entry(entry, "failed", error=error, attempts=attempts)
+
+        # Set once the sender itself is unusable (revoked grant, auth rejected): stop and pause
+        sender_failure = None
+
+        # Send whatever is due now, one batch of queue entries at a time
+        while True:
+            entries = await run_storage(step_queue.due, campaign_id, datetime.now(timezone.utc))
+            if not entries:
+                break
+            batch_sent, batch_failed, requeued_count, retried_count = sent_count, failed_count, 0, 0
+            contacts = await run_storage(fetch_contacts, [e.get("contact_id") for e in entries])
+
+            # One ledger lookup per step in the batch: skip contacts a step already reached
+            already_sent = {}
+            for entry in entries:
+                already_sent.setdefault(entry["step_index"], []).append(entry["contact_id"])
+            already_sent = {
+                step_idx: await delivery_ledger.delivered(campaign_id, step_idx, contact_ids)
+                for step_idx, contact_ids in already_sent.items()
+            }
+
+            ready = []
+            for entry in entries:
+                step_idx = entry["step_index"]
+                contact = contacts.get(entry["contact_id"])
+                if step_idx >= len(steps) or not isinstance(steps[step_idx], dict) or contact is None:
+                    # Step removed, or contact unsubscribed or deleted since it was queued
+                    complete_entry(entry, "skipped")
+                    continue
 
-            for step_idx, step in enumerate(steps):
-                if not isinstance(step, dict):
+                if entry["contact_id"] in already_sent[step_idx]:
+                    complete_entry(entry, "sent")
                     continue
-                    
-                subject = normalize_text(step.get("subject", ""))
-                body_template = normalize_text(step.get("body", ""))
 
-                logging.info(f"📤 Processing step {step_idx + 1}/{len(steps)} for campaign {campaign_id}")
+                recipient_email = contact.get("email")
 
-                for contact_idx, contact in enumerate(contacts):
-                    if not isinstance(contact, dict):
-                        failed_count += 1
-                        continue
-                        
-                    recipient_email = contact.get("email")
+                if not validate_email(recipient_email):
+                    failed_count += 1
+                    await campaign_counters.record(campaign_id, failed=1)
+                    dead_letter(entry, recipient_email, PERMANENT_RECIPIENT, f"Invalid email address: {recipient_email}")
+                    continue
 
-                    if not validate_email(recipient_email):
-                        failed_count += 1
-                        continue
-
-                    try:
-                        # Render templates
-                        body = render_pitch(body_template, contact)
-                        subj = render_pitch(subject, contact)
-
-                        success, error_msg = send_email_with_proper_handling(
-                            send_email_via_config,
-                            from_email=sender.get("user_email"),
-                            to_email=recipient_email,
-                            subject=subj,
-                            body=body
+                try:
+                    # Render templates
+                    subject_template, body_template = step_templates(step_idx)
+                    ready.append({
+                        "entry": entry,
+                        "contact": contact,
+                        "to_email": recipient_email,
+                        "subject": subject_template.render(contact),
+                        "body": body_template.render(contact),
+                    })
+                except Exception as e:
+                    failed_count += 1
+                    logger.error(f"❌ Error rendering email for {recipient_email}: {e}")
+                    await campaign_counters.record(campaign_id, failed=1)
+                    dead_letter(entry, recipient_email, PERMANENT_RECIPIENT, f"Template error: {e}")
+
+            for start in range(0, len(ready), group_size):
+                group = ready[start:start + group_size]
+                try:
+                    # Wait for a free slot on this sender, shared with its other campaigns
+                    if len(group) == 1:
+                        outcomes = [await send_scheduler.send(
+                            sender_id,
+                            campaign_id,
+                            functools.partial(
+                                send_email_with_proper_handling,
+                                send_email_via_config,
+                                from_email=sender.get("user_email"),
+                                to_email=group[0]["to_email"],
+                                subject=group[0]["subject"],
+                                body=group[0]["body"],
+                                config=sender  # already loaded: no per-email config query
+                            )
+                        )]
+                    else:
+                        # One provider batch, paced as len(group) sends
+                        outcomes = await send_scheduler.send(
+                            sender_id,
+                            campaign_id,
+                            functools.partial(
+                                send_batch_with_proper_handling,
+                                send_email_batch,
+                                from_email=sender.get("user_email"),
+                                messages=[{k: m[k] for k in ("to_email", "subject", "body")} for m in group],
+                                config=sender
+                            ),
+                            weight=len(group)
                         )
-
-                        if success:
-                            sent_count += 1
-                            logging.info(f"✅ Sent email to {recipient_email}")
-                            
-                            # ✅ Update sent_count in database after EVERY successful email send
-                            try:
-                                supabase.table("campaigns").update({
-                                    "sent_count": sent_count,
-                                    "updated_at": datetime.utcnow().replace(microsecond=0).isoformat()
-                                }).eq("id", campaign_id).execute()
-                                logging.info(f"📊 Updated sent_count to {sent_count} for campaign {campaign_id}")
-                            except Exception as update_error:
-                                logging.error(f"❌ Failed to update sent_count: {update_error}")
-                        else:
-                            failed_count += 1
-                            logging.error(f"❌ Failed to send to {recipient_email}: {error_msg}")
-
-                        # Use the campaign-specific pause_between_emails with randomization
-                        random_factor = random.uniform(0.8, 1.2)  # ±20% randomness
-                        actual_delay = pause_between_emails * random_factor
-                        
-                        logging.info(f"⏱️ Pausing {actual_delay:.1f}s before next email (configured: {pause_between_emails}s)")
-                        await asyncio.sleep(actual_delay)
-
-                    except Exception as e:
+                except Exception as e:
+                    logger.error(f"❌ Error sending to {', '.join(m['to_email'] for m in group)}: {e}")
+                    outcomes = [(False, str(e), SendFailure(classify_exception(e)))] * len(group)
+                count_send_outcomes(provider, outcomes)
+
+                # Feed the sender's adaptive pacing: throttles slow it down, deliveries ramp it back up
+                now = datetime.now(timezone.utc)
+                throttles = [failure.retry_after for _, _, failure in outcomes if failure and failure.kind == THROTTLED]
+                if throttles:
+                    resume_in = send_scheduler.throttled(sender_id, max(throttles))
+                    requeue_at = now + timedelta(seconds=resume_in)
+                else:
+                    send_scheduler.succeeded(sender_id, sum(1 for success, _, _ in outcomes if success))
+
+                for message, (success, error_msg, failure) in zip(group, outcomes):
+                    recipient_email = message["to_email"]
+                    entry = message["entry"]
+                    attempts = (entry.get("attempts") or 0) + 1
+                    if success:
+                        sent_count += 1
+                        recipient_log.info(
+                            "✅ Sent step %d to %s", entry["step_index"] + 1, recipient_email,
+                            campaign_id=campaign_id, step=entry["step_index"] + 1, recipient=recipient_email
+                        )
+                        delivery_ledger.record(campaign_id, entry["step_index"], message["contact"].get("id"), recipient_email)
+                        await campaign_counters.record(campaign_id, sent=1)
+                        complete_entry(entry, "sent")
+                    elif failure.kind == THROTTLED:
+                        # Not a failure: back in the queue, due once the sender may send again
+                        requeued_count += 1
+                        EMAIL_RETRIES.inc(provider=provider)
+                        step_queue.requeue(entry, requeue_at)
+                    elif failure.kind == TRANSIENT and attempts < RETRY_MAX_ATTEMPTS:
+                        # Back in the queue after a jittered exponential backoff; nothing waits here
+                        retry_in = backoff_delay(attempts)
+                        retried_count += 1
+                        EMAIL_RETRIES.inc(provider=provider)
+                        recipient_log.warning(
+                            "🔁 Send %d to %s failed, retrying in %.0fs: %s", attempts, recipient_email, retry_in, error_msg,
+                            campaign_id=campaign_id, step=entry["step_index"] + 1, recipient=recipient_email
+                        )
+                        step_queue.requeue(entry, now + timedelta(seconds=retry_in), attempts=attempts, error=error_msg)
+                    else:
                         failed_count += 1
-                        logging.error(f"❌ Error sending to {recipient_email}: {e}")
+                        recipient_log.error(
+                            "❌ Failed to send to %s (%s): %s", recipient_email, failure.kind, error_msg,
+                            campaign_id=campaign_id, step=entry["step_index"] + 1, recipient=recipient_email
+                        )
+                        await campaign_counters.record(campaign_id, failed=1)
+                        dead_letter(entry, recipient_email, failure.kind, error_msg, attempts)
+                        if failure.kind == PERMANENT_SENDER:
+                            sender_failure = error_msg
+
+                if sender_failure:
+                    # The rest of the batch stays pending for when the sender is fixed
+                    break
+
+            # Ledger before queue: an entry left pending after a crash is found
+            # in the ledger on resume instead of being sent twice. Dead letters
+            # too: an entry is only marked failed once its dead letter is stored
+            await delivery_ledger.flush(campaign_id)
+            await dead_letters.flush(campaign_id)
+            await step_queue.flush(campaign_id)
+            logger.info(
+                f"📬 Campaign {campaign_id}: batch of {len(entries)} done, "
+                f"{sent_count - batch_sent} sent, {failed_count - batch_failed} failed, "
+                f"{requeued_count} requeued after throttling, {retried_count} retrying ({sent_count} sent in total)"
+            )
+
+            if sender_failure:
+                await campaign_counters.release(campaign_id)
+                await run_storage(storage.update_campaign, campaign_id, {
+                    "status": "paused",
+                    "updated_at": datetime.utcnow().replace(microsecond=0).isoformat()
+                })
+                _notify_wakeups(campaign_id, None, "paused")
+                logger.error(
+                    f"⛔ Campaign {campaign_id} paused: sender {sender.get('user_email')} can no longer send "
+                    f"({sender_failure}). Reconnect the sender and schedule the campaign again to resume"
+                )
+                return
+
+        next_due_at = await run_storage(step_queue.next_due_at, campaign_id)
+        if next_due_at:
+            # Follow-ups are days away: hand the campaign back until the next one is due
+            await campaign_counters.release(campaign_id)
+            update = {
+                "status": "running",
+                "scheduled_at": next_due_at,
+                "updated_at": datetime.utcnow().replace(microsecond=0).isoformat()
+            }
+            if sent_count > current_sent_count:
+                update["sent_at"] = update["updated_at"]
+            await run_storage(storage.update_campaign, campaign_id, update)
+            logger.info(f"⏳ Campaign {campaign_id}: next step due at {next_due_at}")
+            return next_due_at
+
+        # ✅ Final campaign completion update (pending counters go first)
+        await campaign_counters.release(campaign_id)
+        total_contacts = total_recipients * len(steps)
+        completion_rate = round((sent_count / total_contacts) * 100) if total_contacts else 0
+
+        if sent_count == total_contacts:
+            new_status = "completed"
+        elif sent_count > 0:
+            new_status = "partially_completed"
+        else:
+            new_status = "failed"
 
-            # ✅ Final campaign completion update
-            total_contacts = len(contacts) * len(steps)
-            completion_rate = round((sent_count / total_contacts) * 100) if total_contacts else 0
+        try:
+            await run_storage(storage.update_campaign, campaign_id, {
+                "status": new_status,
+                "sent_count": sent_count,  # Final sent count
+                "completion_rate": completion_rate,
+                "total_steps": len(steps),
+                "completed_at": datetime.utcnow().replace(microsecond=0).isoformat() if new_status in ["completed", "failed"] else None,
+                "updated_at": datetime.utcnow().replace(microsecond=0).isoformat(),
+                "sent_at": datetime.utcnow().replace(microsecond=0).isoformat() if sent_count > current_sent_count else None
+            })
+            logger.info(f"🎯 Final campaign update: {new_status}")
+        except Exception as e:
+            logger.error(f"❌ Failed to update final campaign status: {e}")
 
-            if sent_count == total_contacts:
-                new_status = "completed"
-            elif sent_count > 0:
-                new_status = "partially_completed"
-            else:
-                new_status = "failed"
-
-            try:
-                supabase.table("campaigns").update({
-                    "status": new_status,
-                    "sent_count": sent_count,  # Final sent count
-                    "completion_rate": completion_rate,
-                    "total_steps": len(steps),
-                    "completed_at": datetime.utcnow().replace(microsecond=0).isoformat() if new_status in ["completed", "failed"] else None,
-                    "updated_at": datetime.utcnow().replace(microsecond=0).isoformat(),
-                    "sent_at": datetime.utcnow().replace(microsecond=0).isoformat() if sent_count > current_sent_count else None
-                }).eq("id", campaign_id).execute()
-                logging.info(f"🎯 Final campaign update: {new_status}")
-            except Exception as e:
-                logging.error(f"❌ Failed to update final campaign status: {e}")
-
-            logging.info(f"✅ Campaign {campaign_id}: Sent {sent_count}/{total_contacts} emails with {pause_between_emails}s delays. Failed: {failed_count}. Status → {new_status}")
+        logger.info(f"✅ Campaign {campaign_id}: Sent {sent_count}/{total_contacts} emails paced at {pause_between_emails}s. Failed: {failed_count}. Status → {new_status}")
 
+    except Exception as e:
+        logger.error(f"❌ Error processing campaign {campaign_id}: {e}")
+        try:
+            await run_storage(storage.update_campaign, campaign_id, {"status": "failed"})
+        except:
+            pass
+    finally:
+        # Also reached on cancellation, so no counted sends are lost on shutdown
+        send_scheduler.release_sender(sender_id, campaign_id)
+        await campaign_counters.release(campaign_id)
+        try:
+            await dead_letters.flush(campaign_id)
+            await step_queue.flush(campaign_id)
         except Exception as e:
-            logging.error(f"❌ Error processing campaign {campaign_id}: {e}")
-            try:
-                supabase.table("campaigns").update({"status": "failed"}).eq("id", campaign_id).execute()
-            except:
-                pass
+            # Entries stay pending and are checked against the ledger on resume
+            logger.error(f"❌ Failed to flush step queue for campaign {campaign_id}: {e}")
+            dead_letters.discard(campaign_id)
+            step_queue.discard(campaign_id)
 
 def process_campaigns_sync():
     """Synchronous wrapper for the async process_campaigns function"""
     try:
-        return asyncio.run(process_campaigns())
+        return asyncio.run(process_campaigns(wait=True))
     except Exception as e:
-        logging.error(f"❌ Error in campaign processor: {e}")
+        logger.error(f"❌ Error in campaign processor: {e}")
         raise
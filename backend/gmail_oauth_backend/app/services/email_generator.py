@@ -1,10 +1,10 @@
 import os
-import requests
 from urllib.parse import urljoin
 from bs4 import BeautifulSoup
 from dotenv import load_dotenv
 from openai import OpenAI
 import logging
+from app.services.http_client import get_http_client
 
 logger = logging.getLogger(__name__)
 
@@ -23,7 +23,7 @@ def scrape_services(website_url):
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
         
-        response = requests.get(website_url, timeout=10, headers=headers)
+        response = get_http_client().get(website_url, timeout=10, headers=headers)
         if response.status_code != 200:
             return f"Could not fetch services from website. Status code: {response.status_code}"
         
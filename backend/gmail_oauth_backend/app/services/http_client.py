@@ -0,0 +1,63 @@
+import importlib.util
+import logging
+import httpx
+from app.config import (
+    HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT, HTTP_MAX_CONNECTIONS, HTTP_MAX_KEEPALIVE, HTTP_KEEPALIVE_EXPIRY, HTTP2_ENABLED
+)
+
+logger = logging.getLogger(__name__)
+
+_client = None
+_async_client = None
+
+
+def _client_options() -> dict:
+    """
+    Settings shared by the sync and async clients: pooled keep-alive
+    connections per host, explicit connect/read timeouts, HTTP/2 when the
+    h2 package is installed (httpx[http2]) and requests-style redirects.
+    """
+    return {
+        "timeout": httpx.Timeout(HTTP_READ_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+        "limits": httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        ),
+        "http2": HTTP2_ENABLED and importlib.util.find_spec("h2") is not None,
+        "follow_redirects": True,
+    }
+
+
+def get_http_client() -> httpx.Client:
+    """Shared client for sync routes and services (OAuth callbacks, scraping)"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.Client(**_client_options())
+    return _client
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """Shared client for async senders (provider APIs, token refresh)"""
+    global _async_client
+    if _async_client is None or _async_client.is_closed:
+        _async_client = httpx.AsyncClient(**_client_options())
+    return _async_client
+
+
+def open_http_clients():
+    """Create both clients up front; called from the app lifespan"""
+    options = _client_options()
+    get_http_client()
+    get_async_http_client()
+    logger.info(f"🌐 HTTP clients ready (http2={options['http2']}, max_connections={HTTP_MAX_CONNECTIONS})")
+
+
+async def close_http_clients():
+    global _client, _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+    if _client is not None:
+        _client.close()
+        _client = None
@@ -0,0 +1,104 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+from app.config import LOG_LEVEL, LOG_LEVELS, LOG_FORMAT, LOG_RECIPIENT_SAMPLE
+
+TEXT_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+# Attributes every LogRecord has; anything else on a record came in through `extra`
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+_listener = None
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, with the structured fields passed as `extra`"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update((k, v) for k, v in vars(record).items() if k not in _RECORD_ATTRS)
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def parse_levels(spec: str) -> dict:
+    """"name=LEVEL,name=LEVEL" -> {logger name: level}; malformed entries are ignored"""
+    levels = {}
+    for item in (spec or "").split(","):
+        name, _, level = item.partition("=")
+        if name.strip() and level.strip():
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def configure_logging(level: str = LOG_LEVEL, levels: str = LOG_LEVELS, fmt: str = LOG_FORMAT, stream=None):
+    """
+    Route all logging through a queue: callers (the event loop included) only
+    enqueue records, and a background thread formats and writes them to
+    `stream` (stderr by default). `levels` sets levels per subsystem logger.
+    Calling it again replaces the previous setup.
+    """
+    global _listener
+    stop_logging()
+
+    handler = logging.StreamHandler(stream or sys.stderr)
+    handler.setFormatter(JsonFormatter() if fmt == "json" else logging.Formatter(TEXT_FORMAT))
+    log_queue = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(log_queue, handler, respect_handler_level=True)
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    root.setLevel(level)
+    for name, subsystem_level in parse_levels(levels).items():
+        logging.getLogger(name).setLevel(subsystem_level)
+
+    _listener.start()
+
+
+def stop_logging():
+    """Write out queued records and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(stop_logging)
+
+
+class SampledLogger:
+    """
+    Logger for per-recipient events on the send hot path. info() logs one in
+    `every` calls (0 logs none) with its keyword arguments as structured
+    fields and only counts the rest; warning() and error() always log.
+    Callers log aggregated summaries at full rate instead.
+    """
+
+    def __init__(self, logger: logging.Logger, every: int = LOG_RECIPIENT_SAMPLE):
+        self.logger = logger
+        self.every = every
+        self.seen = 0
+
+    def info(self, msg: str, *args, **fields):
+        self.seen += 1
+        if self.every <= 0 or self.seen % self.every:
+            return
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info(msg, *args, extra=fields)
+
+    def warning(self, msg: str, *args, **fields):
+        self.logger.warning(msg, *args, extra=fields)
+
+    def error(self, msg: str, *args, **fields):
+        self.logger.error(msg, *args, extra=fields)
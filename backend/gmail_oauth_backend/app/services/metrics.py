@@ -0,0 +1,200 @@
+import asyncio
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# Seconds: batched sends to a nearby API take milliseconds, timeouts take tens of seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(pairs) -> str:
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}" if pairs else ""
+
+
+def _format_value(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}   # label values tuple -> value (or histogram state)
+        # Updated from the event loop and from worker threads (SMTP sends, storage calls)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _samples(self):
+        """(suffix, label pairs, value) for every sample of this metric"""
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            yield "", list(zip(self.labelnames, key)), value
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, pairs, value in self._samples():
+            lines.append(f"{self.name}{suffix}{_format_labels(pairs)} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        if not self.labelnames:
+            self._values[()] = 0   # exported before the first update
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    """Fixed buckets; each observation is one bisect and a few increments under the lock"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, count: int = 1, **labels):
+        """Record `count` observations of `value` (e.g. every email of one batch)"""
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += count
+            state[1] += value * count
+            state[2] += count
+
+    @contextmanager
+    def time(self, count: int = 1, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, count, **labels)
+
+    def _samples(self):
+        with self._lock:
+            items = [(key, (list(state[0]), state[1], state[2])) for key, state in self._values.items()]
+        for key, (bucket_counts, total, count) in items:
+            pairs = list(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), bucket_counts):
+                cumulative += bucket_count
+                yield "_bucket", pairs + [("le", _format_value(bound))], cumulative
+            yield "_sum", pairs, total
+            yield "_count", pairs, count
+
+
+class MetricsRegistry:
+    """In-process metrics rendered in the Prometheus text exposition format"""
+
+    def __init__(self):
+        self._metrics = []
+
+    def _register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames=()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames=()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames=(), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+EMAILS_SENT = metrics.counter("email_sends_total", "Emails the provider accepted", ("provider",))
+EMAIL_FAILURES = metrics.counter(
+    "email_send_failures_total", "Sends that did not go out, by failure kind (see retry_policy)", ("provider", "failure")
+)
+EMAIL_RETRIES = metrics.counter("email_send_retries_total", "Sends attempted again after a throttle or transient failure", ("provider",))
+DEAD_LETTERS = metrics.counter("campaign_dead_letters_total", "Campaign emails given up on, by failure kind", ("failure",))
+STORAGE_CALLS = metrics.counter("storage_calls_total", "Database round trips of the campaign engine", ("table", "method"))
+SEND_LATENCY = metrics.histogram(
+    "email_send_duration_seconds", "Provider call time per email; batched emails observe their batch", ("provider",)
+)
+TOKEN_REFRESH_LATENCY = metrics.histogram("oauth_token_refresh_duration_seconds", "OAuth access token refresh time", ("provider",))
+DUE_CAMPAIGNS = metrics.gauge("campaigns_due", "Due campaigns found by the last processor tick")
+SENDS_IN_FLIGHT = metrics.gauge("email_sends_in_flight", "Emails handed to a provider and not yet answered", ("provider",))
+EVENT_LOOP_LAG = metrics.gauge("event_loop_lag_seconds", "How late the event loop woke the last lag probe")
+
+
+@contextmanager
+def track_sends(provider: str, count: int = 1):
+    """In-flight gauge and latency histogram around one provider call carrying `count` emails"""
+    SENDS_IN_FLIGHT.inc(count, provider=provider)
+    try:
+        with SEND_LATENCY.time(count, provider=provider):
+            yield
+    finally:
+        SENDS_IN_FLIGHT.dec(count, provider=provider)
+
+
+def count_send_outcomes(provider: str, outcomes):
+    """Count (success, error, failure) send outcomes for a provider; failures by their kind"""
+    sent, failed = 0, {}
+    for success, _, failure in outcomes:
+        if success:
+            sent += 1
+        else:
+            kind = getattr(failure, "kind", None) or "unknown"
+            failed[kind] = failed.get(kind, 0) + 1
+    if sent:
+        EMAILS_SENT.inc(sent, provider=provider)
+    for kind, count in failed.items():
+        EMAIL_FAILURES.inc(count, provider=provider, failure=kind)
+
+
+async def monitor_event_loop(interval: float = 1.0):
+    """Sample event-loop lag: how much later than asked a sleep wakes up"""
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        EVENT_LOOP_LAG.set(max(0.0, time.perf_counter() - start - interval))
@@ -0,0 +1,108 @@
+import base64
+import uuid
+from functools import lru_cache
+from email.header import Header
+from email.utils import formataddr
+
+
+class MessageEnvelope:
+    """
+    A message encoded once with every header except To.
+
+    Campaign steps send the same subject and body to many recipients, so the
+    MIME structure, header encoding and body base64 are done once while a
+    sender keeps sending the same message; each recipient only adds its To
+    line. For the Gmail API the encoded form is cached too: the To line is
+    padded to a multiple of three bytes so its base64 can simply be
+    prepended to the cached remainder.
+    """
+
+    __slots__ = ("rest", "_raw_rest")
+
+    def __init__(self, rest: str):
+        self.rest = rest
+        self._raw_rest = None
+
+    def as_string(self, to_header: str) -> str:
+        return f"To: {to_header}\n{self.rest}"
+
+    def gmail_raw(self, to_header: str) -> str:
+        """base64url of as_string(to_header), as messages.send expects it"""
+        if self._raw_rest is None:
+            self._raw_rest = base64.urlsafe_b64encode(self.rest.encode()).decode()
+        line = f"To: {to_header}"
+        # Trailing spaces in a header are ignored by readers
+        line += " " * (-(len(line.encode()) + 1) % 3) + "\n"
+        return base64.urlsafe_b64encode(line.encode()).decode() + self._raw_rest
+
+
+@lru_cache(maxsize=64)
+def _from_header(from_email: str, from_name: str = None) -> str:
+    return formataddr((from_name, from_email), "utf-8") if from_name else from_email
+
+
+def _subject_header(subject: str) -> str:
+    charset = "us-ascii" if subject.isascii() else "utf-8"
+    return Header(subject, charset, header_name="Subject").encode()
+
+
+def _html_part(body: str) -> str:
+    """The text/html part, base64-encoded the way MIMEText(body, "html", "utf-8") does"""
+    return (
+        'Content-Type: text/html; charset="utf-8"\n'
+        "MIME-Version: 1.0\n"
+        "Content-Transfer-Encoding: base64\n\n"
+        + base64.encodebytes(body.encode()).decode()
+    )
+
+
+# (from_email, from_name, multipart) -> (subject, subject header, body, html part,
+# envelope) of the sender's last message. One entry per sender, so personalized
+# text is never kept beyond the next message. Entries are replaced whole, never
+# mutated, so SMTP threads building concurrently each see a consistent one.
+_last_messages = {}
+_MAX_SENDERS = 256
+
+
+def clear_cache():
+    _last_messages.clear()
+
+
+def build_envelope(from_email: str, subject: str, body: str, from_name: str = None, multipart: bool = False) -> MessageEnvelope:
+    """
+    Envelope for one (sender, subject, body). Only what repeats from the
+    sender's previous message is reused: a static step encodes its envelope
+    once for every recipient, a personalized body still reuses a static
+    subject, and per-recipient text is never cached.
+    """
+    subject, body = subject or "", body or ""
+    key = (from_email, from_name, multipart)
+    last_subject, subject_header, last_body, part, envelope = _last_messages.get(key) or (None,) * 5
+    if last_subject == subject and last_body == body:
+        return envelope
+
+    if last_subject != subject:
+        subject_header = _subject_header(subject)
+    if last_body != body:
+        part = _html_part(body)
+    envelope = _envelope(_from_header(from_email, from_name), subject_header, part, multipart)
+
+    if key not in _last_messages and len(_last_messages) >= _MAX_SENDERS:
+        _last_messages.clear()
+    _last_messages[key] = (subject, subject_header, body, part, envelope)
+    return envelope
+
+
+def _envelope(from_header: str, subject_header: str, part: str, multipart: bool) -> MessageEnvelope:
+    headers = f"From: {from_header}\nSubject: {subject_header}\n"
+    if not multipart:
+        return MessageEnvelope(headers + part)
+
+    # multipart/alternative wrapper, as the SMTP path has always sent
+    boundary = f"==============={uuid.uuid4().hex}=="
+    return MessageEnvelope(
+        f'Content-Type: multipart/alternative; boundary="{boundary}"\n'
+        "MIME-Version: 1.0\n"
+        f"{headers}\n"
+        f"--{boundary}\n{part}\n--{boundary}--\n"
+    )
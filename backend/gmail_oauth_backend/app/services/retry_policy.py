@@ -0,0 +1,67 @@
+import random
+import re
+import smtplib
+from collections import namedtuple
+from app.config import RETRY_BASE_DELAY, RETRY_MAX_DELAY
+
+# What a failed send means for the email and its sender
+THROTTLED = "throttled"                       # provider asked us to slow down: requeue, pace down
+TRANSIENT = "transient"                       # may work later: retry with backoff
+PERMANENT_RECIPIENT = "permanent_recipient"   # this email can never be delivered: dead-letter it
+PERMANENT_SENDER = "permanent_sender"         # the sender can no longer send at all: stop using it
+
+SendFailure = namedtuple("SendFailure", "kind retry_after", defaults=(None,))
+
+# OAuth token endpoint errors that mean the grant is gone (revoked, expired, app removed)
+_DEAD_GRANT = re.compile(r"invalid_grant|unauthorized_client|invalid_client", re.IGNORECASE)
+
+
+def classify_http_failure(status_code: int, text: str = "") -> str:
+    """Failure kind of a non-throttled Gmail/Graph API error response"""
+    if _DEAD_GRANT.search(text or ""):
+        return PERMANENT_SENDER
+    if status_code == 401:
+        return TRANSIENT   # the cached token is dropped; the retry refreshes it
+    if status_code == 403:
+        return PERMANENT_SENDER   # no permission to send (scope, disabled mailbox, send-as denied)
+    if status_code == 408 or status_code >= 500:
+        return TRANSIENT
+    if 400 <= status_code < 500:
+        return PERMANENT_RECIPIENT   # invalid recipient, malformed or oversized message
+    return TRANSIENT
+
+
+def classify_smtp_code(code: int, sender: bool = False) -> str:
+    """Failure kind of an SMTP reply code; `sender` for replies to MAIL FROM"""
+    if 400 <= code < 500:
+        return TRANSIENT
+    if code in (530, 534, 535):
+        return PERMANENT_SENDER   # authentication required / rejected
+    if sender:
+        return PERMANENT_SENDER
+    return PERMANENT_RECIPIENT if 500 <= code < 600 else TRANSIENT
+
+
+def classify_smtp_exception(exc: Exception) -> str:
+    if isinstance(exc, smtplib.SMTPAuthenticationError):
+        return PERMANENT_SENDER
+    if isinstance(exc, smtplib.SMTPRecipientsRefused):
+        kinds = {classify_smtp_code(code) for code, _ in exc.recipients.values()}
+        return TRANSIENT if kinds == {TRANSIENT} else PERMANENT_RECIPIENT
+    if isinstance(exc, smtplib.SMTPResponseException):
+        return classify_smtp_code(exc.smtp_code, sender=isinstance(exc, smtplib.SMTPSenderRefused))
+    return TRANSIENT   # disconnects, timeouts, refused connections
+
+
+def classify_exception(exc: Exception) -> str:
+    """Failure kind of an exception raised on the way to the provider (token refresh, network)"""
+    if isinstance(exc, smtplib.SMTPException):
+        return classify_smtp_exception(exc)
+    detail = getattr(exc, "detail", None) or str(exc)
+    return PERMANENT_SENDER if _DEAD_GRANT.search(str(detail)) else TRANSIENT
+
+
+def backoff_delay(attempt: int, base: float = RETRY_BASE_DELAY, cap: float = RETRY_MAX_DELAY, rng=random) -> float:
+    """Seconds before retry number `attempt` (1-based): exponential, capped, with equal jitter"""
+    delay = min(cap, base * 2 ** max(0, attempt - 1))
+    return delay / 2 + rng.uniform(0, delay / 2)
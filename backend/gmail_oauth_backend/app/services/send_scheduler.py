@@ -0,0 +1,331 @@
+import asyncio
+import random
+import time
+import logging
+from collections import deque
+from app.config import ADAPTIVE_DECREASE, ADAPTIVE_RAMP_SENDS, ADAPTIVE_MIN_RATE
+
+logger = logging.getLogger(__name__)
+
+
+class MonotonicClock:
+    """Default clock; swap for a fake one to drive the scheduler in tests"""
+
+    def now(self) -> float:
+        return time.monotonic()
+
+    async def sleep(self, seconds: float):
+        await asyncio.sleep(seconds)
+
+
+class TokenBucket:
+    """
+    Token bucket refilled with one token every `interval` seconds (± jitter),
+    holding at most `burst` tokens. A full bucket does not accrue time, so an
+    idle sender gets at most `burst` back-to-back sends.
+    """
+
+    def __init__(self, interval: float, burst: int = 1, jitter: float = 0.2, clock=None, rng=None):
+        self.clock = clock or MonotonicClock()
+        self.rng = rng or random.Random()
+        self.interval = float(interval)
+        self.capacity = max(1, int(burst))
+        self.jitter = jitter
+        self.tokens = self.capacity
+        self._next_token_at = self.clock.now()
+
+    def _jittered_interval(self) -> float:
+        return self.interval * self.rng.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def _refill(self, now: float):
+        while self.tokens < self.capacity and now >= self._next_token_at:
+            self.tokens += 1
+            self._next_token_at += self._jittered_interval()
+
+    def available(self) -> int:
+        """Whole tokens available right now"""
+        self._refill(self.clock.now())
+        return self.tokens
+
+    def try_acquire(self, count: int = 1) -> float:
+        """
+        Take `count` tokens (capped at the burst size). Returns 0 on success,
+        otherwise roughly how many seconds until that many are available.
+        """
+        count = min(max(1, int(count)), self.capacity)
+        now = self.clock.now()
+        self._refill(now)
+        if self.tokens >= count:
+            if self.tokens == self.capacity:
+                # Refill time only starts counting once the bucket is drawn down
+                self._next_token_at = now + self._jittered_interval()
+            self.tokens -= count
+            return 0.0
+        missing = count - self.tokens
+        return max(0.0, self._next_token_at - now) + (missing - 1) * self.interval
+
+
+class AdaptiveRate:
+    """
+    AIMD control of a sender's send rate. The configured interval is the
+    ceiling. A throttle from the provider multiplies the rate by `decrease`,
+    starting from the lower of the current and the recently achieved rate,
+    and holds the bucket for at least Retry-After. Every delivered email then
+    adds 1/`ramp_sends` of the ceiling rate until the ceiling is reached. With
+    no ceiling (interval 0) the ramp step is relative to the rate that was
+    throttled. Throttles reported while a hold is still running do not cut
+    the rate again, so one burst of 429s counts as a single decrease.
+    """
+
+    def __init__(self, bucket: TokenBucket, decrease: float = ADAPTIVE_DECREASE,
+                 ramp_sends: int = ADAPTIVE_RAMP_SENDS, min_rate: float = ADAPTIVE_MIN_RATE):
+        self.bucket = bucket
+        self.ceiling_interval = bucket.interval
+        self.decrease = decrease
+        self.ramp_sends = max(1, int(ramp_sends))
+        self.min_rate = min_rate
+        self.rate = None            # emails/s while backed off; None at the ceiling
+        self.step = 0.0
+        self.hold_until = 0.0
+        self._dispatched = deque(maxlen=20)   # (time, weight) of recent sends
+
+    def dispatched(self, now: float, weight: int = 1):
+        self._dispatched.append((now, weight))
+
+    def achieved_rate(self):
+        """Emails/s over the recent sends, or None with too little history"""
+        if len(self._dispatched) < 2:
+            return None
+        span = self._dispatched[-1][0] - self._dispatched[0][0]
+        if span <= 0:
+            return None
+        return sum(weight for _, weight in list(self._dispatched)[1:]) / span
+
+    def _apply(self):
+        self.bucket.interval = max(self.ceiling_interval, 1 / self.rate) if self.rate else self.ceiling_interval
+
+    def throttled(self, now: float, retry_after: float = None) -> float:
+        """Back off after a provider throttle; returns seconds until the sender may send again"""
+        if now < self.hold_until:
+            self.hold_until = max(self.hold_until, now + (retry_after or 0.0))
+        else:
+            ceiling_rate = 1 / self.ceiling_interval if self.ceiling_interval > 0 else None
+            current = [r for r in (self.rate or ceiling_rate, self.achieved_rate()) if r]
+            base = min(current) if current else self.min_rate / self.decrease
+            self.rate = max(self.min_rate, base * self.decrease)
+            self.step = (ceiling_rate or base) / self.ramp_sends
+            self._apply()
+            self.hold_until = now + max(retry_after or 0.0, self.bucket.interval)
+
+        self.bucket.tokens = 0
+        self.bucket._next_token_at = max(self.bucket._next_token_at, self.hold_until)
+        self._dispatched.clear()
+        return self.hold_until - now
+
+    def succeeded(self, count: int = 1):
+        """Additive increase per delivered email, back to the ceiling"""
+        if self.rate is None:
+            return
+        self.rate += self.step * count
+        if self.ceiling_interval > 0 and self.rate >= 1 / self.ceiling_interval:
+            self.rate = None
+        self._apply()
+
+
+class _SenderLane:
+    """Pending sends for one sender, served round-robin across campaigns"""
+
+    def __init__(self, bucket: TokenBucket):
+        self.bucket = bucket
+        self.control = AdaptiveRate(bucket)
+        self.intervals = {}     # campaign_id -> pacing the campaign configured
+        self.queues = {}        # campaign_id -> deque of (send_fn, future, weight)
+        self.ready = deque()    # campaign ids with queued sends, in service order
+        self.wakeup = asyncio.Event()
+        self.task = None
+
+    def push(self, campaign_id, item):
+        queue = self.queues.get(campaign_id)
+        if not queue:
+            queue = self.queues[campaign_id] = deque()
+            self.ready.append(campaign_id)
+        queue.append(item)
+        self.wakeup.set()
+
+    def drop_cancelled(self):
+        """Discard sends whose caller went away so they don't consume a token"""
+        while self.ready:
+            queue = self.queues[self.ready[0]]
+            while queue and queue[0][1].done():
+                queue.popleft()
+            if queue:
+                return
+            del self.queues[self.ready.popleft()]
+
+    def next_weight(self) -> int:
+        """Tokens the next send to be served will take"""
+        return self.queues[self.ready[0]][0][2]
+
+    def pop_next(self):
+        campaign_id = self.ready.popleft()
+        queue = self.queues[campaign_id]
+        item = queue.popleft()
+        if queue:
+            self.ready.append(campaign_id)
+        else:
+            del self.queues[campaign_id]
+        return item
+
+
+class SendScheduler:
+    """
+    Central pacing for outbound email. Each sender (email_configs.id) gets its
+    own token bucket; campaigns sharing a sender are interleaved round-robin and
+    each send fires as soon as the sender has a free slot. A sender with nothing
+    queued parks on an event, and a sender waiting for a token sleeps exactly
+    until the next one is due. Callers report provider throttles and
+    deliveries back with throttled() and succeeded(), which adapt the
+    sender's rate below its configured pacing (see AdaptiveRate).
+    """
+
+    def __init__(self, clock=None, jitter: float = 0.2, rng=None):
+        self.clock = clock or MonotonicClock()
+        self.jitter = jitter
+        self.rng = rng or random.Random()
+        self._lanes = {}
+        self._firing = set()
+        self._loop = None
+
+    def _bind_loop(self):
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Lanes hold events and tasks tied to a loop; start fresh on a new one
+            self._lanes = {}
+            self._firing = set()
+            self._loop = loop
+
+    def configure_sender(self, sender_id, interval: float, burst: int = 1, campaign_id=None):
+        """
+        Set the pacing for a sender on behalf of a campaign. When several
+        campaigns use the same sender, the slowest interval among them wins so
+        no campaign can speed it up; release_sender() gives the pacing back.
+        """
+        self._bind_loop()
+        lane = self._lanes.get(sender_id)
+        if lane is None:
+            bucket = TokenBucket(interval, burst, self.jitter, self.clock, self.rng)
+            lane = self._lanes[sender_id] = _SenderLane(bucket)
+        lane.intervals[campaign_id] = float(interval)
+        lane.bucket.capacity = max(1, int(burst))
+        self._recompute_ceiling(lane)
+
+    def release_sender(self, sender_id, campaign_id=None):
+        """
+        The campaign stopped using the sender. Its interval no longer counts
+        towards the ceiling, and once no campaign is left the lane is dropped,
+        unless a throttle hold is still running and the next campaign must
+        wait it out.
+        """
+        lane = self._lanes.get(sender_id)
+        if lane is None:
+            return
+        lane.intervals.pop(campaign_id, None)
+        if lane.intervals:
+            self._recompute_ceiling(lane)
+            return
+        if lane.queues or self.clock.now() < lane.control.hold_until:
+            return
+        if lane.task:
+            lane.task.cancel()
+        del self._lanes[sender_id]
+
+    @staticmethod
+    def _recompute_ceiling(lane: _SenderLane):
+        lane.control.ceiling_interval = max(lane.intervals.values())
+        if lane.control.rate and lane.control.ceiling_interval > 0 \
+                and lane.control.rate >= 1 / lane.control.ceiling_interval:
+            lane.control.rate = None
+        lane.control._apply()
+
+    def throttled(self, sender_id, retry_after: float = None) -> float:
+        """
+        The provider throttled a send for this sender (429/503, SMTP 421/451):
+        slow the sender down. Returns seconds until it sends again.
+        """
+        lane = self._lanes.get(sender_id)
+        if lane is None:
+            return retry_after or 0.0
+        hold = lane.control.throttled(self.clock.now(), retry_after)
+        lane.wakeup.set()
+        logger.info(f"🐢 Sender {sender_id} throttled: pacing at {lane.bucket.interval:.3f}s per email, resuming in {hold:.1f}s")
+        return hold
+
+    def succeeded(self, sender_id, count: int = 1):
+        """`count` emails from this sender were delivered"""
+        lane = self._lanes.get(sender_id)
+        if lane is not None:
+            lane.control.succeeded(count)
+
+    async def send(self, sender_id, campaign_id, send_fn, weight: int = 1):
+        """
+        Queue `send_fn` on the sender's lane and wait for its result. A send
+        that delivers several messages at once (a provider batch) passes their
+        count as `weight` and takes that many tokens, up to the burst size.
+        """
+        self._bind_loop()
+        lane = self._lanes.get(sender_id)
+        if lane is None:
+            raise KeyError(f"Sender {sender_id} is not configured")
+        if lane.task is None or lane.task.done():
+            lane.task = asyncio.create_task(self._dispatch(sender_id, lane))
+
+        future = asyncio.get_running_loop().create_future()
+        lane.push(campaign_id, (send_fn, future, weight))
+        return await future
+
+    async def _dispatch(self, sender_id, lane: _SenderLane):
+        while True:
+            lane.drop_cancelled()
+            if not lane.ready:
+                lane.wakeup.clear()
+                await lane.wakeup.wait()
+                continue
+
+            delay = lane.bucket.try_acquire(lane.next_weight())
+            if delay > 0:
+                await self.clock.sleep(delay)
+                continue
+
+            send_fn, future, weight = lane.pop_next()
+            lane.control.dispatched(self.clock.now(), weight)
+            task = asyncio.create_task(self._fire(send_fn, future))
+            self._firing.add(task)
+            task.add_done_callback(self._firing.discard)
+
+    async def _fire(self, send_fn, future: asyncio.Future):
+        try:
+            result = send_fn()
+            if asyncio.iscoroutine(result):
+                result = await result
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+            return
+        if not future.done():
+            future.set_result(result)
+
+    async def close(self):
+        """Stop all sender lanes; queued sends are cancelled"""
+        for lane in self._lanes.values():
+            if lane.task:
+                lane.task.cancel()
+            for queue in lane.queues.values():
+                for _, future, _ in queue:
+                    future.cancel()
+        tasks = [lane.task for lane in self._lanes.values() if lane.task] + list(self._firing)
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        self._lanes = {}
+
+
+send_scheduler = SendScheduler()
@@ -0,0 +1,60 @@
+import time
+import logging
+from app.config import SENDER_CONFIG_TTL
+from app.services.storage import storage, run_storage
+
+logger = logging.getLogger(__name__)
+
+
+class SenderConfigCache:
+    """
+    In-process TTL cache of email_configs rows keyed by user_email.
+
+    Routes that write a config row call invalidate() so this process picks up
+    the change immediately; other replicas see it once their TTL expires.
+    """
+
+    def __init__(self, ttl: float = SENDER_CONFIG_TTL, clock=time.monotonic):
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = {}   # user_email -> (config, expires_at)
+        self.misses = 0
+
+    def get(self, user_email: str):
+        entry = self._entries.get(user_email)
+        if entry and entry[1] > self.clock():
+            return entry[0]
+        return None
+
+    def put(self, config: dict):
+        if config and config.get("user_email"):
+            self._entries[config["user_email"]] = (config, self.clock() + self.ttl)
+
+    def invalidate(self, user_email: str = None):
+        """Forget one sender, or every sender when no email is given"""
+        if user_email is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(user_email, None)
+
+    def load(self, user_email: str):
+        """Cached row for `user_email`, reading storage on a miss"""
+        config = self.get(user_email)
+        if config is not None:
+            return config
+
+        self.misses += 1
+        config = storage.get_sender_by_email(user_email)
+        if config:
+            self.put(config)
+        return config
+
+    async def load_async(self, user_email: str):
+        """load() for async callers; a miss reads storage off the event loop"""
+        config = self.get(user_email)
+        if config is not None:
+            return config
+        return await run_storage(self.load, user_email)
+
+
+sender_config_cache = SenderConfigCache()
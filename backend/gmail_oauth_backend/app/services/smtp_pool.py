@@ -0,0 +1,146 @@
+import smtplib
+import ssl
+import threading
+import time
+import logging
+from contextlib import contextmanager
+from app.config import SMTP_POOL_MAX_IDLE, SMTP_POOL_IDLE_TIMEOUT, SMTP_POOL_MAX_MESSAGES, SMTP_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+# Errors about one message or recipient; the session itself is still usable
+_MESSAGE_LEVEL_ERRORS = (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError)
+
+
+class _Session:
+    def __init__(self, server: smtplib.SMTP):
+        self.server = server
+        self.last_used = time.monotonic()
+        self.messages = 0
+
+
+class SMTPSessionPool:
+    """
+    Authenticated SMTP sessions kept alive per (host, port, username, TLS mode).
+
+    A session is reset with RSET before reuse, which doubles as a liveness
+    check; dead, idle-expired or over-used sessions are closed and replaced.
+    Every release also closes sessions that sat idle past the timeout under
+    any key, so a sender that stopped sending does not hold its connection.
+    Sends run on worker threads, so the pool is guarded by a lock and each
+    session is used by one thread at a time.
+    """
+
+    def __init__(self, max_idle: int = SMTP_POOL_MAX_IDLE, idle_timeout: float = SMTP_POOL_IDLE_TIMEOUT,
+                 max_messages: int = SMTP_POOL_MAX_MESSAGES, timeout: float = SMTP_TIMEOUT):
+        self.max_idle = max_idle
+        self.idle_timeout = idle_timeout
+        self.max_messages = max_messages
+        self.timeout = timeout
+        self._idle = {}   # key -> list of idle _Session
+        self._lock = threading.Lock()
+        self.connects = 0
+
+    def _connect(self, host: str, port: int, username: str, password: str, use_tls: bool, use_ssl: bool) -> smtplib.SMTP:
+        if use_ssl:
+            logger.info(f"🔐 Connecting to SMTP SSL {host}:{port}")
+            server = smtplib.SMTP_SSL(host, port, context=ssl.create_default_context(), timeout=self.timeout)
+        else:
+            logger.info(f"📧 Connecting to SMTP {host}:{port}")
+            server = smtplib.SMTP(host, port, timeout=self.timeout)
+        try:
+            if use_tls and not use_ssl:
+                server.starttls(context=ssl.create_default_context())
+                logger.info("🔐 Started TLS encryption")
+            if username and password:
+                server.login(username, password)
+        except Exception:
+            self._close(server)
+            raise
+        self.connects += 1
+        return server
+
+    @staticmethod
+    def _close(server: smtplib.SMTP):
+        try:
+            server.quit()
+        except Exception:
+            try:
+                server.close()
+            except Exception:
+                pass
+
+    def _checkout(self, key):
+        """Pop a reusable idle session for `key`, closing stale ones on the way"""
+        while True:
+            with self._lock:
+                idle = self._idle.get(key)
+                if not idle:
+                    return None
+                session = idle.pop()
+
+            if time.monotonic() - session.last_used > self.idle_timeout:
+                self._close(session.server)
+                continue
+            try:
+                code, _ = session.server.rset()
+                if code == 250:
+                    return session
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._close(session.server)
+
+    def _checkin(self, key, session: _Session):
+        session.last_used = time.monotonic()
+        self._reap_expired(session.last_used)
+        if session.messages >= self.max_messages:
+            self._close(session.server)
+            return
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle:
+                idle.append(session)
+                return
+        self._close(session.server)
+
+    def _reap_expired(self, now: float):
+        """Close idle sessions past the idle timeout, for every key"""
+        expired = []
+        with self._lock:
+            for key in list(self._idle):
+                idle = self._idle[key]
+                expired += [s for s in idle if now - s.last_used > self.idle_timeout]
+                idle[:] = [s for s in idle if now - s.last_used <= self.idle_timeout]
+                if not idle:
+                    del self._idle[key]
+        for session in expired:
+            self._close(session.server)
+
+    @contextmanager
+    def session(self, host: str, port: int, username: str, password: str, use_tls: bool = False, use_ssl: bool = False):
+        """Borrow an authenticated session; it goes back to the pool unless the connection broke"""
+        key = (host, int(port), username, bool(use_tls), bool(use_ssl))
+        session = self._checkout(key) or _Session(self._connect(host, port, username, password, use_tls, use_ssl))
+        try:
+            yield session.server
+        except _MESSAGE_LEVEL_ERRORS:
+            session.messages += 1
+            self._checkin(key, session)
+            raise
+        except Exception:
+            # Unknown connection state: recycle rather than reuse
+            self._close(session.server)
+            raise
+        else:
+            session.messages += 1
+            self._checkin(key, session)
+
+    def close_all(self):
+        with self._lock:
+            sessions = [s for idle in self._idle.values() for s in idle]
+            self._idle = {}
+        for session in sessions:
+            self._close(session.server)
+
+
+smtp_pool = SMTPSessionPool()
@@ -0,0 +1,346 @@
+import json
+import sqlite3
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+from app.services.storage import (
+    Storage, DUE_CAMPAIGN_STATUSES, CAMPAIGN_COLUMNS, CAMPAIGN_SCHEDULE_COLUMNS,
+    CONTACT_COLUMNS, STEP_QUEUE_COLUMNS, SENDER_CONFIG_COLUMNS
+)
+
+# The columns of the Supabase schema the campaign engine reads and writes.
+# Unleased campaigns keep lease_expires_at NULL where Postgres uses -infinity.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS campaigns (
+    id TEXT PRIMARY KEY,
+    name TEXT,
+    status TEXT,
+    scheduled_at TEXT,
+    email_list_id TEXT,
+    sender_id TEXT,
+    content TEXT,
+    subject_line TEXT,
+    email_content TEXT,
+    sent_count INTEGER DEFAULT 0,
+    failed_count INTEGER DEFAULT 0,
+    delivered_count INTEGER DEFAULT 0,
+    bounce_count INTEGER DEFAULT 0,
+    pause_between_emails REAL DEFAULT 300,
+    completion_rate INTEGER,
+    total_steps INTEGER,
+    total_recipients INTEGER,
+    steps_enqueued_at TEXT,
+    completed_at TEXT,
+    sent_at TEXT,
+    updated_at TEXT,
+    claimed_by TEXT,
+    lease_expires_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_campaigns_due_keyset ON campaigns (id) WHERE status IN ('scheduled', 'running');
+CREATE INDEX IF NOT EXISTS idx_campaigns_sender_lease ON campaigns (sender_id, lease_expires_at);
+
+CREATE TABLE IF NOT EXISTS email_configs (
+    id TEXT PRIMARY KEY,
+    user_email TEXT UNIQUE,
+    provider TEXT,
+    refresh_token TEXT,
+    access_token TEXT,
+    token_expires_at TEXT,
+    from_name TEXT,
+    smtp_host TEXT,
+    smtp_port INTEGER,
+    use_tls INTEGER,
+    use_ssl INTEGER,
+    smtp_username TEXT,
+    smtp_password TEXT
+);
+
+CREATE TABLE IF NOT EXISTS email_contacts (
+    id TEXT PRIMARY KEY,
+    email_list_id TEXT,
+    email TEXT,
+    first_name TEXT,
+    last_name TEXT,
+    status TEXT DEFAULT 'active',
+    opt_in INTEGER DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS idx_email_contacts_list_keyset ON email_contacts (email_list_id, id);
+
+CREATE TABLE IF NOT EXISTS campaign_deliveries (
+    id TEXT PRIMARY KEY,
+    campaign_id TEXT NOT NULL,
+    step_index INTEGER NOT NULL,
+    contact_id TEXT NOT NULL,
+    contact_email TEXT,
+    sent_at TEXT,
+    UNIQUE (campaign_id, step_index, contact_id)
+);
+
+CREATE TABLE IF NOT EXISTS campaign_step_queue (
+    id TEXT PRIMARY KEY,
+    campaign_id TEXT NOT NULL,
+    contact_id TEXT NOT NULL,
+    step_index INTEGER NOT NULL,
+    due_at TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    processed_at TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    UNIQUE (campaign_id, contact_id, step_index)
+);
+CREATE INDEX IF NOT EXISTS idx_campaign_step_queue_due ON campaign_step_queue (campaign_id, status, due_at);
+
+CREATE TABLE IF NOT EXISTS campaign_dead_letters (
+    id TEXT PRIMARY KEY,
+    campaign_id TEXT NOT NULL,
+    step_index INTEGER NOT NULL,
+    contact_id TEXT NOT NULL,
+    contact_email TEXT,
+    sender_id TEXT,
+    failure TEXT NOT NULL,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT,
+    UNIQUE (campaign_id, step_index, contact_id)
+);
+"""
+
+TIMESTAMP_COLUMNS = {
+    "scheduled_at", "steps_enqueued_at", "completed_at", "sent_at", "updated_at",
+    "lease_expires_at", "token_expires_at", "due_at", "processed_at", "created_at",
+}
+
+
+def _timestamp(value):
+    """Fixed-width UTC ISO-8601, so timestamps compare correctly as text"""
+    if value is None or value == "-infinity":
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).isoformat(timespec="microseconds")
+
+
+def _column_value(column: str, value):
+    if column in TIMESTAMP_COLUMNS:
+        return _timestamp(value)
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    if isinstance(value, bool):
+        return int(value)
+    return value
+
+
+def _columns(spec: str) -> str:
+    return ", ".join(c.strip() for c in spec.split(","))
+
+
+def _placeholders(values) -> str:
+    return ", ".join("?" for _ in values)
+
+
+# Inlined rather than bound: SQLite only uses the partial idx_campaigns_due_keyset
+# when the query's status filter literally matches the index's WHERE clause
+_DUE_STATUSES_SQL = ", ".join(f"'{status}'" for status in DUE_CAMPAIGN_STATUSES)
+
+
+class SQLiteStorage(Storage):
+    """
+    Storage in a local SQLite file (or ":memory:"), for load tests, profiling
+    and benchmarks of the campaign engine without a Supabase project.
+
+    One connection is shared by every thread behind a lock; SQLite runs one
+    writer at a time, which also makes the lease statements atomic the way
+    the Postgres functions are. add_rows() seeds tables directly.
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+
+    def _query(self, sql: str, params=()) -> list:
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, params).fetchall()]
+
+    def _write(self, sql: str, params=()) -> int:
+        with self._lock, self._conn:
+            return self._conn.execute(sql, params).rowcount
+
+    def _insert(self, table: str, rows: list, on_conflict: str = "", update: bool = False):
+        rows = [row for row in rows if row]
+        if not rows:
+            return
+        columns = list(rows[0])
+        if "id" not in columns:
+            columns.append("id")
+        sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({_placeholders(columns)})"
+        if on_conflict:
+            assignments = ", ".join(f"{c} = excluded.{c}" for c in columns if c not in ("id", *on_conflict.split(",")))
+            sql += f" ON CONFLICT ({on_conflict}) DO " + (f"UPDATE SET {assignments}" if update else "NOTHING")
+        params = [
+            [_column_value(c, row.get(c)) if c != "id" or row.get("id") else str(uuid.uuid4()) for c in columns]
+            for row in rows
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany(sql, params)
+
+    def add_rows(self, table: str, rows: list):
+        """Insert seed rows as given"""
+        self._insert(table, rows)
+
+    def _update(self, table: str, values: dict, column: str, value) -> int:
+        if not values:
+            return 0
+        assignments = ", ".join(f"{c} = ?" for c in values)
+        params = [_column_value(c, v) for c, v in values.items()] + [value]
+        return self._write(f"UPDATE {table} SET {assignments} WHERE {column} = ?", params)
+
+    # --- campaigns --- #
+    def due_campaigns(self, now_iso, after_id=None, limit=100):
+        now = _timestamp(now_iso)
+        sql = f"""SELECT {_columns(CAMPAIGN_COLUMNS)} FROM campaigns
+                  WHERE status IN ({_DUE_STATUSES_SQL}) AND scheduled_at <= ?
+                    AND (lease_expires_at IS NULL OR lease_expires_at < ?)"""
+        params = [now, now]
+        if after_id is not None:
+            sql += " AND id > ?"
+            params.append(after_id)
+        return self._query(sql + " ORDER BY id LIMIT ?", params + [limit])
+
+    def upcoming_campaigns(self, horizon_iso, after_id=None, limit=100):
+        sql = f"""SELECT {_columns(CAMPAIGN_SCHEDULE_COLUMNS)} FROM campaigns
+                  WHERE status IN ({_DUE_STATUSES_SQL}) AND scheduled_at <= ?"""
+        params = [_timestamp(horizon_iso)]
+        if after_id is not None:
+            sql += " AND id > ?"
+            params.append(after_id)
+        return self._query(sql + " ORDER BY id LIMIT ?", params + [limit])
+
+    def campaign_schedules(self, campaign_ids):
+        campaign_ids = list(campaign_ids)
+        return self._query(
+            f"SELECT {_columns(CAMPAIGN_SCHEDULE_COLUMNS)} FROM campaigns WHERE id IN ({_placeholders(campaign_ids)})",
+            campaign_ids
+        )
+
+    def update_campaign(self, campaign_id, values):
+        self._update("campaigns", values, "id", campaign_id)
+
+    def claim_campaign(self, campaign_id, worker, lease_seconds):
+        now = datetime.now(timezone.utc)
+        claimed = self._write(f"""
+            UPDATE campaigns SET claimed_by = ?, lease_expires_at = ?
+             WHERE id = ?
+               AND status IN ({_placeholders(DUE_CAMPAIGN_STATUSES)})
+               AND (claimed_by IS NULL OR claimed_by = ? OR lease_expires_at < ?)
+               AND NOT EXISTS (
+                   SELECT 1 FROM campaigns o
+                    WHERE o.sender_id = campaigns.sender_id
+                      AND o.id <> campaigns.id
+                      AND o.claimed_by <> ?
+                      AND o.lease_expires_at >= ?
+               )""", [
+            worker, _timestamp(now + timedelta(seconds=lease_seconds)), campaign_id,
+            *DUE_CAMPAIGN_STATUSES, worker, _timestamp(now), worker, _timestamp(now)
+        ])
+        return claimed == 1
+
+    def renew_campaign_leases(self, worker, campaign_ids, lease_seconds):
+        campaign_ids = list(campaign_ids)
+        if not campaign_ids:
+            return []
+        until = _timestamp(datetime.now(timezone.utc) + timedelta(seconds=lease_seconds))
+        where = f"id IN ({_placeholders(campaign_ids)}) AND claimed_by = ?"
+        with self._lock, self._conn:
+            renewed = [row[0] for row in self._conn.execute(f"SELECT id FROM campaigns WHERE {where}", [*campaign_ids, worker])]
+            self._conn.execute(f"UPDATE campaigns SET lease_expires_at = ? WHERE {where}", [until, *campaign_ids, worker])
+        return renewed
+
+    def release_campaign_lease(self, campaign_id, worker):
+        self._write(
+            "UPDATE campaigns SET claimed_by = NULL, lease_expires_at = NULL WHERE id = ? AND claimed_by = ?",
+            [campaign_id, worker]
+        )
+
+    # --- email_configs --- #
+    def list_senders(self):
+        return self._query("SELECT * FROM email_configs")
+
+    def get_sender(self, sender_id):
+        rows = self._query("SELECT * FROM email_configs WHERE id = ?", [sender_id])
+        return rows[0] if rows else None
+
+    def get_sender_by_email(self, user_email):
+        rows = self._query(f"SELECT {_columns(SENDER_CONFIG_COLUMNS)} FROM email_configs WHERE user_email = ?", [user_email])
+        return rows[0] if rows else None
+
+    def update_sender(self, values, sender_id=None, user_email=None):
+        column, value = ("id", sender_id) if sender_id else ("user_email", user_email)
+        self._update("email_configs", values, column, value)
+
+    # --- email_contacts --- #
+    def contact_page(self, email_list_id, after_id=None, limit=200):
+        sql = f"""SELECT {_columns(CONTACT_COLUMNS)} FROM email_contacts
+                  WHERE email_list_id = ? AND status = 'active' AND opt_in = 1"""
+        params = [email_list_id]
+        if after_id is not None:
+            sql += " AND id > ?"
+            params.append(after_id)
+        return self._query(sql + " ORDER BY id LIMIT ?", params + [limit])
+
+    def active_contacts(self, contact_ids):
+        contact_ids = list(contact_ids)
+        return self._query(
+            f"""SELECT {_columns(CONTACT_COLUMNS)} FROM email_contacts
+                WHERE id IN ({_placeholders(contact_ids)}) AND status = 'active' AND opt_in = 1""",
+            contact_ids
+        )
+
+    # --- campaign_deliveries --- #
+    def delivered_contacts(self, campaign_id, step_index, contact_ids):
+        contact_ids = list(contact_ids)
+        rows = self._query(
+            f"""SELECT contact_id FROM campaign_deliveries
+                WHERE campaign_id = ? AND step_index = ? AND contact_id IN ({_placeholders(contact_ids)})""",
+            [campaign_id, step_index, *contact_ids]
+        )
+        return {row["contact_id"] for row in rows}
+
+    def record_deliveries(self, rows):
+        now = datetime.now(timezone.utc)
+        self._insert("campaign_deliveries", [{**row, "sent_at": row.get("sent_at") or now} for row in rows],
+                     on_conflict="campaign_id,step_index,contact_id")
+
+    # --- campaign_step_queue --- #
+    def enqueue_steps(self, rows):
+        self._insert("campaign_step_queue", rows, on_conflict="campaign_id,contact_id,step_index")
+
+    def due_steps(self, campaign_id, now_iso, limit):
+        return self._query(
+            f"""SELECT {_columns(STEP_QUEUE_COLUMNS)} FROM campaign_step_queue
+                WHERE campaign_id = ? AND status = 'pending' AND due_at <= ?
+                ORDER BY due_at LIMIT ?""",
+            [campaign_id, _timestamp(now_iso), limit]
+        )
+
+    def next_step_due_at(self, campaign_id):
+        rows = self._query(
+            "SELECT MIN(due_at) AS due_at FROM campaign_step_queue WHERE campaign_id = ? AND status = 'pending'",
+            [campaign_id]
+        )
+        return rows[0]["due_at"] if rows else None
+
+    def save_steps(self, rows):
+        self._insert("campaign_step_queue", rows, on_conflict="campaign_id,contact_id,step_index", update=True)
+
+    # --- campaign_dead_letters --- #
+    def record_dead_letters(self, rows):
+        now = datetime.now(timezone.utc)
+        self._insert("campaign_dead_letters", [{**row, "created_at": row.get("created_at") or now} for row in rows],
+                     on_conflict="campaign_id,step_index,contact_id", update=True)
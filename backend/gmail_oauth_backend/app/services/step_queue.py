@@ -0,0 +1,108 @@
+import logging
+from datetime import datetime, timedelta, timezone
+from app.config import CONTACT_BATCH_SIZE
+from app.services.storage import storage, run_storage
+
+logger = logging.getLogger(__name__)
+
+
+def step_delay(step) -> timedelta:
+    """How long after the previous step a step is due, from its delayDays"""
+    try:
+        days = float(step.get("delayDays") or 0) if isinstance(step, dict) else 0
+    except (TypeError, ValueError):
+        days = 0
+    return timedelta(days=max(0.0, days))
+
+
+def _iso(value) -> str:
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+class StepQueue:
+    """
+    Durable per-contact queue of campaign steps (see migrations/006_campaign_step_queue.sql).
+
+    Every step still owed to a contact is a pending entry with its due time.
+    The processor reads a campaign's due entries one batch at a time; outcomes
+    and the follow-up steps they unlock are buffered and written back in one
+    upsert per batch by flush(), which must happen before the next batch is
+    read. A single upsert marks an entry done and enqueues its successor, so
+    neither can be lost without the other. Entries sent again after a
+    throttle or a transient failure carry their attempt count and last error.
+    """
+
+    def __init__(self, batch_size: int = CONTACT_BATCH_SIZE):
+        self.batch_size = batch_size
+        self._pending = {}   # campaign_id -> {(contact_id, step_index): row}
+        self.writes = 0
+
+    @staticmethod
+    def _row(campaign_id, contact_id, step_index: int, due_at, status: str = "pending", processed_at=None,
+             attempts: int = 0, last_error: str = None) -> dict:
+        return {
+            "campaign_id": campaign_id,
+            "contact_id": contact_id,
+            "step_index": step_index,
+            "due_at": _iso(due_at),
+            "status": status,
+            "processed_at": _iso(processed_at),
+            "attempts": attempts,
+            "last_error": last_error,
+        }
+
+    def enqueue(self, campaign_id, contact_ids, step_index: int, due_at: datetime):
+        """Write pending entries right away; entries that already exist are left untouched"""
+        rows = [self._row(campaign_id, cid, step_index, due_at) for cid in contact_ids if cid is not None]
+        if not rows:
+            return
+        storage.enqueue_steps(rows)
+        self.writes += 1
+
+    def due(self, campaign_id, now: datetime) -> list:
+        """The campaign's earliest pending entries that are due at `now`"""
+        return storage.due_steps(campaign_id, now.isoformat(), self.batch_size)
+
+    def next_due_at(self, campaign_id):
+        """When the campaign's next pending entry is due, or None once the sequence is done"""
+        return storage.next_step_due_at(campaign_id)
+
+    def complete(self, entry: dict, status: str, next_step_index: int = None, next_due_at: datetime = None,
+                 error: str = None, attempts: int = None):
+        """Buffer an entry's outcome and, when given, the contact's next step"""
+        campaign_id, contact_id = entry["campaign_id"], entry["contact_id"]
+        buffered = self._pending.setdefault(campaign_id, {})
+        buffered[(contact_id, entry["step_index"])] = self._row(
+            campaign_id, contact_id, entry["step_index"], entry["due_at"],
+            status=status, processed_at=datetime.now(timezone.utc),
+            attempts=(entry.get("attempts") or 0) if attempts is None else attempts, last_error=error
+        )
+        if next_step_index is not None:
+            buffered[(contact_id, next_step_index)] = self._row(campaign_id, contact_id, next_step_index, next_due_at)
+
+    def requeue(self, entry: dict, due_at: datetime, attempts: int = None, error: str = None):
+        """
+        Buffer an entry back as pending with a later due time: after a throttle
+        (attempts unchanged) or a transient failure (attempts counted up)
+        """
+        campaign_id, contact_id = entry["campaign_id"], entry["contact_id"]
+        self._pending.setdefault(campaign_id, {})[(contact_id, entry["step_index"])] = self._row(
+            campaign_id, contact_id, entry["step_index"], due_at,
+            attempts=(entry.get("attempts") or 0) if attempts is None else attempts, last_error=error
+        )
+
+    async def flush(self, campaign_id):
+        """Write buffered outcomes and follow-ups for a campaign in one upsert. Raises on failure"""
+        rows = list(self._pending.get(campaign_id, {}).values())
+        if not rows:
+            return
+        await run_storage(storage.save_steps, rows)
+        self.writes += 1
+        self._pending.pop(campaign_id, None)
+
+    def discard(self, campaign_id):
+        """Drop unflushed entries; the batch is read again and re-checked against the ledger"""
+        self._pending.pop(campaign_id, None)
+
+
+step_queue = StepQueue()
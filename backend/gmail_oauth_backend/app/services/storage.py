@@ -0,0 +1,320 @@
+import asyncio
+import functools
+import logging
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from app.config import STORAGE_BACKEND, SQLITE_PATH, STORAGE_WORKERS
+from app.services.metrics import STORAGE_CALLS
+
+logger = logging.getLogger(__name__)
+
+DUE_CAMPAIGN_STATUSES = ["scheduled", "running"]
+CAMPAIGN_COLUMNS = "id, name, scheduled_at, status, email_list_id, sender_id, content, subject_line, email_content, sent_count, failed_count, delivered_count, bounce_count, pause_between_emails, steps_enqueued_at, total_recipients"
+CAMPAIGN_SCHEDULE_COLUMNS = "id, status, scheduled_at, claimed_by, lease_expires_at"
+CONTACT_COLUMNS = "id, email, first_name, last_name"
+STEP_QUEUE_COLUMNS = "campaign_id, contact_id, step_index, due_at, attempts"
+DELIVERY_CONFLICT_KEY = "campaign_id,step_index,contact_id"
+STEP_QUEUE_CONFLICT_KEY = "campaign_id,contact_id,step_index"
+DEAD_LETTER_CONFLICT_KEY = "campaign_id,step_index,contact_id"
+
+# Everything the send paths read from a sender row
+SENDER_CONFIG_COLUMNS = (
+    "id, user_email, provider, refresh_token, access_token, token_expires_at, from_name, "
+    "smtp_host, smtp_port, use_tls, use_ssl, smtp_username, smtp_password"
+)
+
+# The table behind each Storage method, for the storage_calls_total metric
+METHOD_TABLES = {
+    "due_campaigns": "campaigns",
+    "upcoming_campaigns": "campaigns",
+    "campaign_schedules": "campaigns",
+    "update_campaign": "campaigns",
+    "claim_campaign": "campaigns",
+    "renew_campaign_leases": "campaigns",
+    "release_campaign_lease": "campaigns",
+    "list_senders": "email_configs",
+    "get_sender": "email_configs",
+    "get_sender_by_email": "email_configs",
+    "update_sender": "email_configs",
+    "contact_page": "email_contacts",
+    "active_contacts": "email_contacts",
+    "delivered_contacts": "campaign_deliveries",
+    "record_deliveries": "campaign_deliveries",
+    "enqueue_steps": "campaign_step_queue",
+    "due_steps": "campaign_step_queue",
+    "next_step_due_at": "campaign_step_queue",
+    "save_steps": "campaign_step_queue",
+    "record_dead_letters": "campaign_dead_letters",
+}
+
+
+def _counted(method, table: str):
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        STORAGE_CALLS.inc(table=table, method=method.__name__)
+        return method(*args, **kwargs)
+    return wrapper
+
+
+class Storage(ABC):
+    """
+    Data access for the campaign engine: campaigns (and their leases),
+    email_configs, email_contacts, campaign_deliveries, campaign_step_queue
+    and campaign_dead_letters.
+
+    Methods are synchronous; async code calls them through run_storage() so
+    no round trip runs on the event loop thread. Timestamps are ISO-8601
+    strings in UTC. STORAGE_BACKEND picks the implementation:
+    "supabase" (default) or "sqlite" for fully local runs. Every backend's
+    methods are counted in storage_calls_total, one call per round trip.
+    """
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        for name, table in METHOD_TABLES.items():
+            if name in vars(cls):
+                setattr(cls, name, _counted(vars(cls)[name], table))
+
+    # --- campaigns --- #
+    @abstractmethod
+    def due_campaigns(self, now_iso: str, after_id=None, limit: int = 100) -> list:
+        """Due, unleased campaigns with id > after_id, ordered by id"""
+
+    @abstractmethod
+    def upcoming_campaigns(self, horizon_iso: str, after_id=None, limit: int = 100) -> list:
+        """Schedule columns of live campaigns due before `horizon_iso`, ordered by id"""
+
+    @abstractmethod
+    def campaign_schedules(self, campaign_ids) -> list:
+        """Schedule and lease columns of the given campaigns"""
+
+    @abstractmethod
+    def update_campaign(self, campaign_id, values: dict):
+        ...
+
+    @abstractmethod
+    def claim_campaign(self, campaign_id, worker: str, lease_seconds: int) -> bool:
+        """See claim_campaign() in migrations/005_campaign_leases.sql"""
+
+    @abstractmethod
+    def renew_campaign_leases(self, worker: str, campaign_ids: list, lease_seconds: int) -> list:
+        """Ids whose lease `worker` still held and has now extended"""
+
+    @abstractmethod
+    def release_campaign_lease(self, campaign_id, worker: str):
+        ...
+
+    # --- email_configs --- #
+    @abstractmethod
+    def list_senders(self) -> list:
+        ...
+
+    @abstractmethod
+    def get_sender(self, sender_id):
+        ...
+
+    @abstractmethod
+    def get_sender_by_email(self, user_email: str):
+        ...
+
+    @abstractmethod
+    def update_sender(self, values: dict, sender_id=None, user_email: str = None):
+        """Update one sender row, by id when given, otherwise by user_email"""
+
+    # --- email_contacts --- #
+    @abstractmethod
+    def contact_page(self, email_list_id, after_id=None, limit: int = 200) -> list:
+        """Active, opted-in contacts of a list with id > after_id, ordered by id"""
+
+    @abstractmethod
+    def active_contacts(self, contact_ids: list) -> list:
+        """The active, opted-in contacts among `contact_ids`"""
+
+    # --- campaign_deliveries --- #
+    @abstractmethod
+    def delivered_contacts(self, campaign_id, step_index: int, contact_ids: list) -> set:
+        ...
+
+    @abstractmethod
+    def record_deliveries(self, rows: list):
+        """Insert delivery rows, ignoring ones already recorded"""
+
+    # --- campaign_step_queue --- #
+    @abstractmethod
+    def enqueue_steps(self, rows: list):
+        """Insert queue entries, leaving existing ones untouched"""
+
+    @abstractmethod
+    def due_steps(self, campaign_id, now_iso: str, limit: int) -> list:
+        """The campaign's earliest pending entries due at `now_iso`"""
+
+    @abstractmethod
+    def next_step_due_at(self, campaign_id):
+        ...
+
+    @abstractmethod
+    def save_steps(self, rows: list):
+        """Insert or overwrite queue entries"""
+
+    # --- campaign_dead_letters --- #
+    @abstractmethod
+    def record_dead_letters(self, rows: list):
+        """Insert dead letters, overwriting an earlier one for the same step and contact"""
+
+
+class SupabaseStorage(Storage):
+    """Storage on the Supabase project, through the shared PostgREST client"""
+
+    def __init__(self, client=None):
+        if client is None:
+            from app.services.supabase_client import supabase as client
+        self.client = client
+
+    def due_campaigns(self, now_iso, after_id=None, limit=100):
+        query = self.client.table("campaigns").select(CAMPAIGN_COLUMNS)\
+            .in_("status", DUE_CAMPAIGN_STATUSES)\
+            .lte("scheduled_at", now_iso)\
+            .lt("lease_expires_at", now_iso)
+        if after_id is not None:
+            query = query.gt("id", after_id)
+        return query.order("id").limit(limit).execute().data or []
+
+    def upcoming_campaigns(self, horizon_iso, after_id=None, limit=100):
+        query = self.client.table("campaigns").select(CAMPAIGN_SCHEDULE_COLUMNS)\
+            .in_("status", DUE_CAMPAIGN_STATUSES)\
+            .lte("scheduled_at", horizon_iso)
+        if after_id is not None:
+            query = query.gt("id", after_id)
+        return query.order("id").limit(limit).execute().data or []
+
+    def campaign_schedules(self, campaign_ids):
+        return self.client.table("campaigns").select(CAMPAIGN_SCHEDULE_COLUMNS)\
+            .in_("id", list(campaign_ids)).execute().data or []
+
+    def update_campaign(self, campaign_id, values):
+        self.client.table("campaigns").update(values).eq("id", campaign_id).execute()
+
+    def claim_campaign(self, campaign_id, worker, lease_seconds):
+        return bool(self.client.rpc("claim_campaign", {
+            "p_campaign_id": campaign_id,
+            "p_worker": worker,
+            "p_lease_seconds": lease_seconds,
+        }).execute().data)
+
+    def renew_campaign_leases(self, worker, campaign_ids, lease_seconds):
+        return self.client.rpc("renew_campaign_leases", {
+            "p_worker": worker,
+            "p_campaign_ids": campaign_ids,
+            "p_lease_seconds": lease_seconds,
+        }).execute().data or []
+
+    def release_campaign_lease(self, campaign_id, worker):
+        self.client.rpc("release_campaign_lease", {
+            "p_campaign_id": campaign_id,
+            "p_worker": worker,
+        }).execute()
+
+    def list_senders(self):
+        response = self.client.table("email_configs").select("*").execute()
+        if getattr(response, "error", None):
+            raise RuntimeError(str(response.error))
+        return response.data
+
+    def get_sender(self, sender_id):
+        return self.client.table("email_configs").select("*").eq("id", sender_id).single().execute().data
+
+    def get_sender_by_email(self, user_email):
+        return self.client.table("email_configs").select(SENDER_CONFIG_COLUMNS)\
+            .eq("user_email", user_email).single().execute().data
+
+    def update_sender(self, values, sender_id=None, user_email=None):
+        column, value = ("id", sender_id) if sender_id else ("user_email", user_email)
+        self.client.table("email_configs").update(values).eq(column, value).execute()
+
+    def contact_page(self, email_list_id, after_id=None, limit=200):
+        query = self.client.table("email_contacts")\
+            .select(CONTACT_COLUMNS)\
+            .eq("email_list_id", email_list_id)\
+            .eq("status", "active")\
+            .eq("opt_in", True)
+        if after_id is not None:
+            query = query.gt("id", after_id)
+        return query.order("id").limit(limit).execute().data or []
+
+    def active_contacts(self, contact_ids):
+        return self.client.table("email_contacts")\
+            .select(CONTACT_COLUMNS)\
+            .in_("id", contact_ids)\
+            .eq("status", "active")\
+            .eq("opt_in", True)\
+            .execute().data or []
+
+    def delivered_contacts(self, campaign_id, step_index, contact_ids):
+        resp = self.client.table("campaign_deliveries")\
+            .select("contact_id")\
+            .eq("campaign_id", campaign_id)\
+            .eq("step_index", step_index)\
+            .in_("contact_id", contact_ids)\
+            .execute()
+        return {row.get("contact_id") for row in resp.data or []}
+
+    def record_deliveries(self, rows):
+        self.client.table("campaign_deliveries").upsert(
+            rows, on_conflict=DELIVERY_CONFLICT_KEY, ignore_duplicates=True
+        ).execute()
+
+    def enqueue_steps(self, rows):
+        self.client.table("campaign_step_queue").upsert(
+            rows, on_conflict=STEP_QUEUE_CONFLICT_KEY, ignore_duplicates=True
+        ).execute()
+
+    def due_steps(self, campaign_id, now_iso, limit):
+        return self.client.table("campaign_step_queue")\
+            .select(STEP_QUEUE_COLUMNS)\
+            .eq("campaign_id", campaign_id)\
+            .eq("status", "pending")\
+            .lte("due_at", now_iso)\
+            .order("due_at")\
+            .limit(limit)\
+            .execute().data or []
+
+    def next_step_due_at(self, campaign_id):
+        rows = self.client.table("campaign_step_queue")\
+            .select("due_at")\
+            .eq("campaign_id", campaign_id)\
+            .eq("status", "pending")\
+            .order("due_at")\
+            .limit(1)\
+            .execute().data or []
+        return rows[0].get("due_at") if rows else None
+
+    def save_steps(self, rows):
+        self.client.table("campaign_step_queue").upsert(rows, on_conflict=STEP_QUEUE_CONFLICT_KEY).execute()
+
+    def record_dead_letters(self, rows):
+        self.client.table("campaign_dead_letters").upsert(rows, on_conflict=DEAD_LETTER_CONFLICT_KEY).execute()
+
+
+def create_storage(backend: str = STORAGE_BACKEND) -> Storage:
+    if backend == "sqlite":
+        from app.services.sqlite_storage import SQLiteStorage
+        logger.info(f"🗄️ Using local SQLite storage at {SQLITE_PATH}")
+        return SQLiteStorage(SQLITE_PATH)
+    if backend != "supabase":
+        raise ValueError(f"Unknown STORAGE_BACKEND: {backend}")
+    return SupabaseStorage()
+
+
+storage = create_storage()
+
+# Storage calls block on a database round trip. Async callers run them here:
+# bounded, so a burst of campaigns queues for a free worker instead of taking
+# over the loop's default executor (which also serves DNS lookups), and every
+# worker shares the one Supabase client and its keep-alive connection pool.
+_storage_executor = ThreadPoolExecutor(max_workers=STORAGE_WORKERS, thread_name_prefix="storage")
+
+
+async def run_storage(fn, *args, **kwargs):
+    """Await a blocking storage call (a Storage method, or a helper making them) on the storage executor"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_storage_executor, functools.partial(fn, *args, **kwargs))
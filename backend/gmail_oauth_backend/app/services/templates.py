@@ -0,0 +1,64 @@
+import re
+from functools import lru_cache
+
+# {{field}} or {{field|default}} — the campaign editor's placeholder syntax
+DOUBLE_BRACE = re.compile(r"\{\{\s*([\w.-]+)\s*(?:\|([^}]*))?\}\}")
+# {field} — the older personalize_email syntax (no defaults)
+SINGLE_BRACE = re.compile(r"(?<!\{)\{(\w+)\}(?!\})")
+
+
+class CompiledTemplate:
+    """
+    A template parsed once into literal and field segments.
+
+    Rendering is a single pass over the segments and one join, instead of a
+    full-string replace per contact key. Fields missing from the values keep
+    their original placeholder text unless the placeholder has a default.
+    """
+
+    __slots__ = ("source", "fields", "_literals", "_slots")
+
+    def __init__(self, source: str, pattern=DOUBLE_BRACE):
+        self.source = source or ""
+        self._literals = []
+        self._slots = []    # (field, default, raw placeholder)
+
+        has_defaults = pattern.groups > 1
+        position = 0
+        for match in pattern.finditer(self.source):
+            self._literals.append(self.source[position:match.start()])
+            default = match.group(2) if has_defaults else None
+            self._slots.append((match.group(1), default, match.group(0)))
+            position = match.end()
+        self._literals.append(self.source[position:])
+
+        self.fields = frozenset(field for field, _, _ in self._slots)
+
+    @property
+    def is_static(self) -> bool:
+        """True when rendering can never change the text"""
+        return not self._slots
+
+    def render(self, values: dict) -> str:
+        if not self._slots:
+            return self.source
+
+        parts = [self._literals[0]]
+        for (field, default, raw), literal in zip(self._slots, self._literals[1:]):
+            if field in values:
+                text = str(values[field] or "")
+                if not text and default is not None:
+                    text = default
+            elif default is not None:
+                text = default
+            else:
+                text = raw
+            parts.append(text)
+            parts.append(literal)
+        return "".join(parts)
+
+
+@lru_cache(maxsize=256)
+def compile_template(source: str, pattern=DOUBLE_BRACE) -> CompiledTemplate:
+    """Parse a template once; repeated calls with the same text reuse the result"""
+    return CompiledTemplate(source, pattern)
@@ -0,0 +1,172 @@
+import asyncio
+import threading
+import time
+import logging
+from datetime import datetime, timezone
+from app.config import TOKEN_REFRESH_MARGIN
+from app.services.storage import storage, run_storage
+from app.services.metrics import TOKEN_REFRESH_LATENCY
+
+logger = logging.getLogger(__name__)
+
+
+def parse_timestamp(value) -> float:
+    """Supabase timestamp (ISO string, naive means UTC) -> epoch seconds; 0 if unknown"""
+    if not value:
+        return 0.0
+    try:
+        expires_dt = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return 0.0
+    if expires_dt.tzinfo is None:
+        expires_dt = expires_dt.replace(tzinfo=timezone.utc)
+    return expires_dt.timestamp()
+
+
+class OAuthTokenManager:
+    """
+    Access-token cache for OAuth senders, keyed by email_configs id.
+
+    Tokens are reused until `refresh_margin` seconds before they expire.
+    Concurrent sends for the same sender share one in-flight refresh
+    (single-flight), and every refreshed token is written back to
+    email_configs alongside token_expires_at, like the OAuth callbacks do.
+    A token the provider rejected is not handed out again, even while the
+    sender row still carries it with an expiry that looks fresh, until a
+    refresh replaces it in the row.
+    """
+
+    def __init__(self, refresh_margin: float = TOKEN_REFRESH_MARGIN, clock=time.time):
+        self.refresh_margin = refresh_margin
+        self.clock = clock
+        self._tokens = {}     # sender key -> (access_token, expires_at epoch)
+        self._refreshing = {}  # sender key -> asyncio.Task
+        self._rejected = {}    # sender key -> access tokens the provider answered 401 to
+        self._sync_locks = {}  # sender key -> threading.Lock for sync refreshes
+        self._sync_locks_guard = threading.Lock()
+        self.refreshes = 0
+
+    @staticmethod
+    def _key(sender: dict):
+        return sender.get("id") or sender.get("user_email")
+
+    def _fresh(self, expires_at: float) -> bool:
+        return expires_at - self.refresh_margin > self.clock()
+
+    def _usable_token(self, key, sender: dict):
+        """The cached or stored token if it is still good, else None"""
+        cached = self._tokens.get(key)
+        if cached and self._fresh(cached[1]):
+            return cached[0]
+
+        # A token the callback (or another replica) stored may still be good
+        stored_token = sender.get("access_token")
+        stored_expiry = parse_timestamp(sender.get("token_expires_at"))
+        if stored_token and stored_token not in self._rejected.get(key, ()) and self._fresh(stored_expiry):
+            self._tokens[key] = (stored_token, stored_expiry)
+            return stored_token
+        return None
+
+    async def get_access_token(self, sender: dict) -> str:
+        """Return a valid access token for an OAuth sender row, refreshing if needed"""
+        key = self._key(sender)
+        access_token = self._usable_token(key, sender)
+        if access_token:
+            return access_token
+
+        task = self._refreshing.get(key)
+        if task is None:
+            task = asyncio.create_task(self._refresh(key, sender))
+            self._refreshing[key] = task
+            task.add_done_callback(lambda _, k=key: self._refreshing.pop(k, None))
+        # shield: one caller being cancelled must not abort the shared refresh
+        return await asyncio.shield(task)
+
+    def get_access_token_sync(self, sender: dict) -> str:
+        """Blocking variant of get_access_token for the sync send route; shares the same cache"""
+        key = self._key(sender)
+        access_token = self._usable_token(key, sender)
+        if access_token:
+            return access_token
+
+        with self._sync_lock(key):
+            # Another request thread may have refreshed while we waited
+            access_token = self._usable_token(key, sender)
+            if access_token:
+                return access_token
+            return self._refresh_sync(key, sender)
+
+    def _sync_lock(self, key) -> threading.Lock:
+        """Lock serializing sync refreshes of one sender; other senders refresh in parallel"""
+        with self._sync_locks_guard:
+            return self._sync_locks.setdefault(key, threading.Lock())
+
+    def invalidate(self, sender: dict):
+        """
+        Drop a token the provider answered 401 to. It is remembered as rejected
+        so the copy in the (possibly cached) sender row is not reused either,
+        and the next get_access_token refreshes.
+        """
+        key = self._key(sender)
+        cached = self._tokens.pop(key, None)
+        rejected = cached[0] if cached else sender.get("access_token")
+        if rejected:
+            self._rejected.setdefault(key, set()).add(rejected)
+
+    @staticmethod
+    def _provider(sender: dict) -> str:
+        provider = sender.get("provider")
+        if provider not in ("gmail_oauth", "microsoft_oauth"):
+            raise ValueError(f"Provider {provider} does not use OAuth tokens")
+        return provider
+
+    async def _refresh(self, key, sender: dict) -> str:
+        # Import here to avoid circular imports
+        from app.routes.gmail_send import refresh_gmail_token_async, refresh_outlook_token_async
+
+        provider = self._provider(sender)
+        refresh = refresh_gmail_token_async if provider == "gmail_oauth" else refresh_outlook_token_async
+        with TOKEN_REFRESH_LATENCY.time(provider=provider):
+            token_data = await refresh(sender.get("refresh_token"))
+
+        access_token, expires_at = self._remember(key, sender, token_data)
+        await run_storage(self._store, sender, access_token, expires_at)
+        return access_token
+
+    def _refresh_sync(self, key, sender: dict) -> str:
+        from app.routes.gmail_send import refresh_gmail_token, refresh_outlook_token
+
+        provider = self._provider(sender)
+        refresh = refresh_gmail_token if provider == "gmail_oauth" else refresh_outlook_token
+        with TOKEN_REFRESH_LATENCY.time(provider=provider):
+            token_data = refresh(sender.get("refresh_token"))
+
+        access_token, expires_at = self._remember(key, sender, token_data)
+        self._store(sender, access_token, expires_at)
+        return access_token
+
+    def _remember(self, key, sender: dict, token_data: dict) -> tuple:
+        """Cache a token response; returns (access_token, expires_at)"""
+        access_token = token_data.get("access_token")
+        expires_at = self.clock() + float(token_data.get("expires_in", 3600))
+        self._tokens[key] = (access_token, expires_at)
+        # The fresh token is written over the rejected ones in the sender row
+        self._rejected.pop(key, None)
+        self.refreshes += 1
+        logger.info(f"🔑 Refreshed {sender.get('provider')} access token for {sender.get('user_email')}")
+        return access_token, expires_at
+
+    def _store(self, sender: dict, access_token: str, expires_at: float):
+        """Persist the fresh token where the OAuth callbacks keep it"""
+        update = {
+            "access_token": access_token,
+            "token_expires_at": datetime.fromtimestamp(expires_at, timezone.utc).replace(microsecond=0).isoformat(),
+        }
+        try:
+            storage.update_sender(update, sender.get("id"), sender.get("user_email"))
+        except Exception as e:
+            # The cached token is still valid; only the write-back failed
+            logger.warning(f"⚠️ Could not store refreshed token for {sender.get('user_email')}: {e}")
+
+
+token_manager = OAuthTokenManager()
@@ -0,0 +1,91 @@
+"""
+Benchmark: adaptive pacing against a provider rate limit.
+
+Runs the campaign engine on a throwaway SQLite store against the Graph
+stand-in with a mailbox limit of RATE_LIMIT emails/s (429 + Retry-After
+beyond it). The campaign has no pacing of its own (pause 0) and sends one
+sendMail per email, so it starts far above the limit. Throttled emails go
+back to the step queue and the sender's AIMD controller settles near the
+limit. Reports delivered and failed emails, the 429s seen and the achieved
+rate. Before adaptive pacing every one of those 429s was a failed email.
+
+Run from backend/gmail_oauth_backend:
+    python -m benchmarks.adaptive_pacing
+"""
+import os
+import tempfile
+
+_db_dir = tempfile.TemporaryDirectory()
+os.environ["STORAGE_BACKEND"] = "sqlite"
+os.environ["SQLITE_PATH"] = os.path.join(_db_dir.name, "campaign_engine.db")
+os.environ["SEND_BURST"] = "1"
+
+import asyncio  # noqa: E402
+import json  # noqa: E402
+import logging  # noqa: E402
+import time  # noqa: E402
+from datetime import datetime, timezone  # noqa: E402
+
+from benchmarks import stubs  # noqa: E402
+from benchmarks.seed_data import seed_sqlite_campaign, sender_row  # noqa: E402
+
+from app.routes import gmail_send  # noqa: E402
+from app.services import email_campaign_processor as processor, http_client  # noqa: E402
+from app.services.storage import storage  # noqa: E402
+
+CONTACTS = 3_000
+RATE_LIMIT = 200   # emails/s the stand-in mailbox accepts
+
+
+def seed():
+    seed_sqlite_campaign(storage, CONTACTS, sender=sender_row(provider="microsoft_oauth"))
+
+
+def campaign_row() -> dict:
+    return storage._query("SELECT status, scheduled_at, sent_count, failed_count FROM campaigns WHERE id = 'campaign-1'")[0]
+
+
+async def main():
+    logging.disable(logging.WARNING)
+    stubs.GraphStub.rate_limit = RATE_LIMIT
+    stubs.GraphStub.reset()
+    server, base = stubs.serve_http(stubs.GraphStub)
+    stubs.point_microsoft_at(gmail_send, base)
+    seed()
+
+    start = time.perf_counter()
+    passes = 0
+    while True:
+        passes += 1
+        await processor.process_campaigns(wait=True)
+        row = campaign_row()
+        if row["status"] != "running":
+            break
+        # Requeued emails are due once the sender may send again
+        due_in = (datetime.fromisoformat(row["scheduled_at"]) - datetime.now(timezone.utc)).total_seconds()
+        await asyncio.sleep(max(0.0, due_in))
+    elapsed = time.perf_counter() - start
+
+    await processor.shutdown_campaigns()
+    await http_client.close_http_clients()
+    server.shutdown()
+
+    row = campaign_row()
+    delivered = sum(stubs.GraphStub.accepted.values())
+    print(json.dumps({
+        "contacts": CONTACTS,
+        "rate_limit_per_sec": RATE_LIMIT,
+        "campaign_status": row["status"],
+        "delivered": delivered,
+        "duplicates": sum(n - 1 for n in stubs.GraphStub.accepted.values() if n > 1),
+        "failed": row["failed_count"] or 0,
+        "throttled_429s": stubs.GraphStub.rate_limited,
+        "processor_passes": passes,
+        "seconds": round(elapsed, 2),
+        "achieved_per_sec": round(delivered / elapsed, 1),
+        "ideal_seconds": round(CONTACTS / RATE_LIMIT, 2),
+    }))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,176 @@
+"""
+Benchmark: several campaign-processor workers sharing one database.
+
+Each worker is its own copy of the processor module (its own in-flight map,
+concurrency slots and CampaignLeases), all running on one event loop against
+the in-memory Supabase stand-in, whose lease RPCs mirror
+migrations/005_campaign_leases.sql.
+
+  spread    4 workers with one campaign slot each, 12 campaigns on 4
+            senders. Every recipient must be sent exactly once; the claims
+            show how campaigns and senders spread over the workers.
+  takeover  one worker loses its database connection mid-campaign. It must
+            stop sending before its lease expires, and another worker must
+            take the campaign over once the lease has expired, without double
+            sends.
+
+Run from backend/gmail_oauth_backend:
+    python -m benchmarks.campaign_leases
+"""
+import asyncio
+import importlib.util
+import json
+import time
+from collections import Counter
+
+from benchmarks.campaign_runner import fake, sent
+
+from app.services import email_campaign_processor  # noqa: E402
+from app.services.campaign_leases import CampaignLeases  # noqa: E402
+
+TICK = 0.05
+
+
+class WorkerLeases(CampaignLeases):
+    """CampaignLeases that records its claims and can be cut off from the database"""
+
+    def __init__(self, worker_id, lease_seconds):
+        super().__init__(worker_id, lease_seconds)
+        self.claims = []
+        self.partitioned = False
+
+    def _call(self, fn, **params):
+        if self.partitioned:
+            raise ConnectionError("database unreachable")
+        result = super()._call(fn, **params)
+        if fn == "claim_campaign" and result:
+            self.claims.append((params["campaign_id"], time.perf_counter()))
+        return result
+
+
+def load_worker(worker_id: str, slots: int, lease_seconds: int):
+    spec = importlib.util.spec_from_file_location(f"worker_{worker_id}", email_campaign_processor.__file__)
+    worker = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(worker)
+    worker.CAMPAIGN_CONCURRENCY = slots
+    worker.campaign_leases = WorkerLeases(worker_id, lease_seconds)
+    return worker
+
+
+def seed(campaigns: int, senders: int, contacts: int, pause: float):
+    fake.tables["campaigns"] = [{
+        "id": f"campaign-{c:02d}",
+        "name": f"Campaign {c}",
+        "status": "scheduled",
+        "scheduled_at": "2020-01-01T00:00:00+00:00",
+        "email_list_id": f"list-{c:02d}",
+        "sender_id": f"sender-{c % senders}",
+        "pause_between_emails": pause,
+        "sent_count": 0,
+        "subject_line": "Hello {{first_name}}",
+        "email_content": "Hi {{first_name}}",
+    } for c in range(campaigns)]
+    fake.tables["email_configs"] = [
+        {"id": f"sender-{s}", "user_email": f"sender{s}@example.com", "provider": "smtp"} for s in range(senders)
+    ]
+    fake.tables["email_contacts"] = [{
+        "id": f"{c:02d}-{i:06d}",
+        "email": f"c{c:02d}-user{i}@example.com",
+        "first_name": f"User{i}",
+        "email_list_id": f"list-{c:02d}",
+        "status": "active",
+        "opt_in": True,
+    } for c in range(campaigns) for i in range(contacts)]
+    fake.tables["campaign_deliveries"] = []
+    fake.tables["campaign_step_queue"] = []
+    sent.clear()
+
+
+def _all_done() -> bool:
+    return all(c["status"] not in ("scheduled", "running") for c in fake.tables["campaigns"])
+
+
+async def run_workers(workers, deadline: float, on_tick=None):
+    async def loop(worker):
+        while not _all_done() and time.perf_counter() < deadline:
+            await worker.process_campaigns()
+            await asyncio.sleep(TICK)
+
+    tasks = [asyncio.create_task(loop(w)) for w in workers]
+    while not _all_done() and time.perf_counter() < deadline:
+        if on_tick:
+            on_tick()
+        await asyncio.sleep(TICK / 2)
+    await asyncio.gather(*tasks)
+    for worker in workers:
+        await worker.shutdown_campaigns()
+
+
+def _duplicates() -> int:
+    return sum(n - 1 for n in Counter(sent).values())
+
+
+async def spread():
+    campaigns, contacts = 12, 40
+    seed(campaigns, senders=4, contacts=contacts, pause=0.002)
+    workers = [load_worker(f"w{i}", slots=1, lease_seconds=3) for i in range(4)]
+
+    start = time.perf_counter()
+    await run_workers(workers, deadline=start + 60)
+    elapsed = time.perf_counter() - start
+
+    sender_of = {c["id"]: c["sender_id"] for c in fake.tables["campaigns"]}
+    return {
+        "scenario": "spread",
+        "workers": len(workers),
+        "campaigns": campaigns,
+        "emails_expected": campaigns * contacts,
+        "emails_sent": len(sent),
+        "duplicate_sends": _duplicates(),
+        "campaigns_per_worker": {w.campaign_leases.worker_id: len(w.campaign_leases.claims) for w in workers},
+        "senders_per_worker": {
+            w.campaign_leases.worker_id: sorted({sender_of[cid] for cid, _ in w.campaign_leases.claims})
+            for w in workers
+        },
+        "seconds": round(elapsed, 3),
+    }
+
+
+async def takeover():
+    contacts, lease = 150, 1
+    seed(1, senders=1, contacts=contacts, pause=0.01)
+    first = load_worker("first", slots=1, lease_seconds=lease)
+    standby = load_worker("standby", slots=1, lease_seconds=lease)
+    partitioned_at = {}
+
+    def partition_first_worker():
+        # Cut the first worker off once it is well into the campaign
+        if not partitioned_at and len(sent) >= 30:
+            first.campaign_leases.partitioned = True
+            partitioned_at["time"] = time.perf_counter()
+            partitioned_at["sent"] = len(sent)
+
+    # `first` ticks first and claims; `standby` only sees the campaign once the lease expires
+    await run_workers([first, standby], deadline=time.perf_counter() + 30, on_tick=partition_first_worker)
+
+    standby_claims = [t for _, t in standby.campaign_leases.claims]
+    campaign = fake.tables["campaigns"][0]
+    return {
+        "scenario": "takeover",
+        "lease_seconds": lease,
+        "emails_expected": contacts,
+        "emails_sent": len(sent),
+        "duplicate_sends": _duplicates(),
+        "sent_before_partition": partitioned_at.get("sent"),
+        "takeover_after_s": round(standby_claims[0] - partitioned_at["time"], 3) if standby_claims else None,
+        "status": campaign["status"],
+    }
+
+
+async def main():
+    print(json.dumps(await spread()))
+    print(json.dumps(await takeover()))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
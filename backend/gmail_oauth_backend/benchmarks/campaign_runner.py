@@ -0,0 +1,24 @@
+"""
+Shared setup for benchmarks that run the real campaign processor against the
+in-memory Supabase stand-in with a no-op email transport.
+"""
+import os
+
+os.environ["STORAGE_BACKEND"] = "supabase"  # SupabaseStorage over the stand-in below
+
+from benchmarks import fake_supabase
+from benchmarks.fake_transport import sent, transport as _transport  # noqa: F401
+from benchmarks.seed_data import campaign_row, contact_rows, sender_row
+
+fake = fake_supabase.install()
+
+
+def seed_campaign(contacts: int, campaign_id: str = "campaign-1", steps: int = 1, pause: float = 0):
+    """One due campaign on one SMTP sender with `contacts` opted-in contacts"""
+    fake.tables["campaigns"] = [campaign_row(campaign_id, steps=steps, pause=pause)]
+    fake.tables["email_configs"] = [sender_row()]
+    fake.tables["email_contacts"] = contact_rows(0, contacts)
+    fake.tables["campaign_deliveries"] = []
+    fake.tables["campaign_step_queue"] = []
+    sent.clear()
+    fake.reset_counters()
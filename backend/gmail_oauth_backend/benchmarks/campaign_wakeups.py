@@ -0,0 +1,115 @@
+"""
+Benchmark: campaign start delay and idle database traffic, fixed-interval
+polling vs scheduled_at wakeups.
+
+Campaigns are created with scheduled_at a few seconds ahead (and announced
+through notify(), as the notify endpoint does). Start delay is the time from
+scheduled_at to the campaign's first send. The poll interval is scaled down
+from production's 60s to POLL_INTERVAL so the run stays short; the polling
+delay scales with it. The idle phase counts campaigns-table requests while
+nothing is due.
+
+Run from backend/gmail_oauth_backend:
+    python -m benchmarks.campaign_wakeups
+"""
+import asyncio
+import json
+import random
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+
+from benchmarks import campaign_runner
+from benchmarks.campaign_runner import fake
+
+from app.services import email_campaign_processor as processor  # noqa: E402
+from app.services.campaign_wakeups import CampaignWakeups  # noqa: E402
+
+POLL_INTERVAL = 2.0
+CAMPAIGNS = 8
+IDLE_SECONDS = 6.0
+
+first_send = {}
+
+
+async def _timed_send(from_email, to_email, subject, body, **_):
+    first_send.setdefault(to_email.split("-")[0], time.time())
+    return {"success": True}
+
+
+campaign_runner._transport.send_email_via_config_async = _timed_send
+
+
+def seed(rng: random.Random) -> dict:
+    """CAMPAIGNS campaigns due 0.5-4.5s from now, one contact each; returns scheduled epochs"""
+    now = datetime.now(timezone.utc)
+    scheduled = {f"c{i}": now + timedelta(seconds=rng.uniform(0.5, 4.5)) for i in range(CAMPAIGNS)}
+    fake.tables["campaigns"] = [{
+        "id": cid, "name": cid, "status": "scheduled", "scheduled_at": at.isoformat(),
+        "email_list_id": f"list-{cid}", "sender_id": f"sender-{cid}", "pause_between_emails": 0,
+        "sent_count": 0, "subject_line": "Hi", "email_content": "Hi",
+    } for cid, at in scheduled.items()]
+    fake.tables["email_configs"] = [
+        {"id": f"sender-{cid}", "user_email": f"{cid}@example.com", "provider": "smtp"} for cid in scheduled
+    ]
+    fake.tables["email_contacts"] = [{
+        "id": f"{cid}-1", "email": f"{cid}-user@example.com", "email_list_id": f"list-{cid}",
+        "status": "active", "opt_in": True,
+    } for cid in scheduled]
+    fake.tables["campaign_deliveries"] = []
+    fake.tables["campaign_step_queue"] = []
+    first_send.clear()
+    return {cid: at.timestamp() for cid, at in scheduled.items()}
+
+
+async def polling():
+    while True:
+        await processor.process_campaigns()
+        await asyncio.sleep(POLL_INTERVAL)
+
+
+async def run(label: str, make_loop, rng: random.Random) -> dict:
+    fake.tables["campaigns"] = []
+    fake.reset_counters()
+    loop, wakeups = make_loop()
+    task = asyncio.create_task(loop)
+    await asyncio.sleep(IDLE_SECONDS)
+    idle_requests = fake.requests["campaigns"]
+
+    scheduled = seed(rng)
+    if wakeups:
+        for campaign in fake.tables["campaigns"]:
+            wakeups.notify(campaign["id"], campaign["scheduled_at"], campaign["status"])
+
+    deadline = max(scheduled.values()) + POLL_INTERVAL + 2
+    while len(first_send) < CAMPAIGNS and time.time() < deadline:
+        await asyncio.sleep(0.05)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    await processor.shutdown_campaigns()
+
+    delays = [first_send[cid] - at for cid, at in scheduled.items() if cid in first_send]
+    return {
+        "path": label,
+        "campaigns_started": len(delays),
+        "start_delay_mean_ms": round(statistics.mean(delays) * 1000, 1),
+        "start_delay_max_ms": round(max(delays) * 1000, 1),
+        "idle_campaign_queries": idle_requests,
+        "idle_seconds": IDLE_SECONDS,
+    }
+
+
+async def main():
+    def make_polling():
+        return polling(), None
+
+    def make_wakeups():
+        wakeups = CampaignWakeups(reconcile_interval=600)
+        return wakeups.run(processor.process_campaigns), wakeups
+
+    print(json.dumps(await run(f"poll_every_{POLL_INTERVAL:g}s", make_polling, random.Random(7))))
+    print(json.dumps(await run("scheduled_at_wakeups", make_wakeups, random.Random(7))))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,68 @@
+"""
+Benchmark: peak Python heap while walking a large contact list.
+
+Compares loading the whole list in one response (the old behaviour) with
+iter_contact_pages, which streams keyset-paginated pages and prefetches the
+next one. Peak growth is measured with tracemalloc on top of the stand-in's
+own table, so only the memory the processor holds is counted; the stand-in's
+in-memory filtering still adds a small per-request overhead.
+
+Run from backend/gmail_oauth_backend:
+    python -m benchmarks.contact_memory
+"""
+import asyncio
+import json
+import tracemalloc
+
+from benchmarks.campaign_runner import fake, seed_campaign
+
+from app.services import email_campaign_processor as processor  # noqa: E402
+from app.services.storage import CONTACT_COLUMNS  # noqa: E402
+
+LIST_SIZES = [5_000, 20_000]
+PAGE_SIZE = 200
+
+
+def load_all():
+    return fake.table("email_contacts")\
+        .select(CONTACT_COLUMNS)\
+        .eq("email_list_id", "list-1")\
+        .eq("status", "active")\
+        .eq("opt_in", True)\
+        .execute().data
+
+
+async def stream_all():
+    seen = 0
+    async for page in processor.iter_contact_pages("list-1", page_size=PAGE_SIZE):
+        seen += len(page)
+    return seen
+
+
+def peak_kib(fn):
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    baseline = tracemalloc.get_traced_memory()[0]
+    result = fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, round((peak - baseline) / 1024)
+
+
+def main():
+    for size in LIST_SIZES:
+        seed_campaign(size)
+        loaded, legacy_kib = peak_kib(lambda: len(load_all()))
+        streamed, stream_kib = peak_kib(lambda: asyncio.run(stream_all()))
+        print(json.dumps({
+            "contacts": size,
+            "page_size": PAGE_SIZE,
+            "load_all_peak_kib": legacy_kib,
+            "streamed_peak_kib": stream_kib,
+            "contacts_loaded": loaded,
+            "contacts_streamed": streamed,
+        }))
+
+
+if __name__ == "__main__":
+    main()
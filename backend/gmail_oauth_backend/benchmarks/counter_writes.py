@@ -0,0 +1,37 @@
+"""
+Benchmark: campaigns-table writes per 1,000 emails.
+
+Runs one campaign of 1,000 contacts through process_campaigns with pacing
+disabled and counts UPDATEs against `campaigns`. Before write-behind
+counters this was one write per sent email plus the status updates.
+
+Run from backend/gmail_oauth_backend:
+    python -m benchmarks.counter_writes
+"""
+import asyncio
+import json
+import logging
+
+from benchmarks.campaign_runner import fake, seed_campaign, sent
+
+from app.services import email_campaign_processor as processor  # noqa: E402
+
+EMAILS = 1_000
+
+
+async def main():
+    logging.disable(logging.INFO)
+    seed_campaign(EMAILS)
+    await processor.process_campaigns(wait=True)
+    await processor.shutdown_campaigns()
+    print(json.dumps({
+        "emails_sent": len(sent),
+        "campaign_writes": fake.writes["campaigns"],
+        "counter_flushes": processor.campaign_counters.writes,
+        "flush_every": processor.campaign_counters.flush_every,
+        "writes_per_1000_emails": round(fake.writes["campaigns"] * 1000 / max(1, len(sent)), 1),
+    }))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
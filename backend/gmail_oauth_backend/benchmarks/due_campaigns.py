@@ -0,0 +1,101 @@
+"""
+Benchmark: cost of selecting due campaigns as the campaigns table grows.
+
+Compares the old full-table scan (select everything, filter in Python) with
+fetch_due_campaigns, which filters and paginates in the database. Runs on a
+throwaway SQLite store, whose schema carries the same partial id index as
+migrations/002_campaigns_due_index.sql, so `seconds` includes a real query
+planner's index use. All but DUE_CAMPAIGNS rows are completed campaigns:
+rows transferred and time per tick should stay flat for fetch_due_campaigns
+while the table grows. `plan` is SQLite's query plan for a due-campaigns page.
+
+Run from backend/gmail_oauth_backend:
+    python -m benchmarks.due_campaigns
+"""
+import os
+import tempfile
+
+_db_dir = tempfile.TemporaryDirectory()
+os.environ["STORAGE_BACKEND"] = "sqlite"
+os.environ["SQLITE_PATH"] = os.path.join(_db_dir.name, "campaign_engine.db")
+
+import json  # noqa: E402
+import time  # noqa: E402
+from datetime import datetime, timedelta, timezone  # noqa: E402
+
+from app.services import email_campaign_processor as processor  # noqa: E402
+from app.services.storage import storage  # noqa: E402
+
+TABLE_SIZES = [1_000, 10_000, 100_000]
+DUE_CAMPAIGNS = 25
+REPEATS = 20
+
+
+def seed(total: int, now: datetime):
+    storage._write("DELETE FROM campaigns")
+    rows = []
+    for i in range(total):
+        due = i % (total // DUE_CAMPAIGNS) == 0
+        scheduled = now - timedelta(minutes=i % 600 + 1)
+        rows.append({
+            "id": f"{i:08d}",
+            "name": f"Campaign {i}",
+            "status": "scheduled" if due else "completed",
+            "scheduled_at": scheduled.isoformat(),
+        })
+    storage.add_rows("campaigns", rows)
+    storage._write("ANALYZE")
+
+
+def legacy_tick(now: datetime):
+    """The pre-index behaviour: transfer the whole table, filter client-side"""
+    rows = storage._query("SELECT * FROM campaigns")
+    due = []
+    for c in rows:
+        scheduled_dt = datetime.fromisoformat(c["scheduled_at"].replace("Z", "+00:00"))
+        if c.get("status") in ["scheduled", "running"] and scheduled_dt <= now:
+            due.append(c)
+    return due, len(rows)
+
+
+def due_tick(now: datetime):
+    due = list(processor.fetch_due_campaigns(now, page_size=10))
+    return due, len(due)
+
+
+def due_plan(now: datetime) -> str:
+    sql = """SELECT id FROM campaigns
+              WHERE status IN ('scheduled', 'running') AND scheduled_at <= ?
+                AND (lease_expires_at IS NULL OR lease_expires_at < ?) AND id > ?
+              ORDER BY id LIMIT 10"""
+    stamp = now.isoformat(timespec="microseconds")
+    return "; ".join(r["detail"] for r in storage._query("EXPLAIN QUERY PLAN " + sql, [stamp, stamp, ""]))
+
+
+def measure(label, fn, now):
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        due, transferred = fn(now)
+    elapsed = (time.perf_counter() - start) / REPEATS
+    return {
+        "path": label,
+        "due": len(due),
+        "rows_transferred": transferred,
+        "seconds": round(elapsed, 5),
+    }
+
+
+def main():
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    for size in TABLE_SIZES:
+        seed(size, now)
+        for label, fn in (("legacy_full_scan", legacy_tick), ("fetch_due_campaigns", due_tick)):
+            result = measure(label, fn, now)
+            result["table_size"] = size
+            if fn is due_tick:
+                result["plan"] = due_plan(now)
+            print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
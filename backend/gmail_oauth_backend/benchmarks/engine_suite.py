@@ -0,0 +1,270 @@
+"""
+End-to-end benchmark suite for the campaign engine.
+
+Every scenario (provider x list size) seeds one campaign, its sender and a
+synthetic contact list into a fresh local SQLite store, then runs
+process_campaigns against the local stand-ins in benchmarks/stubs.py: an SMTP
+server, or Google's / Microsoft's send APIs and OAuth token endpoints. Pacing
+is disabled unless --pause is given. Each scenario runs in its own
+interpreter, so module state and peak RSS are per scenario.
+
+Reported per scenario:
+  emails_per_sec            sent emails over wall time of the run
+  send_latency_ms           nearest-rank p50/p99 and max from handing an email to the transport
+                            to its result (a batched email reports its batch)
+  loop_lag_ms               nearest-rank p50/p99 and max overshoot of a 10 ms ticker
+  peak_rss_kib              the scenario process's peak resident set
+  db_calls_per_email        storage round trips per sent email
+  provider_requests_per_email
+                            HTTP requests, or SMTP connections + messages
+
+The result is one JSON document (stdout, or --output FILE) carrying the
+commit and settings, so runs can be compared across commits.
+
+Run from backend/gmail_oauth_backend:
+    python -m benchmarks.engine_suite
+    python -m benchmarks.engine_suite --sizes 1000,100000,1000000 --providers smtp --output before.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+from benchmarks.seed_data import seed_sqlite_campaign, sender_row
+
+PROVIDERS = ("smtp", "gmail_oauth", "microsoft_oauth")
+LAG_TICK = 0.01
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="End-to-end campaign engine benchmarks")
+    parser.add_argument("--sizes", default="1000,10000", help="comma-separated contact list sizes")
+    parser.add_argument("--providers", default=",".join(PROVIDERS), help="comma-separated: " + ", ".join(PROVIDERS))
+    parser.add_argument("--steps", type=int, default=1, help="steps per campaign (no delay between them)")
+    parser.add_argument("--pause", type=float, default=0.0, help="pause_between_emails in seconds (0 disables pacing)")
+    parser.add_argument("--burst", type=int, default=50, help="SEND_BURST; above 1 Gmail/Graph send provider batches")
+    parser.add_argument("--rtt", type=float, default=0.0, help="stand-in round trip per request, in seconds")
+    parser.add_argument("--output", help="also write the JSON document to this file")
+    parser.add_argument("--scenario", help=argparse.SUPPRESS)   # provider:size, run in this process
+    return parser.parse_args(argv)
+
+
+def _nearest_rank(ordered: list, percent: float):
+    """Nearest-rank percentile of sorted values: always a value that was observed"""
+    return ordered[max(0, math.ceil(percent / 100 * len(ordered)) - 1)]
+
+
+def _percentiles(values: list) -> dict:
+    if not values:
+        return {"p50": None, "p99": None, "max": None}
+    ms = sorted(v * 1000 for v in values)
+    return {"p50": round(_nearest_rank(ms, 50), 3), "p99": round(_nearest_rank(ms, 99), 3), "max": round(ms[-1], 3)}
+
+
+def _git_commit():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--", "."], capture_output=True, text=True).stdout.strip())
+        return commit, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+
+# --- One scenario, in a child process --- #
+
+def _seed(storage, provider: str, size: int, args, transport: dict):
+    sender = sender_row(provider=provider, from_name="Bench")
+    if provider == "smtp":
+        sender.update(smtp_host="127.0.0.1", smtp_port=transport["port"], smtp_username="bench",
+                      smtp_password="bench", use_tls=False, use_ssl=False)
+    seed_sqlite_campaign(storage, size, steps=args.steps, pause=args.pause, sender=sender,
+                         body="<p>Hi {{first_name}} {{last_name}},</p><p>...</p>")
+
+
+def _count_calls(storage, interface) -> Counter:
+    """Count storage round trips by wrapping the interface methods on the shared instance"""
+    calls = Counter()
+
+    def counted(name, method):
+        def wrapper(*a, **kw):
+            calls[name] += 1
+            return method(*a, **kw)
+        return wrapper
+
+    for name, attr in vars(interface).items():
+        if callable(attr) and not name.startswith("_"):
+            setattr(storage, name, counted(name, getattr(storage, name)))
+    return calls
+
+
+def _time_transport(gmail_send) -> tuple:
+    """Wrap the transport entry points the processor imports, recording per-email latency"""
+    latencies, outcomes = [], Counter()
+    send_one, send_batch = gmail_send.send_email_via_config_async, gmail_send.send_email_batch_via_config_async
+
+    async def timed_send(*a, **kw):
+        start = time.perf_counter()
+        result = await send_one(*a, **kw)
+        latencies.append(time.perf_counter() - start)
+        outcomes["sent" if result.get("success") else "failed"] += 1
+        return result
+
+    async def timed_batch(from_email, messages, **kw):
+        start = time.perf_counter()
+        results = await send_batch(from_email, messages, **kw)
+        latencies.extend([time.perf_counter() - start] * len(messages))
+        for result in results:
+            outcomes["sent" if result.get("success") else "failed"] += 1
+        return results
+
+    gmail_send.send_email_via_config_async = timed_send
+    gmail_send.send_email_batch_via_config_async = timed_batch
+    return latencies, outcomes
+
+
+async def run_scenario(provider: str, size: int, args) -> dict:
+    import logging
+    logging.disable(logging.WARNING)
+
+    from benchmarks import stubs
+    from app.routes import gmail_send
+    from app.services import email_campaign_processor as processor, http_client
+    from app.services.smtp_pool import smtp_pool
+    from app.services.storage import storage, Storage
+
+    for stub in (stubs.SMTPStub, stubs.GoogleStub, stubs.GraphStub):
+        stub.round_trip = args.rtt
+    transport = {}
+    if provider == "smtp":
+        server, transport["port"] = stubs.serve_smtp()
+        provider_requests = lambda: stubs.SMTPStub.connections + stubs.SMTPStub.messages  # noqa: E731
+    elif provider == "gmail_oauth":
+        server, base = stubs.serve_http(stubs.GoogleStub)
+        stubs.point_google_at(gmail_send, base)
+        provider_requests = lambda: stubs.GoogleStub.requests  # noqa: E731
+    else:
+        server, base = stubs.serve_http(stubs.GraphStub)
+        stubs.point_microsoft_at(gmail_send, base)
+        provider_requests = lambda: stubs.GraphStub.requests  # noqa: E731
+
+    seed_start = time.perf_counter()
+    _seed(storage, provider, size, args, transport)
+    seed_seconds = time.perf_counter() - seed_start
+
+    db_calls = _count_calls(storage, Storage)
+    latencies, outcomes = _time_transport(gmail_send)
+
+    lags = []
+
+    async def lag_probe():
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(LAG_TICK)
+            lags.append(time.perf_counter() - start - LAG_TICK)
+
+    probe = asyncio.create_task(lag_probe())
+    start = time.perf_counter()
+    await processor.process_campaigns(wait=True)
+    elapsed = time.perf_counter() - start
+    probe.cancel()
+
+    await processor.shutdown_campaigns()
+    await http_client.close_http_clients()
+    smtp_pool.close_all()
+    server.shutdown()
+
+    sent = outcomes["sent"]
+    per_email = max(1, sent)
+    return {
+        "provider": provider,
+        "contacts": size,
+        "steps": args.steps,
+        "emails_sent": sent,
+        "emails_failed": outcomes["failed"],
+        "seconds": round(elapsed, 3),
+        "seed_seconds": round(seed_seconds, 3),
+        "emails_per_sec": round(sent / elapsed, 1) if elapsed else None,
+        "send_latency_ms": _percentiles(latencies),
+        "loop_lag_ms": _percentiles(lags),
+        "peak_rss_kib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "db_calls": sum(db_calls.values()),
+        "db_calls_per_email": round(sum(db_calls.values()) / per_email, 3),
+        "db_calls_by_method": dict(db_calls.most_common()),
+        "provider_requests": provider_requests(),
+        "provider_requests_per_email": round(provider_requests() / per_email, 3),
+    }
+
+
+# --- Suite runner --- #
+
+def run_suite(args) -> dict:
+    providers = [p.strip() for p in args.providers.split(",") if p.strip()]
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    unknown = set(providers) - set(PROVIDERS)
+    if unknown:
+        raise SystemExit(f"Unknown providers: {', '.join(sorted(unknown))}")
+
+    commit, dirty = _git_commit()
+    document = {
+        "suite": "campaign_engine",
+        "commit": commit,
+        "dirty": dirty,
+        "python": platform.python_version(),
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "settings": {"steps": args.steps, "pause": args.pause, "burst": args.burst, "rtt": args.rtt},
+        "scenarios": [],
+    }
+
+    with tempfile.TemporaryDirectory() as workdir:
+        for provider in providers:
+            for size in sizes:
+                env = dict(
+                    os.environ,
+                    STORAGE_BACKEND="sqlite",
+                    SQLITE_PATH=os.path.join(workdir, f"{provider}-{size}.db"),
+                    SEND_BURST=str(args.burst),
+                )
+                command = [
+                    sys.executable, "-m", "benchmarks.engine_suite", "--scenario", f"{provider}:{size}",
+                    "--steps", str(args.steps), "--pause", str(args.pause), "--rtt", str(args.rtt),
+                ]
+                done = subprocess.run(command, env=env, capture_output=True, text=True)
+                if done.returncode == 0:
+                    result = json.loads(done.stdout.strip().splitlines()[-1])
+                else:
+                    result = {"provider": provider, "contacts": size, "error": done.stderr.strip().splitlines()[-1:]}
+                document["scenarios"].append(result)
+                print(f"{provider:>16} {size:>9}: " + (
+                    f"{result['emails_per_sec']} emails/s, p99 send {result['send_latency_ms']['p99']} ms, "
+                    f"{result['db_calls_per_email']} db calls/email"
+                    if "error" not in result else f"failed: {result['error']}"
+                ), file=sys.stderr)
+    return document
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.scenario:
+        provider, size = args.scenario.split(":")
+        print(json.dumps(asyncio.run(run_scenario(provider, int(size), args))))
+        return
+
+    document = run_suite(args)
+    output = json.dumps(document, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Benchmark: API latency on the event loop while a campaign is sending.
+
+A local HTTP stub plays Google's token and Gmail send endpoints with a fixed
+delay. While a background task sends through Gmail, a probe keeps calling a
+trivial FastAPI route on the same loop and records its latency. With the old
+blocking path (a sync HTTP client on the loop) p99 tracks the provider delay;
+with the async path it stays at the idle baseline.
+
+Run from backend/gmail_oauth_backend:
+    python -m benchmarks.event_loop_latency
+"""
+import asyncio
+import json
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+from fastapi import FastAPI
+
+from benchmarks import fake_supabase
+
+fake_supabase.install()
+
+from app.routes import gmail_send  # noqa: E402
+from app.services import http_client  # noqa: E402
+
+PROVIDER_DELAY = 0.15
+SENDS = 15
+PROBE_INTERVAL = 0.01
+
+
+class _ProviderStub(BaseHTTPRequestHandler):
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        time.sleep(PROVIDER_DELAY)
+        body = b'{"access_token": "stub-token", "expires_in": 3600, "id": "stub"}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+probe_app = FastAPI()
+
+
+@probe_app.get("/ping")
+async def ping():
+    return {"ok": True}
+
+
+async def run_scenario(send_one) -> dict:
+    latencies = []
+    done = asyncio.Event()
+
+    async def sender():
+        for i in range(SENDS):
+            await send_one(f"user{i}@example.com")
+            await asyncio.sleep(0)
+        done.set()
+
+    async with httpx.AsyncClient(app=probe_app, base_url="http://probe") as client:
+        task = asyncio.create_task(sender())
+        while not done.is_set():
+            # A request due every PROBE_INTERVAL: time from due to answered
+            start = time.perf_counter()
+            await asyncio.sleep(PROBE_INTERVAL)
+            await client.get("/ping")
+            latencies.append(time.perf_counter() - start - PROBE_INTERVAL)
+        await task
+
+    latencies.sort()
+    return {
+        "probes": len(latencies),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 2),
+        "max_ms": round(latencies[-1] * 1000, 2),
+    }
+
+
+async def main():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _ProviderStub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    gmail_send.GOOGLE_TOKEN_URL = f"{base}/token"
+    gmail_send.GMAIL_SEND_URL = f"{base}/send"
+
+    async def blocking_send(to_email):
+        gmail_send.send_via_gmail_oauth("refresh", "sender@example.com", to_email, "Hi", "<p>Hi</p>")
+
+    async def async_send(to_email):
+        await gmail_send.send_via_gmail_oauth_async("refresh", "sender@example.com", to_email, "Hi", "<p>Hi</p>")
+
+    for label, send_one in (("blocking_sync", blocking_send), ("async_httpx", async_send)):
+        result = await run_scenario(send_one)
+        result["path"] = label
+        result["provider_delay_ms"] = PROVIDER_DELAY * 1000
+        print(json.dumps(result))
+
+    await http_client.close_http_clients()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,246 @@
+"""
+In-memory stand-in for the subset of the supabase/postgrest query builder the
+backend uses, so benchmarks can run without a Supabase project.
+
+Every executed request is counted per table together with the number of rows
+returned, which is what a real PostgREST round-trip would put on the wire.
+Inserts and updates are additionally counted as writes. The lease RPCs from
+migrations/005_campaign_leases.sql are mirrored in Python under one lock,
+which stands in for the database's row locks.
+"""
+import heapq
+import sys
+import threading
+import types
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+# Column DEFAULTs from the migrations, for rows seeded without them
+COLUMN_DEFAULTS = {("campaigns", "lease_expires_at"): "-infinity"}
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+        self.error = None
+
+
+def _compare(value, op, criteria):
+    if op == "is":
+        return value is None if criteria == "null" else value == criteria
+    if value is None:
+        return False
+    if op == "eq":
+        return str(value) == criteria
+    if op == "neq":
+        return str(value) != criteria
+    if op == "gt":
+        return str(value) > criteria
+    if op == "gte":
+        return str(value) >= criteria
+    if op == "lt":
+        return str(value) < criteria
+    if op == "lte":
+        return str(value) <= criteria
+    raise ValueError(f"Unsupported operator: {op}")
+
+
+class FakeQuery:
+    def __init__(self, db, table):
+        self.db = db
+        self.table_name = table
+        self.filters = []
+        self.order_keys = []
+        self.limit_count = None
+        self.is_single = False
+        self.mutation = None
+        self.payload = None
+
+    # --- Builders --- #
+    def select(self, *columns, **_):
+        self.mutation = None
+        return self
+
+    def update(self, payload):
+        self.mutation, self.payload = "update", payload
+        return self
+
+    def insert(self, payload, **_):
+        self.mutation, self.payload = "insert", payload
+        return self
+
+    def upsert(self, payload, on_conflict="", ignore_duplicates=False, **_):
+        self.mutation, self.payload = "upsert", payload
+        self.conflict_key = [c.strip() for c in on_conflict.split(",") if c.strip()]
+        self.ignore_duplicates = ignore_duplicates
+        return self
+
+    def _value(self, row, column):
+        return row.get(column, COLUMN_DEFAULTS.get((self.table_name, column)))
+
+    def eq(self, column, value):
+        self.filters.append(lambda row: self._value(row, column) == value)
+        return self
+
+    def in_(self, column, values):
+        values = set(values)
+        self.filters.append(lambda row: self._value(row, column) in values)
+        return self
+
+    def lt(self, column, value):
+        self.filters.append(lambda row: _compare(self._value(row, column), "lt", str(value)))
+        return self
+
+    def lte(self, column, value):
+        self.filters.append(lambda row: _compare(self._value(row, column), "lte", str(value)))
+        return self
+
+    def gt(self, column, value):
+        self.filters.append(lambda row: _compare(self._value(row, column), "gt", str(value)))
+        return self
+
+    def order(self, columns, desc=False):
+        self.order_keys = [c.strip() for c in columns.split(",")]
+        return self
+
+    def limit(self, count):
+        self.limit_count = count
+        return self
+
+    def single(self):
+        self.is_single = True
+        return self
+
+    # --- Execution --- #
+    def _matching(self):
+        rows = self.db.tables.setdefault(self.table_name, [])
+        return (r for r in rows if all(f(r) for f in self.filters))
+
+    def execute(self):
+        self.db.requests[self.table_name] += 1
+        if self.mutation:
+            self.db.writes[self.table_name] += 1
+
+        if self.mutation == "insert":
+            rows = self.payload if isinstance(self.payload, list) else [self.payload]
+            self.db.tables.setdefault(self.table_name, []).extend(dict(r) for r in rows)
+            return FakeResponse(rows)
+
+        if self.mutation == "upsert":
+            table = self.db.tables.setdefault(self.table_name, [])
+            key = lambda r: tuple(r.get(c) for c in self.conflict_key)
+            existing = {key(r): r for r in table}
+            rows = self.payload if isinstance(self.payload, list) else [self.payload]
+            fresh = [dict(r) for r in rows if key(r) not in existing]
+            if not self.ignore_duplicates:
+                # ON CONFLICT DO UPDATE: merge into the existing row
+                for r in rows:
+                    if key(r) in existing:
+                        existing[key(r)].update(r)
+            table.extend(fresh)
+            return FakeResponse(fresh)
+
+        matched = self._matching()
+        if self.mutation == "update":
+            matched = list(matched)
+            for row in matched:
+                row.update(self.payload)
+            return FakeResponse(matched)
+
+        sort_key = lambda r: tuple(str(r.get(k)) for k in self.order_keys)
+        if self.order_keys and self.limit_count is not None:
+            # Like an index scan with LIMIT: never materialise the full match set
+            matched = heapq.nsmallest(self.limit_count, matched, key=sort_key)
+        elif self.order_keys:
+            matched = sorted(matched, key=sort_key)
+        else:
+            matched = list(matched)[:self.limit_count]
+
+        self.db.rows_returned[self.table_name] += len(matched)
+        if self.is_single:
+            return FakeResponse(dict(matched[0]) if matched else None)
+        return FakeResponse([dict(r) for r in matched])
+
+
+class FakeRPC:
+    def __init__(self, db, fn, params):
+        self.db, self.fn, self.params = db, fn, params
+
+    def execute(self):
+        self.db.requests[f"rpc:{self.fn}"] += 1
+        with self.db.lock:
+            return FakeResponse(getattr(self.db, f"_rpc_{self.fn}")(**self.params))
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _lease_until(seconds) -> str:
+    return (datetime.now(timezone.utc) + timedelta(seconds=seconds)).isoformat()
+
+
+class FakeSupabase:
+    def __init__(self):
+        self.tables = {}
+        self.requests = Counter()
+        self.rows_returned = Counter()
+        self.writes = Counter()
+        self.lock = threading.Lock()
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+    def rpc(self, fn, params):
+        return FakeRPC(self, fn, params)
+
+    # --- migrations/005_campaign_leases.sql --- #
+    def _campaign(self, campaign_id):
+        return next((c for c in self.tables.get("campaigns", []) if c.get("id") == campaign_id), None)
+
+    @staticmethod
+    def _lease_live(campaign, now) -> bool:
+        return campaign.get("lease_expires_at", "-infinity") >= now
+
+    def _rpc_claim_campaign(self, p_campaign_id, p_worker, p_lease_seconds):
+        campaign, now = self._campaign(p_campaign_id), _now()
+        if not campaign or campaign.get("status") not in ("scheduled", "running"):
+            return False
+        holder = campaign.get("claimed_by")
+        if holder not in (None, p_worker) and self._lease_live(campaign, now):
+            return False
+        for other in self.tables["campaigns"]:
+            if (other is not campaign and other.get("sender_id") == campaign.get("sender_id")
+                    and other.get("claimed_by") not in (None, p_worker) and self._lease_live(other, now)):
+                return False
+        campaign.update(claimed_by=p_worker, lease_expires_at=_lease_until(p_lease_seconds))
+        return True
+
+    def _rpc_renew_campaign_leases(self, p_worker, p_campaign_ids, p_lease_seconds):
+        renewed = []
+        for campaign_id in p_campaign_ids:
+            campaign = self._campaign(campaign_id)
+            if campaign and campaign.get("claimed_by") == p_worker:
+                campaign["lease_expires_at"] = _lease_until(p_lease_seconds)
+                renewed.append(campaign_id)
+        return renewed
+
+    def _rpc_release_campaign_lease(self, p_campaign_id, p_worker):
+        campaign = self._campaign(p_campaign_id)
+        if campaign and campaign.get("claimed_by") == p_worker:
+            campaign.update(claimed_by=None, lease_expires_at="-infinity")
+        return None
+
+    def reset_counters(self):
+        self.requests.clear()
+        self.rows_returned.clear()
+        self.writes.clear()
+
+
+def install() -> FakeSupabase:
+    """Register a FakeSupabase as `app.services.supabase_client.supabase`"""
+    fake = FakeSupabase()
+    module = types.ModuleType("app.services.supabase_client")
+    module.supabase = fake
+    sys.modules["app.services.supabase_client"] = module
+    return fake
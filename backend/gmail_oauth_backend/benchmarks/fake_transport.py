@@ -0,0 +1,25 @@
+"""
+No-op email transport for benchmarks that run the real campaign processor:
+registered as `app.routes.gmail_send`, which the processor imports lazily.
+Every recipient "sent" is appended to `sent`.
+"""
+import sys
+import types
+
+sent = []
+
+
+async def _send_email_via_config(from_email, to_email, subject, body, **_):
+    sent.append(to_email)
+    return {"success": True}
+
+
+async def _send_email_batch_via_config(from_email, messages, **_):
+    sent.extend(m["to_email"] for m in messages)
+    return [{"success": True} for _ in messages]
+
+
+transport = types.ModuleType("app.routes.gmail_send")
+transport.send_email_via_config_async = _send_email_via_config
+transport.send_email_batch_via_config_async = _send_email_batch_via_config
+sys.modules["app.routes.gmail_send"] = transport
@@ -0,0 +1,81 @@
+"""
+Benchmark: Gmail sends one request per message vs HTTP batch requests.
+
+A local HTTP stub speaks enough of Google's API to stand in for it: the
+token endpoint, messages.send, and the multipart/mixed batch endpoint. Every
+request costs a fixed round trip plus a small per-message cost, and
+recipients at bounce.example.com are refused with a 400 inside the batch so
+partial failures are exercised. Both paths must report the same per-recipient
+outcome.
+
+Run from backend/gmail_oauth_backend:
+    python -m benchmarks.gmail_batch
+"""
+import asyncio
+import json
+import time
+
+from benchmarks import fake_supabase
+from benchmarks.stubs import GoogleStub, serve_http, point_google_at
+
+fake_supabase.install()
+
+from app.routes import gmail_send  # noqa: E402
+from app.services import http_client  # noqa: E402
+
+ROUND_TRIP = 0.03
+PER_MESSAGE = 0.001
+MESSAGES = 300
+BATCH_SIZE = 50
+
+
+def _messages() -> list:
+    return [{
+        "to_email": f"user{i}@{'bounce.example.com' if i % 25 == 0 else 'example.com'}",
+        "subject": f"Hello {i}",
+        "body": f"<p>Hi user {i}</p>",
+    } for i in range(MESSAGES)]
+
+
+async def main():
+    GoogleStub.round_trip, GoogleStub.per_message = ROUND_TRIP, PER_MESSAGE
+    server, base = serve_http(GoogleStub)
+    point_google_at(gmail_send, base)
+    gmail_send.GMAIL_BATCH_SIZE = BATCH_SIZE
+
+    sender = {"id": "sender-1", "user_email": "sender@example.com", "provider": "gmail_oauth", "refresh_token": "refresh"}
+    messages = _messages()
+
+    async def one_by_one():
+        return [
+            await gmail_send.send_email_via_config_async(sender["user_email"], m["to_email"], m["subject"], m["body"], config=sender)
+            for m in messages
+        ]
+
+    async def batched():
+        return await gmail_send.send_email_batch_via_config_async(sender["user_email"], messages, config=sender)
+
+    outcomes = {}
+    for label, run in (("per_message", one_by_one), ("gmail_batch", batched)):
+        GoogleStub.reset()
+        start = time.perf_counter()
+        results = await run()
+        elapsed = time.perf_counter() - start
+        outcomes[label] = [r["success"] for r in results]
+        print(json.dumps({
+            "path": label,
+            "messages": MESSAGES,
+            "http_requests": GoogleStub.requests,
+            "sent": sum(outcomes[label]),
+            "failed": outcomes[label].count(False),
+            "seconds": round(elapsed, 3),
+            "messages_per_sec": round(MESSAGES / elapsed, 1),
+        }))
+
+    assert outcomes["per_message"] == outcomes["gmail_batch"], "batch outcomes differ from per-message sends"
+    await http_client.close_http_clients()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
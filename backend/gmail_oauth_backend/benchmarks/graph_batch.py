@@ -0,0 +1,82 @@
+"""
+Benchmark: Outlook sends one /me/sendMail per message vs Graph JSON $batch.
+
+A local HTTP stub stands in for Microsoft's token endpoint, /me/sendMail and
+/$batch. Every request costs a fixed round trip plus a small per-message
+cost. Recipients at bounce.example.com are refused with a 400, and the first
+attempt for recipients at busy.example.com is throttled with a 429 and a
+short Retry-After (fractional here to keep the run brisk; Graph sends whole
+seconds). Throttled sends come back as deferred for the processor to queue
+again, on both paths. The stub counts accepted messages per recipient, so the
+run also checks that nothing was sent twice.
+
+Run from backend/gmail_oauth_backend:
+    python -m benchmarks.graph_batch
+"""
+import asyncio
+import json
+import time
+
+from benchmarks import fake_supabase
+from benchmarks.stubs import GraphStub, serve_http, point_microsoft_at
+
+fake_supabase.install()
+
+from app.routes import gmail_send  # noqa: E402
+from app.services import http_client  # noqa: E402
+
+ROUND_TRIP = 0.03
+PER_MESSAGE = 0.001
+MESSAGES = 200
+RETRY_AFTER = "0.2"
+
+
+def _recipient(i: int) -> str:
+    if i % 25 == 0:
+        return f"user{i}@bounce.example.com"
+    if i % 10 == 0:
+        return f"user{i}@busy.example.com"
+    return f"user{i}@example.com"
+
+
+async def main():
+    GraphStub.round_trip, GraphStub.per_message, GraphStub.retry_after = ROUND_TRIP, PER_MESSAGE, RETRY_AFTER
+    server, base = serve_http(GraphStub)
+    point_microsoft_at(gmail_send, base)
+
+    sender = {"id": "sender-1", "user_email": "sender@example.com", "provider": "microsoft_oauth", "refresh_token": "refresh"}
+    messages = [{"to_email": _recipient(i), "subject": f"Hello {i}", "body": f"<p>Hi user {i}</p>"} for i in range(MESSAGES)]
+
+    async def one_by_one():
+        return [
+            await gmail_send.send_email_via_config_async(sender["user_email"], m["to_email"], m["subject"], m["body"], config=sender)
+            for m in messages
+        ]
+
+    async def batched():
+        return await gmail_send.send_email_batch_via_config_async(sender["user_email"], messages, config=sender)
+
+    for label, run in (("per_message", one_by_one), ("graph_batch", batched)):
+        GraphStub.reset()
+        start = time.perf_counter()
+        results = await run()
+        elapsed = time.perf_counter() - start
+        print(json.dumps({
+            "path": label,
+            "messages": MESSAGES,
+            "http_requests": GraphStub.requests,
+            "sent": sum(r["success"] for r in results),
+            "failed": sum(not r["success"] and r.get("failure") != "throttled" for r in results),
+            "deferred": sum(r.get("failure") == "throttled" for r in results),
+            "throttled": len(GraphStub.throttled),
+            "duplicate_sends": sum(n - 1 for n in GraphStub.accepted.values()),
+            "seconds": round(elapsed, 3),
+            "messages_per_sec": round(MESSAGES / elapsed, 1),
+        }))
+
+    await http_client.close_http_clients()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,125 @@
+"""
+Benchmark: per-email logging cost of the campaign send path.
+
+Runs the real processor on a throwaway SQLite store with the no-op transport,
+so logging is most of what differs, once per setup:
+  sync:  the old setup, a StreamHandler on the root logger at DEBUG written
+         from the event loop, every delivered email logged
+  queue: configure_logging() defaults, records handed to a writer thread,
+         delivered emails sampled 1 in LOG_RECIPIENT_SAMPLE plus a summary
+         line per batch
+Both write to a file. The setups alternate for ROUNDS rounds and the best
+run of each is reported: emails/s, per-email time, log lines written and
+event-loop lag.
+
+Run from backend/gmail_oauth_backend:
+    python -m benchmarks.logging_overhead
+"""
+import os
+import tempfile
+
+_db_dir = tempfile.TemporaryDirectory()
+os.environ["STORAGE_BACKEND"] = "sqlite"
+os.environ["SQLITE_PATH"] = os.path.join(_db_dir.name, "campaign_engine.db")
+
+import asyncio  # noqa: E402
+import json  # noqa: E402
+import logging  # noqa: E402
+import math  # noqa: E402
+import time  # noqa: E402
+
+from benchmarks.fake_transport import sent  # noqa: E402
+from benchmarks.seed_data import campaign_row, seed_sqlite_campaign  # noqa: E402
+
+from app.config import LOG_RECIPIENT_SAMPLE  # noqa: E402
+from app.services import email_campaign_processor as processor  # noqa: E402
+from app.services.log_pipeline import configure_logging, stop_logging  # noqa: E402
+from app.services.storage import storage  # noqa: E402
+
+CONTACTS = 20_000
+ROUNDS = 3
+LAG_TICK = 0.005
+
+
+def seed():
+    seed_sqlite_campaign(storage, CONTACTS, campaign_ids=())
+
+
+def add_campaign(campaign_id: str):
+    storage.add_rows("campaigns", [campaign_row(campaign_id)])
+
+
+def sync_logging(stream):
+    """What main.py and the processor used to set up with basicConfig"""
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+    root.addHandler(handler)
+    root.setLevel(logging.DEBUG)
+    processor.recipient_log.every = 1
+
+
+def queue_logging(stream):
+    configure_logging(stream=stream)
+    processor.recipient_log.every = LOG_RECIPIENT_SAMPLE
+
+
+async def run(mode: str, setup, round_no: int) -> dict:
+    log_path = os.path.join(_db_dir.name, f"{mode}.log")
+    add_campaign(f"campaign-{mode}-{round_no}")
+    sent.clear()
+
+    lags = []
+
+    async def lag_probe():
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(LAG_TICK)
+            lags.append(time.perf_counter() - start - LAG_TICK)
+
+    with open(log_path, "w") as stream:
+        setup(stream)
+        probe = asyncio.create_task(lag_probe())
+        start = time.perf_counter()
+        await processor.process_campaigns(wait=True)
+        elapsed = time.perf_counter() - start
+        probe.cancel()
+        stop_logging()
+        for handler in list(logging.getLogger().handlers):
+            handler.flush()
+            logging.getLogger().removeHandler(handler)
+
+    with open(log_path) as f:
+        lines = sum(1 for _ in f)
+    return {
+        "mode": mode,
+        "emails_sent": len(sent),
+        "seconds": round(elapsed, 3),
+        "emails_per_sec": round(len(sent) / elapsed),
+        "us_per_email": round(elapsed / len(sent) * 1e6, 1),
+        "log_lines": lines,
+        # Nearest rank: an observed lag, never extrapolated past the largest
+        "loop_lag_p99_ms": round(sorted(lags)[math.ceil(0.99 * len(lags)) - 1] * 1000, 3) if lags else None,
+    }
+
+
+async def main():
+    seed()
+    runs = {"sync": [], "queue": []}
+    for round_no in range(ROUNDS):
+        runs["sync"].append(await run("sync", sync_logging, round_no))
+        runs["queue"].append(await run("queue", queue_logging, round_no))
+    results = [min(runs[mode], key=lambda r: r["seconds"]) for mode in ("sync", "queue")]
+    print(json.dumps({
+        "contacts": CONTACTS,
+        "rounds": ROUNDS,
+        "results": results,
+        "us_saved_per_email": round(results[0]["us_per_email"] - results[1]["us_per_email"], 1),
+    }))
+    await processor.shutdown_campaigns()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,114 @@
+"""
+Regression check: how long a campaign tick blocks the event loop.
+
+Runs one process_campaigns tick over a two-step campaign on a throwaway
+SQLite store with the no-op transport. Every storage call first sleeps
+DB_LATENCY, standing in for a Supabase round trip, so a call made on the
+event loop thread stalls the loop the way a blocking PostgREST request does.
+
+Every callback the loop runs is timed. Reports the loop's total busy time,
+the longest single callback, and the storage calls made on the loop thread
+rather than on the storage executor. Exits 1 when any storage call ran on
+the loop or the longest callback exceeds --max-block-ms, so it can gate
+changes to the campaign engine.
+
+Run from backend/gmail_oauth_backend:
+    python -m benchmarks.loop_blocking [--contacts 1000] [--db-latency-ms 5] [--max-block-ms 50]
+"""
+import os
+import tempfile
+
+_db_dir = tempfile.TemporaryDirectory()
+os.environ["STORAGE_BACKEND"] = "sqlite"
+os.environ["SQLITE_PATH"] = os.path.join(_db_dir.name, "campaign_engine.db")
+
+import argparse  # noqa: E402
+import asyncio  # noqa: E402
+import functools  # noqa: E402
+import json  # noqa: E402
+import logging  # noqa: E402
+import sys  # noqa: E402
+import threading  # noqa: E402
+import time  # noqa: E402
+from collections import Counter  # noqa: E402
+
+from benchmarks.fake_transport import sent  # noqa: E402
+from benchmarks.seed_data import seed_sqlite_campaign, sender_row  # noqa: E402
+
+from app.services import email_campaign_processor as processor  # noqa: E402
+from app.services.storage import storage, METHOD_TABLES  # noqa: E402
+
+STEPS = 2
+
+callback_seconds = []
+loop_calls = Counter()   # storage method -> calls made on the event loop thread
+pool_calls = Counter()
+
+
+def time_callbacks():
+    """Time every callback the event loop runs (tasks advance through Handle._run too)"""
+    run = asyncio.events.Handle._run
+
+    def timed_run(self):
+        start = time.perf_counter()
+        try:
+            run(self)
+        finally:
+            callback_seconds.append(time.perf_counter() - start)
+
+    asyncio.events.Handle._run = timed_run
+
+
+def add_latency(latency: float, loop_thread: threading.Thread):
+    """Make every storage method sleep `latency` first and record which thread called it"""
+    for name in METHOD_TABLES:
+        method = getattr(storage, name)
+
+        @functools.wraps(method)
+        def slow(*args, _method=method, _name=name, **kwargs):
+            (loop_calls if threading.current_thread() is loop_thread else pool_calls)[_name] += 1
+            time.sleep(latency)
+            return _method(*args, **kwargs)
+
+        setattr(storage, name, slow)
+
+
+def seed(contacts: int):
+    seed_sqlite_campaign(storage, contacts, steps=STEPS, sender=sender_row(provider="gmail_oauth"))
+
+
+async def main(args) -> int:
+    logging.disable(logging.WARNING)
+    seed(args.contacts)
+    add_latency(args.db_latency_ms / 1000, threading.current_thread())
+    time_callbacks()
+
+    start = time.perf_counter()
+    await processor.process_campaigns(wait=True)
+    elapsed = time.perf_counter() - start
+    await processor.shutdown_campaigns()
+
+    blocks = sorted(callback_seconds)
+    longest_ms = blocks[-1] * 1000 if blocks else 0.0
+    print(json.dumps({
+        "contacts": args.contacts,
+        "emails_sent": len(sent),
+        "db_latency_ms": args.db_latency_ms,
+        "tick_seconds": round(elapsed, 3),
+        "loop_busy_ms": round(sum(blocks) * 1000, 1),
+        "longest_block_ms": round(longest_ms, 2),
+        "p99_block_ms": round(blocks[int(len(blocks) * 0.99) - 1] * 1000, 3) if blocks else 0.0,
+        "callbacks": len(blocks),
+        "storage_calls_on_loop": sum(loop_calls.values()),
+        "storage_calls_on_executor": sum(pool_calls.values()),
+        "on_loop_by_method": dict(loop_calls),
+    }))
+    return 0 if not loop_calls and longest_ms <= args.max_block_ms else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--contacts", type=int, default=1_000)
+    parser.add_argument("--db-latency-ms", type=float, default=5.0)
+    parser.add_argument("--max-block-ms", type=float, default=50.0)
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,65 @@
+"""
+Benchmark: what the /metrics instrumentation costs on the send path.
+
+Times the updates one batched send makes (in-flight gauge up and down, a
+latency observation, outcome counters) and one storage call counter, from
+the event loop and from 8 threads at once the way SMTP sends and storage
+calls update them. Also renders the exposition for a populated registry.
+
+Run from backend/gmail_oauth_backend:
+    python -m benchmarks.metrics_overhead
+"""
+import json
+import threading
+import time
+
+from app.services.metrics import metrics, track_sends, count_send_outcomes, STORAGE_CALLS
+from app.services.retry_policy import SendFailure, PERMANENT_RECIPIENT
+
+ROUNDS = 200_000
+THREADS = 8
+OUTCOMES = [(True, "", None)] * 49 + [(False, "Invalid To header", SendFailure(PERMANENT_RECIPIENT))]
+
+
+def one_send(provider: str = "gmail_oauth"):
+    with track_sends(provider, 50):
+        pass
+    count_send_outcomes(provider, OUTCOMES)
+    STORAGE_CALLS.inc(table="campaign_step_queue", method="due_steps")
+
+
+def timed(rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        one_send()
+    return time.perf_counter() - start
+
+
+def main():
+    single = timed(ROUNDS)
+
+    threads = [threading.Thread(target=timed, args=(ROUNDS // THREADS,)) for _ in range(THREADS)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    contended = time.perf_counter() - start
+
+    for provider in ("smtp", "microsoft_oauth"):
+        one_send(provider)
+    start = time.perf_counter()
+    text = metrics.render()
+    render_seconds = time.perf_counter() - start
+
+    print(json.dumps({
+        "updates_per_send": 7,
+        "us_per_send_single_thread": round(single / ROUNDS * 1e6, 3),
+        "us_per_send_8_threads": round(contended / ROUNDS * 1e6, 3),
+        "render_ms": round(render_seconds * 1000, 3),
+        "render_bytes": len(text),
+    }))
+
+
+if __name__ == "__main__":
+    main()
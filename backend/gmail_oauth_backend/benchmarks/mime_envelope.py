@@ -0,0 +1,91 @@
+"""
+Micro-benchmark: CPU seconds to build 10k outgoing messages, before and
+after the per-step envelope cache, for the Gmail (base64url raw) and SMTP
+(multipart string) paths.
+
+"static" sends one subject and body to every recipient; "personalized"
+renders the first name into both, so every message differs and only the
+shared sender header is reused; nothing personalized is cached.
+
+Run from backend/gmail_oauth_backend:
+    python -m benchmarks.mime_envelope
+"""
+import base64
+import json
+import time
+from email.header import Header
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from email.utils import formataddr
+
+from app.services import mime_builder
+from app.services.mime_builder import build_envelope
+from app.services.templates import compile_template
+
+MESSAGES = 10_000
+FROM_EMAIL = "sender@example.com"
+FROM_NAME = "Example Sales"
+SUBJECT = "Quick question about {{first_name|your team}}'s outreach"
+BODY = "<p>Hi {{first_name|there}},</p>" + "<p>We help teams like yours send better campaigns.</p>" * 40
+
+
+def legacy_gmail_raw(to_email: str, subject: str, body: str) -> str:
+    """_gmail_raw_message as it was before the envelope cache"""
+    message = MIMEText(body, "html", "utf-8")
+    message["to"] = to_email
+    message["from"] = FROM_EMAIL
+    message["subject"] = str(Header(subject, "utf-8"))
+    return base64.urlsafe_b64encode(message.as_bytes()).decode()
+
+
+def legacy_smtp_string(to_email: str, subject: str, body: str) -> str:
+    """send_via_smtp's message building as it was before the envelope cache"""
+    message = MIMEMultipart("alternative")
+    message["From"] = formataddr((str(Header(FROM_NAME, "utf-8")), FROM_EMAIL))
+    message["To"] = formataddr(("Recipient", to_email))
+    message["Subject"] = str(Header(subject, "utf-8"))
+    message.attach(MIMEText(body, "html", "utf-8"))
+    return message.as_string()
+
+
+def envelope_gmail_raw(to_email: str, subject: str, body: str) -> str:
+    return build_envelope(FROM_EMAIL, subject, body).gmail_raw(to_email)
+
+
+def envelope_smtp_string(to_email: str, subject: str, body: str) -> str:
+    envelope = build_envelope(FROM_EMAIL, subject, body, from_name=FROM_NAME, multipart=True)
+    return envelope.as_string(formataddr(("Recipient", to_email)))
+
+
+def _cpu_seconds(build, personalized: bool) -> float:
+    subject_template, body_template = compile_template(SUBJECT), compile_template(BODY)
+    contacts = [{"email": f"user{i}@example.com", "first_name": f"User{i}"} for i in range(MESSAGES)]
+    static = {}
+    start = time.process_time()
+    for contact in contacts:
+        values = contact if personalized else static
+        build(contact["email"], subject_template.render(values), body_template.render(values))
+    return time.process_time() - start
+
+
+def main():
+    for path, before, after in (
+        ("gmail_raw", legacy_gmail_raw, envelope_gmail_raw),
+        ("smtp_string", legacy_smtp_string, envelope_smtp_string),
+    ):
+        for personalized in (False, True):
+            mime_builder.clear_cache()
+            legacy = _cpu_seconds(before, personalized)
+            cached = _cpu_seconds(after, personalized)
+            print(json.dumps({
+                "path": path,
+                "step": "personalized" if personalized else "static",
+                "messages": MESSAGES,
+                "legacy_cpu_s": round(legacy, 3),
+                "envelope_cpu_s": round(cached, 3),
+                "speedup": round(legacy / cached, 1),
+            }))
+
+
+if __name__ == "__main__":
+    main()
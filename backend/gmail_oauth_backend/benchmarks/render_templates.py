@@ -0,0 +1,68 @@
+"""
+Micro-benchmark: per-recipient rendering cost of the old render_pitch
+(one full-string replace per contact key) against CompiledTemplate (parse
+once per step, render with one join), on bodies of increasing size.
+
+Run from backend/gmail_oauth_backend:
+    python -m benchmarks.render_templates
+"""
+import json
+import timeit
+
+from app.services.templates import compile_template
+
+BODY_SIZES_KIB = [1, 16, 128]
+RECIPIENTS = 2_000
+
+CONTACT = {
+    "id": "00000001",
+    "email": "jane@example.com",
+    "first_name": "Jane",
+    "last_name": "Doe",
+    "company": "Example Inc",
+    "title": "CTO",
+    "city": "Berlin",
+    "industry": "Software",
+}
+
+
+def legacy_render_pitch(template: str, contact: dict) -> str:
+    """render_pitch as it was before CompiledTemplate"""
+    rendered = template
+    replaced_placeholders = set()
+    for key, val in contact.items():
+        placeholder = f"{{{{{key}}}}}"
+        if placeholder in rendered and placeholder not in replaced_placeholders:
+            rendered = rendered.replace(placeholder, str(val or ""))
+            replaced_placeholders.add(placeholder)
+    return rendered
+
+
+def make_body(kib: int) -> str:
+    paragraph = (
+        "Hi {{first_name}}, I noticed {{company}} is growing in {{city}}. "
+        + "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 8
+        + "\n"
+    )
+    return (paragraph * (kib * 1024 // len(paragraph) + 1))[:kib * 1024]
+
+
+def main():
+    for kib in BODY_SIZES_KIB:
+        body = make_body(kib)
+        compiled = compile_template(body)
+        assert compiled.render(CONTACT) == legacy_render_pitch(body, CONTACT)
+
+        legacy = timeit.timeit(lambda: legacy_render_pitch(body, CONTACT), number=RECIPIENTS)
+        fast = timeit.timeit(lambda: compiled.render(CONTACT), number=RECIPIENTS)
+        print(json.dumps({
+            "body_kib": kib,
+            "recipients": RECIPIENTS,
+            "legacy_ms": round(legacy * 1000, 1),
+            "compiled_ms": round(fast * 1000, 1),
+            "speedup": round(legacy / fast, 1),
+        }))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Benchmark: the retry queue and dead letters.
+
+Runs the campaign engine on a throwaway SQLite store with a transport that
+fails the way SMTP servers do, classified by the real retry_policy:
+FLAKY contacts disconnect on their first two attempts and then go through,
+GONE contacts are refused with 550 (unknown mailbox), DOWN contacts time out
+on every attempt. A second campaign's sender is rejected with 535 (bad
+credentials) on every send.
+
+Backoff delays are shortened (RETRY_BASE_DELAY) so the run takes seconds.
+Reports deliveries, retries and dead letters by kind, the second campaign's
+status and sends, and how long campaign tasks were in flight compared to the
+backoff they scheduled: with retries on the queue nothing waits out a
+backoff, where the old sleep-and-retry loop held a worker for all of it.
+
+Run from backend/gmail_oauth_backend:
+    python -m benchmarks.retry_queue
+"""
+import os
+import tempfile
+
+_db_dir = tempfile.TemporaryDirectory()
+os.environ["STORAGE_BACKEND"] = "sqlite"
+os.environ["SQLITE_PATH"] = os.path.join(_db_dir.name, "campaign_engine.db")
+os.environ["RETRY_BASE_DELAY"] = "0.2"
+os.environ["RETRY_MAX_DELAY"] = "1"
+os.environ["RETRY_MAX_ATTEMPTS"] = "4"
+
+import asyncio  # noqa: E402
+import json  # noqa: E402
+import logging  # noqa: E402
+import smtplib  # noqa: E402
+import socket  # noqa: E402
+import time  # noqa: E402
+from collections import Counter  # noqa: E402
+from datetime import datetime, timezone  # noqa: E402
+
+from benchmarks import fake_transport, seed_data  # noqa: E402
+
+from app.services import email_campaign_processor as processor, retry_policy  # noqa: E402
+from app.services.storage import storage  # noqa: E402
+
+CONTACTS = 1_000
+FLAKY, GONE, DOWN = range(3)   # contact index % 20 -> behaviour; the rest deliver
+FLAKY_FAILURES = 2
+
+attempts = Counter()   # recipient -> sends tried
+sender_sends = Counter()
+backoff_scheduled = []
+
+
+def _smtp_outcome(from_email, to_email) -> Exception:
+    """The exception the stand-in server raises for this send, or None"""
+    if from_email == "revoked@example.com":
+        return smtplib.SMTPAuthenticationError(535, b"5.7.8 Username and Password not accepted")
+    kind = int(to_email[4:to_email.index("@")]) % 20
+    if kind == FLAKY and attempts[to_email] <= FLAKY_FAILURES:
+        return smtplib.SMTPServerDisconnected("Connection unexpectedly closed")
+    if kind == GONE:
+        return smtplib.SMTPRecipientsRefused({to_email: (550, b"5.1.1 No such user")})
+    if kind == DOWN:
+        return socket.timeout("timed out")
+    return None
+
+
+async def send_email_via_config(from_email, to_email, subject, body, **_):
+    attempts[to_email] += 1
+    sender_sends[from_email] += 1
+    error = _smtp_outcome(from_email, to_email)
+    if error is None:
+        return {"success": True}
+    return {"success": False, "error": str(error), "failure": retry_policy.classify_smtp_exception(error)}
+
+
+def _recording_backoff(attempt, *args, **kwargs):
+    delay = backoff(attempt, *args, **kwargs)
+    backoff_scheduled.append(delay)
+    return delay
+
+
+backoff = retry_policy.backoff_delay
+processor.backoff_delay = _recording_backoff
+fake_transport.transport.send_email_via_config_async = send_email_via_config
+
+
+def seed():
+    seed_data.seed_sqlite_campaign(storage, CONTACTS)
+    storage.add_rows("email_configs", [seed_data.sender_row("sender-2", "revoked@example.com")])
+    storage.add_rows("campaigns", [seed_data.campaign_row("campaign-2", "sender-2")])
+
+
+def campaign_row(campaign_id: str) -> dict:
+    return storage._query("SELECT status, scheduled_at, sent_count, failed_count FROM campaigns WHERE id = ?", [campaign_id])[0]
+
+
+async def main():
+    logging.disable(logging.ERROR)
+    seed()
+
+    start = time.perf_counter()
+    in_flight_seconds, passes = 0.0, 0
+    while True:
+        passes += 1
+        tick = time.perf_counter()
+        await processor.process_campaigns(wait=True)
+        in_flight_seconds += time.perf_counter() - tick
+        row = campaign_row("campaign-1")
+        if row["status"] != "running":
+            break
+        # Retries are due after their backoff; nothing is in flight meanwhile
+        due_in = (datetime.fromisoformat(row["scheduled_at"]) - datetime.now(timezone.utc)).total_seconds()
+        await asyncio.sleep(max(0.0, due_in))
+    elapsed = time.perf_counter() - start
+    await processor.shutdown_campaigns()
+
+    row, paused = campaign_row("campaign-1"), campaign_row("campaign-2")
+    dead = storage._query("SELECT campaign_id, failure, COUNT(*) AS n, MAX(attempts) AS attempts FROM campaign_dead_letters GROUP BY campaign_id, failure")
+    expected = Counter(i % 20 for i in range(CONTACTS))
+    print(json.dumps({
+        "contacts": CONTACTS,
+        "campaign_status": row["status"],
+        "delivered": row["sent_count"],
+        "expected_delivered": CONTACTS - expected[GONE] - expected[DOWN],
+        "failed": row["failed_count"],
+        "dead_letters": {f"{d['campaign_id']}:{d['failure']}": {"count": d["n"], "max_attempts": d["attempts"]} for d in dead},
+        "retries_scheduled": len(backoff_scheduled),
+        "sends": sender_sends["sender@example.com"],
+        "revoked_sender_campaign": paused["status"],
+        "revoked_sender_sends": sender_sends["revoked@example.com"],
+        "processor_passes": passes,
+        "seconds": round(elapsed, 2),
+        "campaign_task_seconds": round(in_flight_seconds, 2),
+        "backoff_seconds_scheduled": round(sum(backoff_scheduled), 2),
+    }))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,63 @@
+"""
+Rows the campaign benchmarks seed: one due campaign on one sender, mailing a
+list of opted-in contacts. campaign_runner.seed_campaign puts them in the
+in-memory Supabase stand-in; seed_sqlite_campaign writes them through
+SQLiteStorage.add_rows for the benchmarks that run on the SQLite backend.
+No side effects on import, so either kind of benchmark can use it.
+"""
+SEED_CHUNK = 10_000   # contacts per insert, keeping the 100k-contact runs' memory flat
+STEP_BODY = "Hi {{first_name}}, ..."
+
+
+def sender_row(sender_id: str = "sender-1", user_email: str = "sender@example.com", provider: str = "smtp", **fields) -> dict:
+    row = {"id": sender_id, "user_email": user_email, "provider": provider}
+    if provider != "smtp":
+        row["refresh_token"] = "stub-refresh"
+    row.update(fields)
+    return row
+
+
+def contact_rows(start: int, stop: int) -> list:
+    return [{
+        "id": f"{i:08d}",
+        "email": f"user{i}@example.com",
+        "first_name": f"User{i}",
+        "last_name": "Example",
+        "email_list_id": "list-1",
+        "status": "active",
+        "opt_in": True,
+    } for i in range(start, stop)]
+
+
+def campaign_row(campaign_id: str = "campaign-1", sender_id: str = "sender-1", steps: int = 1,
+                 pause: float = 0, body: str = STEP_BODY) -> dict:
+    return {
+        "id": campaign_id,
+        "name": "Benchmark",
+        "status": "scheduled",
+        "scheduled_at": "2020-01-01T00:00:00+00:00",
+        "email_list_id": "list-1",
+        "sender_id": sender_id,
+        "pause_between_emails": pause,
+        "sent_count": 0,
+        "content": {"steps": [
+            {"subject": f"Step {i + 1} for {{{{first_name}}}}", "body": body, "delayDays": 0}
+            for i in range(steps)
+        ]},
+    }
+
+
+def seed_sqlite_campaign(storage, contacts: int, steps: int = 1, pause: float = 0, sender: dict = None,
+                         campaign_ids=("campaign-1",), body: str = STEP_BODY):
+    """
+    Seed a SQLiteStorage with `sender` (default: an SMTP sender), `contacts`
+    contacts on list-1 and a due campaign per id in `campaign_ids`.
+    """
+    sender = sender or sender_row()
+    storage.add_rows("email_configs", [sender])
+    for start in range(0, contacts, SEED_CHUNK):
+        storage.add_rows("email_contacts", contact_rows(start, min(contacts, start + SEED_CHUNK)))
+    if campaign_ids:
+        storage.add_rows("campaigns", [
+            campaign_row(campaign_id, sender["id"], steps, pause, body) for campaign_id in campaign_ids
+        ])
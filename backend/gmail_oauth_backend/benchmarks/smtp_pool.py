@@ -0,0 +1,70 @@
+"""
+Benchmark: SMTP sends with a fresh connection per message vs pooled sessions.
+
+A local SMTP stub adds a fixed delay to the greeting and to AUTH, standing in
+for the TCP/TLS handshake and login a real provider costs. The old path paid
+that on every message; the pool pays it once per session and only adds an
+RSET round trip before reuse.
+
+Run from backend/gmail_oauth_backend:
+    python -m benchmarks.smtp_pool
+"""
+import json
+import smtplib
+import time
+from email.mime.text import MIMEText
+
+from benchmarks.stubs import SMTPStub, serve_smtp
+from app.services.smtp_pool import SMTPSessionPool
+
+HANDSHAKE_DELAY = 0.02
+MESSAGES = 200
+
+
+def _message(to_email: str) -> str:
+    message = MIMEText("<p>Hi</p>", "html")
+    message["Subject"] = "Hi"
+    message["From"] = "sender@example.com"
+    message["To"] = to_email
+    return message.as_string()
+
+
+def per_message_connect(port: int):
+    for i in range(MESSAGES):
+        to_email = f"user{i}@example.com"
+        with smtplib.SMTP("127.0.0.1", port) as server:
+            server.login("user", "pass")
+            server.sendmail("sender@example.com", [to_email], _message(to_email))
+
+
+def pooled(port: int):
+    pool = SMTPSessionPool(max_idle=2, idle_timeout=60, max_messages=MESSAGES, timeout=10)
+    for i in range(MESSAGES):
+        to_email = f"user{i}@example.com"
+        with pool.session("127.0.0.1", port, "user", "pass") as server:
+            server.sendmail("sender@example.com", [to_email], _message(to_email))
+    pool.close_all()
+
+
+def main():
+    SMTPStub.handshake_delay = HANDSHAKE_DELAY
+    server, port = serve_smtp()
+
+    for label, run in (("connect_per_message", per_message_connect), ("pooled_sessions", pooled)):
+        SMTPStub.reset()
+        start = time.perf_counter()
+        run(port)
+        elapsed = time.perf_counter() - start
+        print(json.dumps({
+            "path": label,
+            "messages": MESSAGES,
+            "connections": SMTPStub.connections,
+            "seconds": round(elapsed, 3),
+            "messages_per_sec": round(MESSAGES / elapsed, 1),
+        }))
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
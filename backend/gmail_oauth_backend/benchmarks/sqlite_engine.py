@@ -0,0 +1,68 @@
+"""
+Benchmark: the campaign engine end-to-end on local SQLite storage.
+
+Selects STORAGE_BACKEND=sqlite with a throwaway database file, seeds one
+campaign of CONTACTS contacts with a three-step sequence whose steps have no
+delay, and runs process_campaigns with pacing disabled and a no-op email
+transport. No Supabase project or network access is needed. Reports
+throughput and checks the database afterwards: every (step, contact) pair
+must be in campaign_deliveries exactly once.
+
+Run from backend/gmail_oauth_backend:
+    python -m benchmarks.sqlite_engine
+"""
+import os
+import tempfile
+
+_db_dir = tempfile.TemporaryDirectory()
+os.environ["STORAGE_BACKEND"] = "sqlite"
+os.environ["SQLITE_PATH"] = os.path.join(_db_dir.name, "campaign_engine.db")
+
+import asyncio  # noqa: E402
+import json  # noqa: E402
+import logging  # noqa: E402
+import time  # noqa: E402
+
+from benchmarks.fake_transport import sent  # noqa: E402
+from benchmarks.seed_data import seed_sqlite_campaign  # noqa: E402
+
+from app.services import email_campaign_processor as processor  # noqa: E402
+from app.services.storage import storage  # noqa: E402
+
+CONTACTS = 5_000
+STEPS = 3
+
+
+def seed():
+    seed_sqlite_campaign(storage, CONTACTS, steps=STEPS)
+
+
+async def main():
+    logging.disable(logging.INFO)
+    seed()
+
+    start = time.perf_counter()
+    await processor.process_campaigns(wait=True)
+    elapsed = time.perf_counter() - start
+    await processor.shutdown_campaigns()
+
+    campaign = storage._query("SELECT status, sent_count FROM campaigns WHERE id = 'campaign-1'")[0]
+    deliveries = storage._query(
+        "SELECT COUNT(*) AS n, COUNT(DISTINCT step_index || ':' || contact_id) AS pairs FROM campaign_deliveries"
+    )[0]
+    print(json.dumps({
+        "storage": type(storage).__name__,
+        "contacts": CONTACTS,
+        "steps": STEPS,
+        "emails_sent": len(sent),
+        "deliveries_recorded": deliveries["n"],
+        "distinct_deliveries": deliveries["pairs"],
+        "campaign_status": campaign["status"],
+        "campaign_sent_count": campaign["sent_count"],
+        "seconds": round(elapsed, 3),
+        "emails_per_sec": round(len(sent) / elapsed),
+    }))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
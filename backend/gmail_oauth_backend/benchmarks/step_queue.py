@@ -0,0 +1,74 @@
+"""
+Benchmark: a three-step sequence (delayDays 0, 2, 5) on 1,000 contacts.
+
+Each pass runs process_campaigns once and reports what went out. Between
+passes the processor ticks IDLE_TICKS times while nothing is due, counting
+the requests it makes per table, then the clock is fast-forwarded to the
+next step by shifting every stored timestamp back. Before the step queue,
+all three steps went out in the first pass, back-to-back.
+
+Run from backend/gmail_oauth_backend:
+    python -m benchmarks.step_queue
+"""
+import asyncio
+import json
+import logging
+from datetime import datetime, timedelta
+
+from benchmarks.campaign_runner import fake, seed_campaign, sent
+
+from app.services import email_campaign_processor as processor  # noqa: E402
+
+CONTACTS = 1_000
+DELAY_DAYS = [0, 2, 5]
+IDLE_TICKS = 100
+
+
+def fast_forward(days: float):
+    """Move every stored timestamp `days` into the past"""
+    def shift(value):
+        return (datetime.fromisoformat(value) - timedelta(days=days)).isoformat()
+
+    campaign = fake.tables["campaigns"][0]
+    campaign["scheduled_at"] = shift(campaign["scheduled_at"])
+    for entry in fake.tables["campaign_step_queue"]:
+        entry["due_at"] = shift(entry["due_at"])
+
+
+async def main():
+    logging.disable(logging.INFO)
+    seed_campaign(CONTACTS, steps=len(DELAY_DAYS))
+    campaign = fake.tables["campaigns"][0]
+    for step, days in zip(campaign["content"]["steps"], DELAY_DAYS):
+        step["delayDays"] = days
+
+    passes = []
+    for step_idx in range(len(DELAY_DAYS)):
+        sent.clear()
+        await processor.process_campaigns(wait=True)
+        result = {
+            "pass": step_idx + 1,
+            "emails_sent": len(sent),
+            "status": campaign["status"],
+            "next_due_in_days": None,
+        }
+        pending = [e for e in fake.tables["campaign_step_queue"] if e["status"] == "pending"]
+        if pending:
+            next_due = datetime.fromisoformat(campaign["scheduled_at"])
+            result["next_due_in_days"] = round((next_due - datetime.now(next_due.tzinfo)).total_seconds() / 86400, 3)
+
+            fake.reset_counters()
+            for _ in range(IDLE_TICKS):
+                await processor.process_campaigns(wait=True)
+            result["idle_ticks"] = IDLE_TICKS
+            result["idle_requests"] = dict(fake.requests)
+            fast_forward(DELAY_DAYS[step_idx + 1])
+        passes.append(result)
+
+    await processor.shutdown_campaigns()
+    for result in passes:
+        print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,244 @@
+"""
+Local stand-ins for the services the send paths talk to, shared by the
+benchmarks: an ESMTP server, Google's token/messages.send/batch endpoints and
+Microsoft's token/sendMail/$batch endpoints.
+
+Each stub counts what it receives and sleeps a configurable round trip (and
+per-message cost) per request, standing in for network and provider time.
+Recipient domains steer failures: bounce.example.com is refused, and on
+Graph the first attempt for busy.example.com is throttled with a 429. Graph
+can also enforce a mailbox rate limit (GraphStub.rate_limit), answering 429
+once it is exceeded.
+"""
+import base64
+import json
+import re
+import socketserver
+import threading
+import time
+from collections import Counter
+from email import message_from_bytes
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class SMTPStub(socketserver.StreamRequestHandler):
+    """Just enough ESMTP for smtplib: EHLO, AUTH PLAIN, MAIL/RCPT/DATA, RSET, QUIT"""
+
+    handshake_delay = 0.0   # greeting and AUTH, i.e. TCP/TLS setup and login
+    round_trip = 0.0        # every other command
+    connections = 0
+    messages = 0
+    lock = threading.Lock()
+
+    @classmethod
+    def reset(cls):
+        cls.connections = 0
+        cls.messages = 0
+
+    def reply(self, line: str):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        with self.lock:
+            SMTPStub.connections += 1
+        time.sleep(self.handshake_delay)
+        self.reply("220 stub ESMTP")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode().strip().upper()
+            if command.startswith("EHLO"):
+                self.reply("250-stub")
+                self.reply("250 AUTH PLAIN")
+            elif command.startswith("AUTH"):
+                time.sleep(self.handshake_delay)
+                self.reply("235 authenticated")
+            elif command == "DATA":
+                self.reply("354 go ahead")
+                while self.rfile.readline() not in (b".\r\n", b""):
+                    pass
+                time.sleep(self.round_trip)
+                with self.lock:
+                    SMTPStub.messages += 1
+                self.reply("250 queued")
+            elif command == "QUIT":
+                self.reply("221 bye")
+                return
+            else:
+                time.sleep(self.round_trip)
+                self.reply("250 ok")
+
+
+class _HTTPStub(BaseHTTPRequestHandler):
+    round_trip = 0.0
+    per_message = 0.0
+
+    def reply(self, status: int, body: bytes, content_type: str = "application/json", headers: dict = None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _gmail_recipient(payload: dict) -> str:
+    return message_from_bytes(base64.urlsafe_b64decode(payload["raw"]))["to"]
+
+
+class GoogleStub(_HTTPStub):
+    """OAuth token endpoint, messages.send and the multipart/mixed batch endpoint"""
+
+    requests = 0
+    sent = 0
+
+    @classmethod
+    def reset(cls):
+        cls.requests = 0
+        cls.sent = 0
+
+    @staticmethod
+    def send_response_for(recipient: str) -> tuple:
+        if recipient.endswith("@bounce.example.com"):
+            return 400, {"error": {"code": 400, "message": "Invalid To header"}}
+        GoogleStub.sent += 1
+        return 200, {"id": f"msg-{recipient}", "labelIds": ["SENT"]}
+
+    def do_POST(self):
+        GoogleStub.requests += 1
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.path == "/token":
+            self.reply(200, b'{"access_token": "stub-token", "expires_in": 3600}')
+        elif self.path == "/send":
+            time.sleep(self.round_trip + self.per_message)
+            status, payload = self.send_response_for(_gmail_recipient(json.loads(body)))
+            self.reply(status, json.dumps(payload).encode())
+        elif self.path == "/batch":
+            self.batch(body.decode())
+        else:
+            self.reply(404, b"{}")
+
+    def batch(self, body: str):
+        boundary = re.search(r"boundary=(\S+)", self.headers["Content-Type"]).group(1)
+        parts = [p for p in body.split(f"--{boundary}") if p.strip() not in ("", "--")]
+        time.sleep(self.round_trip + self.per_message * len(parts))
+
+        out = []
+        for part in parts:
+            content_id = re.search(r"Content-ID: <([^>]+)>", part).group(1)
+            payload = json.loads(part.strip().rsplit("\r\n\r\n", 1)[1])
+            status, response = self.send_response_for(_gmail_recipient(payload))
+            out.append(
+                f"--batch_stub\r\nContent-Type: application/http\r\n"
+                f"Content-ID: <response-{content_id}>\r\n\r\n"
+                f"HTTP/1.1 {status} {'OK' if status == 200 else 'Bad Request'}\r\n"
+                f"Content-Type: application/json; charset=UTF-8\r\n\r\n{json.dumps(response)}\r\n"
+            )
+        out.append("--batch_stub--\r\n")
+        self.reply(200, "".join(out).encode(), "multipart/mixed; boundary=batch_stub")
+
+
+class GraphStub(_HTTPStub):
+    """OAuth token endpoint, /me/sendMail and /$batch"""
+
+    retry_after = "0.2"   # fractional to keep runs brisk; Graph sends whole seconds
+    rate_limit = None     # emails/s accepted before answering 429 (1 s burst); None = unlimited
+    requests = 0
+    rate_limited = 0
+    accepted = Counter()
+    throttled = set()
+    lock = threading.Lock()
+    _allowance = 0.0
+    _checked_at = 0.0
+
+    @classmethod
+    def reset(cls):
+        cls.requests = 0
+        cls.rate_limited = 0
+        cls.accepted = Counter()
+        cls.throttled = set()
+        cls._allowance = float(cls.rate_limit or 0)
+        cls._checked_at = time.monotonic()
+
+    @classmethod
+    def _within_rate_limit(cls) -> bool:
+        now = time.monotonic()
+        cls._allowance = min(cls.rate_limit, cls._allowance + (now - cls._checked_at) * cls.rate_limit)
+        cls._checked_at = now
+        if cls._allowance < 1:
+            cls.rate_limited += 1
+            return False
+        cls._allowance -= 1
+        return True
+
+    def send_mail(self, message: dict) -> tuple:
+        """(status, headers, body) for one sendMail call"""
+        recipient = message["message"]["toRecipients"][0]["emailAddress"]["address"]
+        with self.lock:
+            if recipient.endswith("@busy.example.com") and recipient not in self.throttled:
+                self.throttled.add(recipient)
+                return 429, {"Retry-After": self.retry_after}, {"error": {"code": "TooManyRequests"}}
+            if recipient.endswith("@bounce.example.com"):
+                return 400, {}, {"error": {"code": "ErrorInvalidRecipients"}}
+            if self.rate_limit and not self._within_rate_limit():
+                return 429, {"Retry-After": self.retry_after}, {"error": {"code": "ApplicationThrottled"}}
+            self.accepted[recipient] += 1
+        return 202, {}, None
+
+    def reply_json(self, status: int, payload=None, headers: dict = None):
+        self.reply(status, json.dumps(payload).encode() if payload is not None else b"", headers=headers)
+
+    def do_POST(self):
+        with self.lock:
+            GraphStub.requests += 1
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.path == "/token":
+            self.reply_json(200, {"access_token": "stub-token", "expires_in": 3600})
+            return
+        payload = json.loads(body)
+        if self.path == "/sendMail":
+            time.sleep(self.round_trip + self.per_message)
+            status, headers, body = self.send_mail(payload)
+            self.reply_json(status, body, headers)
+        elif self.path == "/$batch":
+            time.sleep(self.round_trip + self.per_message * len(payload["requests"]))
+            responses = []
+            for item in payload["requests"]:
+                status, headers, body = self.send_mail(item["body"])
+                responses.append({"id": item["id"], "status": status, "headers": headers, "body": body})
+            self.reply_json(200, {"responses": responses})
+        else:
+            self.reply_json(404, {})
+
+
+def serve_smtp() -> tuple:
+    """Start SMTPStub on a free port; returns (server, port)"""
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), SMTPStub)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, server.server_address[1]
+
+
+def serve_http(handler) -> tuple:
+    """Start an HTTP stub on a free port; returns (server, base URL)"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def point_google_at(gmail_send, base: str):
+    gmail_send.GOOGLE_TOKEN_URL = f"{base}/token"
+    gmail_send.GMAIL_SEND_URL = f"{base}/send"
+    gmail_send.GMAIL_BATCH_URL = f"{base}/batch"
+
+
+def point_microsoft_at(gmail_send, base: str):
+    gmail_send.MICROSOFT_TOKEN_URL = f"{base}/token"
+    gmail_send.GRAPH_SEND_MAIL_URL = f"{base}/sendMail"
+    gmail_send.GRAPH_BATCH_URL = f"{base}/$batch"
@@ -1,46 +1,62 @@
 from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
+from pydantic import BaseModel
+from typing import Optional
 import logging
 import asyncio
+import contextlib
 from contextlib import asynccontextmanager
+from app.services.log_pipeline import configure_logging
+
+# ---------- Logging ----------
+# Before the app imports, so nothing logs ahead of the queue; LOG_LEVEL/LOG_LEVELS pick levels
+configure_logging()
 
 # Routes
 from app.routes import gmail_oauth, microsoft_oauth, smtp_email, email_generator
 from app.routes import email_accounts
 from app.routes import gmail_send
+from app.services.http_client import open_http_clients, close_http_clients
 
 # Services
-from app.services.email_campaign_processor import process_campaigns
+from app.services.email_campaign_processor import process_campaigns, shutdown_campaigns
+from app.services.smtp_pool import smtp_pool
+from app.services.campaign_wakeups import campaign_wakeups
+from app.services.metrics import metrics, monitor_event_loop
 
-# ---------- Logging ----------
-logging.basicConfig(level=logging.DEBUG, format="%(asctime)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
 # ---------- Background Task ----------
 async def campaign_processor_task():
-    """Background task that runs the campaign processor every 60 seconds"""
-    while True:
-        try:
-            logger.info("Running campaign processor...")
-            await process_campaigns()  # Direct await since it's async
-        except Exception as e:
-            logger.error(f"Error in campaign processor: {e}")
-        await asyncio.sleep(60)  # Wait 60 seconds before next check
+    """
+    Background task that starts campaigns as they become due: it sleeps until
+    the earliest scheduled_at it knows of (see /admin/campaigns/notify), with
+    a reconciliation poll (CAMPAIGN_RECONCILE_INTERVAL) as a safety net.
+    """
+    await campaign_wakeups.run(process_campaigns)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Manage application lifecycle - start background tasks"""
+    open_http_clients()  # one pooled client set shared by every route and service
     task = asyncio.create_task(campaign_processor_task())
+    lag_probe = asyncio.create_task(monitor_event_loop())
     logger.info("Campaign processor background task started")
     
     yield  # Application runs here
     
+    lag_probe.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await lag_probe
     task.cancel()
     try:
         await task
     except asyncio.CancelledError:
         logger.info("Campaign processor background task cancelled")
+    await shutdown_campaigns()
+    await close_http_clients()
+    smtp_pool.close_all()
 
 # ---------- App ----------
 app = FastAPI(lifespan=lifespan)
@@ -49,6 +65,11 @@ app = FastAPI(lifespan=lifespan)
 def root():
     return {"status": "FastAPI backend running with Email Generator and Campaign Processor"}
 
+@app.get("/metrics")
+def metrics_endpoint():
+    """Send counters, latency histograms and engine gauges in Prometheus text format"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 # ---------- Exception Handler ----------
 @app.exception_handler(Exception)
 async def custom_exception_handler(request: Request, exc: Exception):
@@ -84,12 +105,39 @@ app.include_router(email_accounts.router)
 app.include_router(gmail_send.router, prefix="/email", tags=["Gmail Send"])
 app.include_router(email_generator.router, prefix="/ai", tags=["AI Email Generator"])
 
+# ---------- Campaign Schedule Notifications ----------
+class CampaignNotification(BaseModel):
+    campaign_id: Optional[int] = None  # campaigns.id, as the processor and the heap key it
+    scheduled_at: Optional[str] = None
+    status: Optional[str] = "scheduled"
+    record: Optional[dict] = None  # Supabase database webhook payload
+
+@app.post("/admin/campaigns/notify")
+async def notify_campaign_schedule(notification: CampaignNotification):
+    """
+    Tell the processor a campaign was created, rescheduled or cancelled, so it
+    wakes at the new scheduled_at instead of at the next reconciliation. Takes
+    either the fields directly or a Supabase webhook on the campaigns table.
+    """
+    record = notification.record or {}
+    campaign_id = record.get("id") or notification.campaign_id
+    if not campaign_id:
+        return JSONResponse(status_code=400, content={"message": "campaign_id is required"})
+
+    campaign_wakeups.notify(
+        campaign_id,
+        record.get("scheduled_at", notification.scheduled_at),
+        record.get("status", notification.status),
+        record.get("lease_expires_at"),
+    )
+    return {"status": "success", "next_wake_at": campaign_wakeups.next_wake_at()}
+
 # ---------- Manual Trigger for Campaigns ----------
 @app.post("/admin/process-campaigns")
 async def manual_process_campaigns():
     try:
         await process_campaigns()
-        return {"status": "success", "message": "Campaign processing completed"}
+        return {"status": "success", "message": "Due campaigns started"}
     except Exception as e:
         logger.error(f"Manual campaign processing failed: {e}")
         return {"status": "error", "message": "Processing failed"}
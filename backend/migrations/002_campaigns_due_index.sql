@@ -0,0 +1,13 @@
+-- Partial index backing the campaign processor's due-campaign query:
+--   WHERE status IN ('scheduled', 'running') AND scheduled_at <= now()
+--     AND id > :last_id
+--   ORDER BY id
+--   LIMIT :page_size
+-- The query walks an id keyset, so the index is on id: each page is a range
+-- read starting at last_id, and scheduled_at and the lease are checked on the
+-- rows read. Completed and failed campaigns never enter the index, so a tick
+-- reads at most the live campaigns, however long the campaign history grows.
+
+CREATE INDEX IF NOT EXISTS idx_campaigns_due_keyset
+    ON campaigns (id)
+    WHERE status IN ('scheduled', 'running');
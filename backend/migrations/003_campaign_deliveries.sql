@@ -0,0 +1,25 @@
+-- Per-recipient send ledger. One row per (campaign, step, contact) that was
+-- delivered, so a resumed campaign can skip contacts it already reached.
+CREATE TABLE IF NOT EXISTS campaign_deliveries (
+    id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
+    campaign_id BIGINT NOT NULL REFERENCES campaigns(id) ON DELETE CASCADE,
+    step_index INTEGER NOT NULL,
+    contact_id BIGINT NOT NULL REFERENCES email_contacts(id) ON DELETE CASCADE,
+    contact_email VARCHAR(255),
+    sent_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    CONSTRAINT uq_campaign_deliveries UNIQUE (campaign_id, step_index, contact_id)
+);
+
+-- The unique constraint's index also serves the processor's batch lookup:
+--   WHERE campaign_id = ? AND step_index = ? AND contact_id IN (...)
+-- and the cascade from campaigns. Deleting a contact cascades through this one:
+CREATE INDEX IF NOT EXISTS idx_campaign_deliveries_contact
+    ON campaign_deliveries (contact_id);
+
+ALTER TABLE campaign_deliveries ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Allow all operations for authenticated users" ON campaign_deliveries
+    FOR ALL
+    TO authenticated
+    USING (true)
+    WITH CHECK (true);
@@ -0,0 +1,6 @@
+-- Supports streaming a list's sendable contacts in id order:
+--   WHERE email_list_id = ? AND status = 'active' AND opt_in AND id > ?
+--   ORDER BY id LIMIT ?
+CREATE INDEX IF NOT EXISTS idx_email_contacts_list_keyset
+    ON email_contacts (email_list_id, id)
+    WHERE status = 'active' AND opt_in = TRUE;
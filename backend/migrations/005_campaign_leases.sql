@@ -0,0 +1,82 @@
+-- Lease-based campaign claims, so several workers/replicas can run the
+-- campaign processor without sending the same campaign twice.
+--
+-- A worker may only send a campaign while it holds an unexpired lease on it.
+-- Leases are renewed by a heartbeat; a lease that is not renewed expires and
+-- the campaign can be taken over by another worker, which resumes from the
+-- delivery ledger. Unclaimed rows keep lease_expires_at at -infinity so the
+-- processor can filter claimable campaigns with a single
+-- lease_expires_at < now() condition.
+
+ALTER TABLE campaigns
+    ADD COLUMN IF NOT EXISTS claimed_by TEXT,
+    ADD COLUMN IF NOT EXISTS lease_expires_at TIMESTAMPTZ NOT NULL DEFAULT '-infinity';
+
+-- Claims are made per sender: all live campaigns of one sender stay on one
+-- worker so that worker's pacing is the sender's pacing.
+CREATE INDEX IF NOT EXISTS idx_campaigns_sender_lease
+    ON campaigns (sender_id, lease_expires_at)
+    WHERE claimed_by IS NOT NULL;
+
+-- Atomically claim (or re-claim, or take over) a due campaign.
+-- Returns true when p_worker now holds the lease. Ids use the campaigns
+-- columns' own (integer) types.
+CREATE OR REPLACE FUNCTION claim_campaign(p_campaign_id campaigns.id%TYPE, p_worker TEXT, p_lease_seconds INTEGER)
+RETURNS BOOLEAN
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_sender_id campaigns.sender_id%TYPE;
+    v_claimed campaigns.id%TYPE;
+BEGIN
+    SELECT sender_id INTO v_sender_id FROM campaigns WHERE id = p_campaign_id;
+    IF NOT FOUND THEN
+        RETURN FALSE;
+    END IF;
+
+    -- Serialise claims per sender so the affinity check below cannot race
+    PERFORM pg_advisory_xact_lock(hashtext(COALESCE(v_sender_id::TEXT, p_campaign_id::TEXT)));
+
+    UPDATE campaigns c
+       SET claimed_by = p_worker,
+           lease_expires_at = now() + make_interval(secs => p_lease_seconds)
+     WHERE c.id = p_campaign_id
+       AND c.status IN ('scheduled', 'running')
+       AND (c.claimed_by IS NULL OR c.claimed_by = p_worker OR c.lease_expires_at < now())
+       AND NOT EXISTS (
+           SELECT 1 FROM campaigns o
+            WHERE o.sender_id = c.sender_id
+              AND o.id <> c.id
+              AND o.claimed_by <> p_worker
+              AND o.lease_expires_at >= now()
+       )
+    RETURNING c.id INTO v_claimed;
+
+    RETURN v_claimed IS NOT NULL;
+END;
+$$;
+
+-- Heartbeat: extend every lease p_worker still holds among p_campaign_ids.
+-- Returns the ids that were renewed; any missing id was lost to a takeover.
+CREATE OR REPLACE FUNCTION renew_campaign_leases(p_worker TEXT, p_campaign_ids BIGINT[], p_lease_seconds INTEGER)
+RETURNS SETOF BIGINT
+LANGUAGE sql
+AS $$
+    UPDATE campaigns
+       SET lease_expires_at = now() + make_interval(secs => p_lease_seconds)
+     WHERE id = ANY(p_campaign_ids)
+       AND claimed_by = p_worker
+    RETURNING id::BIGINT;
+$$;
+
+-- Give a lease back once the worker stops sending the campaign.
+CREATE OR REPLACE FUNCTION release_campaign_lease(p_campaign_id campaigns.id%TYPE, p_worker TEXT)
+RETURNS VOID
+LANGUAGE sql
+AS $$
+    UPDATE campaigns
+       SET claimed_by = NULL,
+           lease_expires_at = '-infinity'
+     WHERE id = p_campaign_id
+       AND claimed_by = p_worker;
+$$;
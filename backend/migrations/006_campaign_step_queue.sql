@@ -0,0 +1,44 @@
+-- Per-contact queue of campaign steps, so multi-step sequences honour each
+-- step's delayDays instead of sending every step back-to-back.
+--
+-- When a campaign starts, its first step is enqueued for every contact on its
+-- list. Each step delivered to a contact enqueues that contact's next step,
+-- due delayDays later. The processor only reads entries that are due, and
+-- between steps the campaign's scheduled_at is moved to its earliest pending
+-- entry, so a sequence waiting days for its next step costs nothing.
+CREATE TABLE IF NOT EXISTS campaign_step_queue (
+    id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
+    campaign_id BIGINT NOT NULL REFERENCES campaigns(id) ON DELETE CASCADE,
+    contact_id BIGINT NOT NULL REFERENCES email_contacts(id) ON DELETE CASCADE,
+    step_index INTEGER NOT NULL,
+    due_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'pending',   -- pending, sent, failed, skipped
+    processed_at TIMESTAMP WITH TIME ZONE,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    CONSTRAINT uq_campaign_step_queue UNIQUE (campaign_id, contact_id, step_index)
+);
+
+-- Backs the processor's due-entry query and the next-due lookup:
+--   WHERE campaign_id = ? AND status = 'pending' AND due_at <= now()
+--   ORDER BY due_at LIMIT ?
+-- Processed entries leave the index, so it only holds outstanding steps.
+CREATE INDEX IF NOT EXISTS idx_campaign_step_queue_due
+    ON campaign_step_queue (campaign_id, due_at)
+    WHERE status = 'pending';
+
+-- Deleting a contact cascades through this one
+CREATE INDEX IF NOT EXISTS idx_campaign_step_queue_contact
+    ON campaign_step_queue (contact_id);
+
+-- Set once a campaign's first step has been enqueued for its whole list
+ALTER TABLE campaigns
+    ADD COLUMN IF NOT EXISTS steps_enqueued_at TIMESTAMP WITH TIME ZONE,
+    ADD COLUMN IF NOT EXISTS total_recipients INTEGER;
+
+ALTER TABLE campaign_step_queue ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Allow all operations for authenticated users" ON campaign_step_queue
+    FOR ALL
+    TO authenticated
+    USING (true)
+    WITH CHECK (true);
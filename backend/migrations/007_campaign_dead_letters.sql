@@ -0,0 +1,41 @@
+-- Retries and dead letters for campaign sends.
+--
+-- Failed sends are classified. Transient failures (timeouts, 5xx, SMTP 4xx)
+-- go back into campaign_step_queue, due after an exponential backoff with
+-- jitter, and `attempts` counts how often an entry has been tried. Permanent
+-- failures (unknown mailbox, invalid recipient, revoked sender credentials)
+-- and transient ones that ran out of attempts are written here instead and
+-- never retried automatically.
+ALTER TABLE campaign_step_queue
+    ADD COLUMN IF NOT EXISTS attempts INTEGER NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS last_error TEXT;
+
+CREATE TABLE IF NOT EXISTS campaign_dead_letters (
+    id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
+    campaign_id BIGINT NOT NULL REFERENCES campaigns(id) ON DELETE CASCADE,
+    step_index INTEGER NOT NULL,
+    contact_id BIGINT NOT NULL REFERENCES email_contacts(id) ON DELETE CASCADE,
+    contact_email VARCHAR(255),
+    sender_id BIGINT REFERENCES email_configs(id) ON DELETE SET NULL,
+    failure VARCHAR(30) NOT NULL,   -- transient, permanent_recipient, permanent_sender
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    CONSTRAINT uq_campaign_dead_letters UNIQUE (campaign_id, step_index, contact_id)
+);
+
+-- Review by sender, e.g. everything a revoked account could not send
+CREATE INDEX IF NOT EXISTS idx_campaign_dead_letters_sender
+    ON campaign_dead_letters (sender_id, created_at);
+
+-- Deleting a contact cascades through this one
+CREATE INDEX IF NOT EXISTS idx_campaign_dead_letters_contact
+    ON campaign_dead_letters (contact_id);
+
+ALTER TABLE campaign_dead_letters ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Allow all operations for authenticated users" ON campaign_dead_letters
+    FOR ALL
+    TO authenticated
+    USING (true)
+    WITH CHECK (true);
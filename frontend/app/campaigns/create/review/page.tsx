@@ -17,6 +17,7 @@ import {
   ExternalLink, RefreshCw, Loader2, Server
 } from 'lucide-react';
 import supabase from '@/lib/supabaseClient';
+import { campaignApi } from '@/lib/campaignApi';
 
 type Step = {
   id: string;
@@ -250,6 +251,14 @@ function to24HourTime(time: string, ampm: 'AM' | 'PM'): string {
 
       if (error) throw error;
 
+      // Wake the processor for the new start time; if this fails, its
+      // reconciliation poll still picks the campaign up within a minute
+      try {
+        await campaignApi.notifyCampaignSchedule(Number(campaignData.id), scheduledAt);
+      } catch (notifyError) {
+        console.warn('Could not notify the campaign processor:', notifyError);
+      }
+
       // Clear localStorage since campaign is complete
       localStorage.removeItem('campaignId');
       localStorage.removeItem('campaignName');
@@ -199,6 +199,15 @@ class CampaignApi {
     });
   }
 
+  // Wake the campaign processor for a campaign just scheduled or rescheduled,
+  // so it starts at scheduled_at instead of at the processor's next poll
+  async notifyCampaignSchedule(campaignId: number, scheduledAt: string, status: string = 'scheduled'): Promise<{ status: string; next_wake_at: number | null }> {
+    return this.request('/admin/campaigns/notify', {
+      method: 'POST',
+      body: JSON.stringify({ campaign_id: campaignId, scheduled_at: scheduledAt, status }),
+    });
+  }
+
   // Pause a campaign
   async pauseCampaign(campaignId: string): Promise<{ message: string }> {
     return this.request(`/api/campaigns/${campaignId}/pause`, {